@@ -0,0 +1,336 @@
+"""
+BM25 인덱스 모듈
+인덱싱 시 BM25 역색인을 디스크에 미리 만들어 두고, 서비스에서는 memory-map으로 로드합니다.
+
+BM25 가중치(idf · tf 정규화)를 인덱싱 시점에 미리 계산해 토큰 x 문서 CSR 행렬로 저장하므로,
+검색은 쿼리 토큰 행만 골라 희소 행렬-벡터 곱 한 번과 argpartition top-k로 끝납니다.
+
+디스크 구조 (Config.BM25_INDEX_PATH):
+- meta.json: 파라미터 (k1, b, 토크나이저, 문서 수, 평균 문서 길이)
+- vocab.json: {토큰: 토큰 ID}
+- weights_indptr.npy / weights_indices.npy / weights_data.npy: 토큰 x 문서 BM25 가중치 CSR 행렬
+- docs.bin / docs_offsets.npy: 문서 레코드(JSON) 저장소, 검색 결과에 필요한 문서만 디코딩
+"""
+import fcntl
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+from array import array
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterable, List, Tuple, Dict, Any
+
+import numpy as np
+from scipy import sparse
+from langchain_core.documents import Document
+
+from app.core.config import Config
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 2
+
+
+class WhitespaceTokenizer:
+    """공백 기준 토크나이저 (소문자)"""
+    name = "whitespace"
+
+    def __call__(self, text: str) -> List[str]:
+        return text.lower().split()
+
+
+class CharNgramTokenizer:
+    """한국어/영어 혼합 토크나이저
+
+    한글 어절은 조사·어미가 붙어도 매칭되도록 문자 n-gram으로 분해하고,
+    영어/숫자 단어는 그대로 유지합니다.
+    예) "피부가 건조해요 UV" → ["피부", "부가", "건조", "조해", "해요", "uv"]
+    """
+    name = "ngram"
+
+    _WORD_RE = re.compile(r"[가-힣]+|[^\W_가-힣]+")
+
+    def __init__(self, n: int = 2):
+        self.n = n
+
+    def __call__(self, text: str) -> List[str]:
+        tokens = []
+        n = self.n
+        for word in self._WORD_RE.findall(text.lower()):
+            if "가" <= word[0] <= "힣" and len(word) > n:
+                tokens.extend(word[i:i + n] for i in range(len(word) - n + 1))
+            else:
+                tokens.append(word)
+        return tokens
+
+
+class KiwiTokenizer:
+    """형태소 분석 토크나이저 (kiwipiepy 필요)
+
+    명사·동사/형용사 어간·어근·외국어·숫자 형태소만 토큰으로 사용합니다.
+    """
+    name = "kiwi"
+
+    _TAG_PREFIXES = ("NN", "VV", "VA", "XR", "SL", "SN", "SH")
+
+    def __init__(self):
+        try:
+            from kiwipiepy import Kiwi
+        except ImportError:
+            raise ImportError("kiwi 토크나이저를 사용하려면 kiwipiepy를 설치하세요: pip install kiwipiepy")
+        self._kiwi = Kiwi()
+
+    def __call__(self, text: str) -> List[str]:
+        return [
+            token.form.lower()
+            for token in self._kiwi.tokenize(text)
+            if token.tag.startswith(self._TAG_PREFIXES)
+        ]
+
+
+TOKENIZERS = {
+    WhitespaceTokenizer.name: WhitespaceTokenizer,
+    CharNgramTokenizer.name: CharNgramTokenizer,
+    KiwiTokenizer.name: KiwiTokenizer,
+}
+
+
+def get_tokenizer(name: str = None):
+    """이름으로 토크나이저 생성 (기본: Config.BM25_TOKENIZER)"""
+    name = name or Config.BM25_TOKENIZER
+    if name not in TOKENIZERS:
+        raise ValueError(f"지원하지 않는 BM25 토크나이저입니다: {name} (지원: {', '.join(TOKENIZERS)})")
+    return TOKENIZERS[name]()
+
+
+class BM25Index:
+    """디스크 기반 BM25 인덱스"""
+
+    def __init__(self, index_dir, meta, vocab, weights, doc_offsets, doc_blob, tokenizer=None):
+        self.index_dir = Path(index_dir)
+        self.meta = meta
+        self.num_docs = meta["num_docs"]
+        self.vocab = vocab
+        self.weights = weights
+        self.doc_offsets = doc_offsets
+        self.doc_blob = doc_blob
+        self.tokenizer = tokenizer or get_tokenizer(meta["tokenizer"])
+
+    @classmethod
+    def build(cls, records: Iterable[Tuple[str, str, Dict[str, Any]]], index_dir=None, k1=1.5, b=0.75, tokenizer=None) -> "BM25Index":
+        """
+        BM25 인덱스를 생성하여 디스크에 저장
+
+        Args:
+            records: (id, text, metadata) 이터러블
+            index_dir: 저장 경로 (기본: Config.BM25_INDEX_PATH)
+            k1, b: BM25 파라미터
+            tokenizer: 토크나이저 (기본: Config.BM25_TOKENIZER)
+
+        Returns:
+            BM25Index: memory-map으로 로드된 인덱스
+        """
+        index_dir = Path(index_dir or Config.BM25_INDEX_PATH)
+        tokenizer = tokenizer or get_tokenizer()
+        index_dir.parent.mkdir(parents=True, exist_ok=True)
+        tmp_dir = Path(tempfile.mkdtemp(prefix=f"{index_dir.name}.tmp-", dir=index_dir.parent))
+
+        logger.info(f"🔍 BM25 인덱스 생성 중... ({index_dir}, 토크나이저: {tokenizer.name})")
+        start_time = time.time()
+
+        vocab: Dict[str, int] = {}
+        term_ids = array("i")
+        doc_ids = array("i")
+        tfs = array("f")
+        doc_lengths = array("f")
+        doc_offsets = array("q", [0])
+
+        # 문서 레코드는 읽는 즉시 파일로 기록
+        with open(tmp_dir / "docs.bin", "wb") as blob:
+            for doc_id, (record_id, text, metadata) in enumerate(records):
+                tokens = tokenizer(text)
+                doc_lengths.append(len(tokens))
+                for token, count in Counter(tokens).items():
+                    term_ids.append(vocab.setdefault(token, len(vocab)))
+                    doc_ids.append(doc_id)
+                    tfs.append(count)
+
+                encoded = json.dumps(
+                    {"id": record_id, "page_content": text, "metadata": metadata or {}},
+                    ensure_ascii=False,
+                ).encode("utf-8")
+                blob.write(encoded)
+                doc_offsets.append(doc_offsets[-1] + len(encoded))
+
+        num_docs = len(doc_lengths)
+        term_ids_np = np.frombuffer(term_ids, dtype=np.int32)
+        doc_ids_np = np.frombuffer(doc_ids, dtype=np.int32)
+        tfs_np = np.frombuffer(tfs, dtype=np.float32)
+        doc_lengths_np = np.frombuffer(doc_lengths, dtype=np.float32)
+        avgdl = float(doc_lengths_np.mean()) if num_docs else 0.0
+
+        # BM25 가중치 미리 계산: idf(t) · tf·(k1+1) / (tf + k1·(1 - b + b·dl/avgdl))
+        doc_freq = np.bincount(term_ids_np, minlength=len(vocab)).astype(np.float32)
+        idf = np.log1p((num_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+        length_norm = k1 * (1 - b + b * doc_lengths_np / max(avgdl, 1e-9))
+        weights = idf[term_ids_np] * tfs_np * (k1 + 1) / (tfs_np + length_norm[doc_ids_np])
+
+        # 토큰 x 문서 CSR 행렬 (인덱스 dtype을 통일해 로드 시 복사 없이 memory-map 사용)
+        index_dtype = np.int32 if len(term_ids_np) < np.iinfo(np.int32).max else np.int64
+        order = np.argsort(term_ids_np, kind="stable")
+        indptr = np.zeros(len(vocab) + 1, dtype=index_dtype)
+        np.cumsum(doc_freq.astype(index_dtype), out=indptr[1:])
+
+        np.save(tmp_dir / "weights_indptr.npy", indptr)
+        np.save(tmp_dir / "weights_indices.npy", doc_ids_np[order].astype(index_dtype))
+        np.save(tmp_dir / "weights_data.npy", weights[order].astype(np.float32))
+        np.save(tmp_dir / "docs_offsets.npy", np.frombuffer(doc_offsets, dtype=np.int64))
+
+        with open(tmp_dir / "vocab.json", "w", encoding="utf-8") as f:
+            json.dump(vocab, f, ensure_ascii=False)
+
+        meta = {
+            "version": INDEX_VERSION,
+            "k1": k1,
+            "b": b,
+            "tokenizer": tokenizer.name,
+            "num_docs": num_docs,
+            "avgdl": avgdl,
+        }
+        with open(tmp_dir / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+        # 완성된 인덱스로 교체 (검색 중인 다른 프로세스는 기존 파일을 계속 사용)
+        # 동시에 빌드한 프로세스끼리 교체가 겹치지 않도록 잠금 (나중에 끝난 빌드가 최종 인덱스)
+        with _index_lock(index_dir, exclusive=True):
+            old_dir = index_dir.with_name(f"{index_dir.name}.old-{os.getpid()}")
+            if index_dir.exists():
+                os.replace(index_dir, old_dir)
+            os.replace(tmp_dir, index_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+        elapsed_time = time.time() - start_time
+        logger.info(f"   ✅ BM25 인덱스 저장 완료 (문서: {num_docs}, 토큰: {len(vocab)}, 소요: {elapsed_time:.2f}초)")
+        return cls.load(index_dir)
+
+    @classmethod
+    def load(cls, index_dir=None) -> "BM25Index":
+        """디스크의 BM25 인덱스를 memory-map으로 로드"""
+        index_dir = Path(index_dir or Config.BM25_INDEX_PATH)
+        # 교체 중인 디렉토리를 보지 않도록 공유 잠금 (memory-map한 파일은 교체 후에도 유지됨)
+        with _index_lock(index_dir, exclusive=False):
+            return cls._load(index_dir)
+
+    @classmethod
+    def _load(cls, index_dir: Path) -> "BM25Index":
+        if not (index_dir / "meta.json").exists():
+            raise FileNotFoundError(f"BM25 인덱스를 찾을 수 없습니다: {index_dir}")
+
+        with open(index_dir / "meta.json", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != INDEX_VERSION:
+            raise ValueError(f"지원하지 않는 BM25 인덱스 버전입니다: {meta.get('version')}")
+
+        with open(index_dir / "vocab.json", encoding="utf-8") as f:
+            vocab = json.load(f)
+
+        def mmap(name):
+            return np.load(index_dir / name, mmap_mode="r")
+
+        weights = sparse.csr_matrix(
+            (mmap("weights_data.npy"), mmap("weights_indices.npy"), mmap("weights_indptr.npy")),
+            shape=(len(vocab), meta["num_docs"]),
+            copy=False,
+        )
+        doc_blob = np.memmap(index_dir / "docs.bin", dtype=np.uint8, mode="r") if meta["num_docs"] else np.zeros(0, np.uint8)
+
+        logger.info(f"📂 BM25 인덱스 로드 (문서: {meta['num_docs']}, 토큰: {len(vocab)}, 토크나이저: {meta['tokenizer']})")
+        return cls(index_dir, meta, vocab, weights, mmap("docs_offsets.npy"), doc_blob)
+
+    def get_scores(self, query: str) -> np.ndarray:
+        """쿼리에 대한 전체 문서 BM25 점수"""
+        counts = Counter(token for token in self.tokenizer(query) if token in self.vocab)
+        if not counts:
+            return np.zeros(self.num_docs, dtype=np.float32)
+
+        term_ids = np.fromiter((self.vocab[token] for token in counts), dtype=np.int64, count=len(counts))
+        query_weights = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+
+        # 쿼리 토큰 행만 선택 후 (행렬^T · 쿼리 토큰 빈도)
+        return self.weights[term_ids].T.dot(query_weights)
+
+    def search(self, query: str, k: int = None) -> List[Tuple[Document, float]]:
+        """
+        BM25 검색
+
+        Returns:
+            List: 점수 순 (Document, score) 리스트 (점수 0인 문서는 제외)
+        """
+        k = k or Config.TOP_K
+        if self.num_docs == 0:
+            return []
+
+        scores = self.get_scores(query)
+        k = min(k, self.num_docs)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        return [(self.get_document(int(i)), float(scores[i])) for i in top if scores[i] > 0]
+
+    def get_document(self, doc_id: int) -> Document:
+        """문서 저장소에서 문서 하나를 디코딩"""
+        start, end = self.doc_offsets[doc_id], self.doc_offsets[doc_id + 1]
+        record = json.loads(bytes(self.doc_blob[start:end]).decode("utf-8"))
+        return Document(id=record.get("id"), page_content=record["page_content"], metadata=record["metadata"])
+
+    def invoke(self, query: str) -> List[Document]:
+        """Retriever 호환 인터페이스 (상위 문서 리스트)"""
+        return [doc for doc, _ in self.search(query)]
+
+
+def iter_vectorstore_records(vectorstore, batch_size: int = 1000):
+    """벡터 스토어의 모든 청크를 (id, text, metadata)로 페이지 단위 순회"""
+    offset = 0
+    while True:
+        batch = vectorstore.get(limit=batch_size, offset=offset, include=["documents", "metadatas"])
+        ids = batch.get("ids") or []
+        if not ids:
+            break
+        for record_id, text, metadata in zip(ids, batch["documents"], batch["metadatas"]):
+            yield record_id, text, metadata
+        offset += len(ids)
+
+
+def load_index(index_dir=None) -> BM25Index:
+    """
+    서비스용 BM25 인덱스 로드 (생성은 scripts/embed_papers.py에서만)
+
+    Raises:
+        FileNotFoundError: 인덱스 없음
+        ValueError: 지원하지 않는 인덱스 버전
+    """
+    index = BM25Index.load(index_dir)
+    if index.meta["tokenizer"] != Config.BM25_TOKENIZER:
+        logger.warning(
+            f"⚠️  BM25 인덱스 토크나이저({index.meta['tokenizer']})가 설정({Config.BM25_TOKENIZER})과 다릅니다. "
+            "인덱스의 토크나이저로 검색합니다 (python scripts/embed_papers.py 로 재생성)"
+        )
+    return index
+
+
+@contextmanager
+def _index_lock(index_dir: Path, exclusive: bool):
+    """인덱스 디렉토리 옆 잠금 파일로 프로세스 간 교체/로드 잠금"""
+    lock_path = index_dir.with_name(f"{index_dir.name}.lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
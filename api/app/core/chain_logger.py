@@ -1,28 +1,252 @@
 """
 분석 플로우 로깅 모듈
-분석 결과와 메타데이터를 JSON 파일로 저장합니다.
+분석 결과와 메타데이터를 로컬 저장소(SQLite 또는 JSONL)에 저장합니다.
+
+요청 처리 중에는 레코드를 제한된 큐에 넣기만 하고, 백그라운드 writer 스레드가 저장합니다.
+검색된 청크는 본문 대신 청크 ID(벡터 DB/BM25 인덱스의 ID)로 기록합니다.
+
+저장소 (Config.LOG_BACKEND):
+- "sqlite": 인덱스가 있는 테이블 (analyses / retrievals / stages), scripts/query_logs.py로 집계
+- "jsonl": 한 줄짜리 JSON, 크기/시간 기준으로 파일 교체
 """
+import atexit
 import json
 import logging
 import os
+import queue
+import sqlite3
+import threading
+import time
+import weakref
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, Any, List
+from app.core import tracing
 from app.core.config import Config
 
 logger = logging.getLogger(__name__)
 
+_STOP = object()
+_instances = weakref.WeakSet()
+
+
+class JsonlLogWriter:
+    """JSONL 파일 writer
+
+    파일: {prefix}_{시작 시각}_{pid}.jsonl, LOG_MAX_BYTES 또는 LOG_ROTATE_SECONDS를 넘으면 새 파일
+    (분석 로그 외에 트레이스 파일도 같은 방식으로 교체)
+    """
+
+    def __init__(self, log_dir: Path, prefix: str = "analysis"):
+        self.log_dir = log_dir
+        self.prefix = prefix
+        self._file = None
+        self._file_path = None
+        self._file_opened_at = 0.0
+
+    def write(self, record: Dict[str, Any]):
+        """레코드 한 줄 쓰기 (필요하면 파일 교체)"""
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str) + "\n"
+        data = line.encode("utf-8")
+
+        if self._file is None or self._should_rotate(len(data)):
+            self._rotate()
+        self._file.write(data)
+
+    def _should_rotate(self, incoming: int) -> bool:
+        """크기 또는 시간 기준 초과 여부"""
+        if time.monotonic() - self._file_opened_at >= Config.LOG_ROTATE_SECONDS:
+            return True
+        return self._file.tell() > 0 and self._file.tell() + incoming > Config.LOG_MAX_BYTES
+
+    def _rotate(self):
+        """현재 파일을 닫고 새 파일 열기"""
+        if self._file:
+            self._file.close()
+            logger.info(f"💾 로그 파일 교체: {self._file_path}")
+
+        # 같은 초에 교체되거나 워커 프로세스가 여러 개여도 겹치지 않도록 pid와 순번 포함
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = self.log_dir / f"{self.prefix}_{timestamp}_{os.getpid()}.jsonl"
+        seq = 1
+        while path.exists():
+            path = self.log_dir / f"{self.prefix}_{timestamp}_{os.getpid()}_{seq}.jsonl"
+            seq += 1
+
+        self._file = open(path, "ab")
+        self._file_path = path
+        self._file_opened_at = time.monotonic()
+
+    def flush(self):
+        if self._file:
+            self._file.flush()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+class SqliteLogWriter:
+    """SQLite writer
+
+    - analyses: 요청 1건 (입력, 생성된 검색 쿼리, 전체 소요 시간, 토큰 수, 분석 결과)
+    - retrievals: 검색된 청크 (순위, 청크 ID, source, page, Dense/BM25/RRF 점수)
+    - stages: 단계별 소요 시간
+
+    write는 트랜잭션에 쌓기만 하고 flush에서 커밋합니다 (몰려서 들어오면 한 번에 커밋).
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS analyses (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp TEXT NOT NULL,
+                request_id TEXT,
+                user_state TEXT,
+                image_url TEXT,
+                image_detail TEXT,
+                llm_model TEXT,
+                embedding_model TEXT,
+                search_query TEXT,
+                total_ms REAL,
+                input_tokens INTEGER,
+                output_tokens INTEGER,
+                total_tokens INTEGER,
+                config TEXT,
+                image_analysis TEXT,
+                analysis TEXT
+            );
+            CREATE TABLE IF NOT EXISTS retrievals (
+                analysis_id INTEGER NOT NULL REFERENCES analyses (id),
+                rank INTEGER NOT NULL,
+                chunk_id TEXT,
+                source TEXT,
+                page TEXT,
+                dense_score REAL,
+                bm25_score REAL,
+                rrf_score REAL
+            );
+            CREATE TABLE IF NOT EXISTS stages (
+                analysis_id INTEGER NOT NULL REFERENCES analyses (id),
+                stage TEXT NOT NULL,
+                start_ms REAL,
+                end_ms REAL,
+                duration_ms REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_analyses_timestamp ON analyses (timestamp);
+            CREATE INDEX IF NOT EXISTS idx_retrievals_analysis ON retrievals (analysis_id);
+            CREATE INDEX IF NOT EXISTS idx_retrievals_source ON retrievals (source);
+            CREATE INDEX IF NOT EXISTS idx_retrievals_chunk ON retrievals (chunk_id);
+            CREATE INDEX IF NOT EXISTS idx_stages_analysis ON stages (analysis_id, stage);
+            """
+        )
+        # request_id 컬럼이 없던 기존 DB에 추가
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(analyses)")}
+        if "request_id" not in columns:
+            self._conn.execute("ALTER TABLE analyses ADD COLUMN request_id TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_analyses_request_id ON analyses (request_id)")
+        self._conn.commit()
+
+    def write(self, record: Dict[str, Any]):
+        """레코드를 테이블에 나눠 저장 (커밋은 flush에서)"""
+        metadata = record["metadata"]
+        search = metadata["search"]
+        timings = metadata.get("timings") or {}
+        tokens = metadata.get("tokens") or {}
+        raw_response = search.get("llm_raw_response") or {}
+
+        cursor = self._conn.execute(
+            """
+            INSERT INTO analyses (
+                timestamp, request_id, user_state, image_url, image_detail, llm_model, embedding_model, search_query,
+                total_ms, input_tokens, output_tokens, total_tokens, config, image_analysis, analysis
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                record["timestamp"],
+                record.get("request_id"),
+                metadata["input"]["user_state"],
+                metadata["image"]["url"],
+                metadata["image"]["detail_level"],
+                metadata["config"]["LLM_MODEL"],
+                metadata["config"]["EMBEDDING_MODEL"],
+                raw_response.get("search_query"),
+                timings.get("total_ms"),
+                tokens.get("input_tokens"),
+                tokens.get("output_tokens"),
+                tokens.get("total_tokens"),
+                json.dumps(metadata["config"], ensure_ascii=False),
+                json.dumps(raw_response.get("image_analysis"), ensure_ascii=False) if raw_response else None,
+                json.dumps(record["analysis"], ensure_ascii=False),
+            ),
+        )
+        analysis_id = cursor.lastrowid
+
+        self._conn.executemany(
+            """
+            INSERT INTO retrievals (analysis_id, rank, chunk_id, source, page, dense_score, bm25_score, rrf_score)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (
+                    analysis_id, paper["rank"], paper.get("chunk_id"), paper["source"], str(paper["page"]),
+                    paper.get("dense_score"), paper.get("bm25_score"), paper.get("rrf_score"),
+                )
+                for paper in search["papers"]
+            ],
+        )
+        self._conn.executemany(
+            "INSERT INTO stages (analysis_id, stage, start_ms, end_ms, duration_ms) VALUES (?, ?, ?, ?, ?)",
+            [
+                (analysis_id, stage, t["start_ms"], t["end_ms"], t["duration_ms"])
+                for stage, t in (timings.get("stages") or {}).items()
+            ],
+        )
+
+    def flush(self):
+        self._conn.commit()
+
+    def close(self):
+        self._conn.commit()
+        self._conn.close()
+
 
 class ChainLogger:
-    """분석 플로우 로깅"""
+    """분석 플로우 로깅 (백그라운드 writer)
 
-    def __init__(self, log_dir: str = None):
+    - 큐가 가득 차면 Config.LOG_QUEUE_POLICY에 따라 바로 버리거나("drop"),
+      LOG_QUEUE_BLOCK_SECONDS까지 기다린 뒤 버림("block")
+    - close() 또는 프로세스 종료 시 큐에 남은 레코드를 모두 쓰고 종료
+    """
+
+    def __init__(self, log_dir: str = None, queue_size: int = None, policy: str = None, backend: str = None):
         """ChainLogger 초기화"""
         if log_dir is None:
             log_dir = Config.LOGS_DIR
 
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(exist_ok=True)
+        self.policy = policy or Config.LOG_QUEUE_POLICY
+        self.backend = backend or Config.LOG_BACKEND
+        self.written = 0
+        self.dropped = 0
+
+        if self.backend == "sqlite":
+            self._writer = SqliteLogWriter(self.log_dir / Config.LOG_DB_NAME)
+        else:
+            self._writer = JsonlLogWriter(self.log_dir)
+
+        self._queue = queue.Queue(maxsize=queue_size or Config.LOG_QUEUE_SIZE)
+        self._drop_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="chain-logger", daemon=True)
+        self._thread.start()
+        _instances.add(self)
 
     def save_analysis(
         self,
@@ -33,20 +257,22 @@ class ChainLogger:
         image_detail: str,
         model: str = None,
         search_metadata: List[Dict[str, Any]] = None,
-        llm_raw_response: Dict[str, Any] = None
-    ) -> str:
-        """분석 결과를 로그 파일에 저장합니다."""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        log_filename = f"analysis_{timestamp}.json"
-        log_filepath = self.log_dir / log_filename
+        llm_raw_response: Dict[str, Any] = None,
+        stage_timings: Dict[str, Any] = None,
+        token_usage: Dict[str, Dict[str, Any]] = None
+    ) -> bool:
+        """분석 결과를 로그 큐에 넣습니다. (큐가 가득 차 버려지면 False)
 
+        token_usage: 모델별 토큰 사용량 ({모델명: {"input_tokens", "output_tokens", "total_tokens"}})
+        """
         papers_info = self._extract_papers_info(search_results, search_metadata)
 
         log_data = {
             "timestamp": datetime.now().isoformat(),
+            "request_id": tracing.current_request_id(),  # X-Request-ID (트레이스와 연결)
             "metadata": {
                 "config": {
-                    "LLM_MODEL": Config.LLM_MODEL,
+                    "LLM_MODEL": model or Config.LLM_MODEL,
                     "EMBEDDING_MODEL": Config.EMBEDDING_MODEL,
                     "IMAGE_DETAIL": image_detail,
                     "CHUNK_SIZE": Config.CHUNK_SIZE,
@@ -64,24 +290,93 @@ class ChainLogger:
                     "total_results": len(search_results),
                     "llm_raw_response": llm_raw_response if llm_raw_response else None,
                     "papers": papers_info,
-                }
+                },
+                "timings": stage_timings,
+                "tokens": self._sum_token_usage(token_usage),
             },
             "analysis": analysis,
         }
+        return self._enqueue(log_data)
 
+    def _enqueue(self, record: Dict[str, Any]) -> bool:
+        """드롭 정책에 따라 큐에 추가"""
+        if self._closed:
+            return False
         try:
-            with open(log_filepath, "w", encoding="utf-8") as f:
-                json.dump(log_data, f, indent=2, ensure_ascii=False)
+            if self.policy == "block":
+                self._queue.put(record, timeout=Config.LOG_QUEUE_BLOCK_SECONDS)
+            else:
+                self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            with self._drop_lock:
+                self.dropped += 1
+                dropped = self.dropped
+            if dropped == 1 or dropped % 100 == 0:
+                logger.warning(f"⚠️  로그 큐가 가득 차서 레코드를 버렸습니다 (누적 {dropped}개)")
+            return False
+
+    def _run(self):
+        """(writer 스레드) 큐에서 레코드를 꺼내 저장"""
+        while True:
+            try:
+                record = self._queue.get(timeout=Config.LOG_FLUSH_SECONDS)
+            except queue.Empty:
+                self._flush()
+                continue
+
+            if record is _STOP:
+                break
+            try:
+                self._writer.write(record)
+                self.written += 1
+            except Exception as e:
+                logger.error(f"❌ 로그 저장 실패: {e}")
 
-            logger.info(f"💾 로그 저장 완료: {log_filepath}")
-            return str(log_filepath)
+            # 큐가 비었을 때만 flush (몰려서 들어오면 한 번에)
+            if self._queue.empty():
+                self._flush()
 
+        try:
+            self._writer.close()
+        except Exception as e:
+            logger.error(f"❌ 로그 저장소 종료 실패: {e}")
+
+    def _flush(self):
+        try:
+            self._writer.flush()
         except Exception as e:
-            logger.error(f"❌ 로그 저장 실패: {e}")
-            raise
+            logger.error(f"❌ 로그 flush 실패: {e}")
+
+    def close(self, timeout: float = 10.0):
+        """남은 레코드를 모두 쓰고 writer 스레드 종료"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning(f"⚠️  로그 writer 종료 대기 시간 초과 (남은 레코드 {self._queue.qsize()}개)")
+        elif self.written or self.dropped:
+            logger.info(f"💾 로그 writer 종료 (저장 {self.written}개, 버림 {self.dropped}개)")
+
+    @staticmethod
+    def _sum_token_usage(token_usage: Dict[str, Dict[str, Any]] = None) -> Dict[str, Any]:
+        """모델별 토큰 사용량 합계"""
+        if not token_usage:
+            return None
+        totals = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+        for usage in token_usage.values():
+            for key in totals:
+                totals[key] += usage.get(key, 0) or 0
+        totals["by_model"] = {
+            name: {key: usage.get(key, 0) for key in ("input_tokens", "output_tokens", "total_tokens")}
+            for name, usage in token_usage.items()
+        }
+        return totals
 
     def _extract_papers_info(self, search_results: List[Any], search_metadata: List[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
-        """검색된 논문들의 정보를 추출합니다."""
+        """검색된 논문들의 정보를 추출합니다. (본문은 청크 ID로 대신함)"""
         papers_info = []
 
         for i, doc in enumerate(search_results, 1):
@@ -97,12 +392,20 @@ class ChainLogger:
 
             paper_info = {
                 "rank": i,
+                "chunk_id": getattr(doc, "id", None),
                 "source": doc.metadata.get("source", "Unknown"),
                 "page": doc.metadata.get("page", "Unknown"),
                 **scores,  # Dense, BM25, RRF 점수 추가
-                "content_preview": doc.page_content[:300] if hasattr(doc, 'page_content') else "",
-                "full_content": doc.page_content if hasattr(doc, 'page_content') else "",
             }
             papers_info.append(paper_info)
 
         return papers_info
+
+
+def shutdown_loggers():
+    """모든 ChainLogger의 남은 레코드를 쓰고 종료 (앱 종료 시)"""
+    for chain_logger in list(_instances):
+        chain_logger.close()
+
+
+atexit.register(shutdown_loggers)
@@ -17,6 +17,9 @@ class Config:
     # 데이터 경로 (절대경로)
     DATA_DIR = str(PROJECT_ROOT / "data" / "papers")
     CHROMA_DB_PATH = str(PROJECT_ROOT / "chroma_db")
+    INDEX_MANIFEST_PATH = str(PROJECT_ROOT / "chroma_db" / "index_manifest.json")
+    BM25_INDEX_PATH = str(PROJECT_ROOT / "bm25_index")
+    NUMPY_STORE_PATH = str(PROJECT_ROOT / "vector_store")
     LOGS_DIR = str(PROJECT_ROOT / "logs")
 
     # 문서 처리 설정
@@ -27,18 +30,73 @@ class Config:
     # 임베딩 설정
     EMBEDDING_MODEL = "intfloat/multilingual-e5-large"
     NORMALIZE_EMBEDDINGS = True
+    EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "huggingface")  # "huggingface" (PyTorch fp32) | "onnx" (ONNX Runtime)
+    EMBEDDING_DEVICE = os.environ.get("HF_EMBEDDING_DEVICE", "cpu")  # huggingface 백엔드 전용
+    EMBEDDING_BATCH_SIZE = 32
+    EMBEDDING_NUM_THREADS = int(os.environ.get("EMBEDDING_NUM_THREADS", 0))  # 0이면 런타임 기본값
+    ONNX_MODEL_DIR = str(PROJECT_ROOT / "models" / "onnx")
+    ONNX_QUANTIZE = True  # 동적 int8 양자화
+
+    # 인덱싱 설정
+    PDF_LOAD_WORKERS = int(os.environ.get("PDF_LOAD_WORKERS", 0))  # PDF 파싱 워커 프로세스 수 (0이면 CPU 코어 수)
+    PDF_LOAD_TIMEOUT_SECONDS = 120  # PDF 한 개 파싱 제한 시간 (초과 시 워커 종료 후 실패 처리)
+    INDEX_EMBED_WORKERS = int(os.environ.get("INDEX_EMBED_WORKERS", 0))  # 임베딩 워커 프로세스 수 (0이면 CPU 코어 / 4)
+    INDEX_EMBED_BATCH_SIZE = 64  # 워커에 보내는 배치 크기
+    CHROMA_UPSERT_BATCH_SIZE = 1000  # Chroma upsert 배치 크기
+    EMBEDDING_CACHE_ENABLED = os.environ.get("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"  # 청크 임베딩 디스크 캐시
+    EMBEDDING_CACHE_DIR = str(PROJECT_ROOT / "cache" / "embeddings")
+    QUERY_EMBEDDING_CACHE_SIZE = 1024  # 쿼리 임베딩 LRU 캐시 크기 (0이면 사용 안 함)
 
     # LLM 설정
     LLM_MODEL = "gpt-4o-mini"
     LLM_TEMPERATURE = 0.7
+    LLM_STRUCTURED_OUTPUT = os.environ.get("LLM_STRUCTURED_OUTPUT", "true").lower() == "true"  # json_schema(strict) 응답 형식 사용 (미지원 모델은 false)
     OPENAI_API_KEY = os.environ["OPEN_API_KEY"]
 
     # 비전(Vision) 설정
     IMAGE_DETAIL = "low"
+    IMAGE_TRANSPORT = os.environ.get("IMAGE_TRANSPORT", "cloudinary")  # "cloudinary" | "data_url" (base64 인라인 전송)
+    MAX_UPLOAD_BYTES = 10 * 1024 * 1024  # 업로드 이미지 최대 크기
+    IMAGE_JPEG_QUALITY = 85  # 전처리 후 재인코딩 품질
+
+    # 벡터 DB 설정
+    VECTOR_BACKEND = os.environ.get("VECTOR_BACKEND", "chroma")  # "chroma" (HNSW) | "numpy" (memmap 행렬 정확 검색)
+    NUMPY_STORE_DTYPE = os.environ.get("NUMPY_STORE_DTYPE", "float32")  # "float32" (memmap에 바로 BLAS 곱) | "float16" (메모리 절반, 변환 비용으로 검색 느림)
+    CHROMA_COLLECTION_NAME = "papers"
+    VECTOR_DISTANCE = "l2"  # "l2" | "cosine" | "ip" (Chroma HNSW 거리 함수, 정확 검색 점수 형식)
+    HNSW_M = 16  # 노드당 이웃 수 (변경 시 재인덱싱 필요)
+    HNSW_EF_CONSTRUCTION = 100  # 구축 시 탐색 폭 (변경 시 재인덱싱 필요)
+    HNSW_EF_SEARCH = int(os.environ.get("HNSW_EF_SEARCH", 100))  # 검색 시 탐색 폭 (Chroma 기본값, 로드 시 기존 컬렉션에 바로 반영)
 
     # RAG 설정
     TOP_K = 7
     RRF_K = 60
+    BM25_TOKENIZER = "ngram"  # "ngram" (한글 문자 bigram) | "kiwi" (형태소, kiwipiepy 필요) | "whitespace"
+
+    # 응답 캐시 설정 (같은 이미지 + 비슷한 user_state)
+    RESPONSE_CACHE_ENABLED = os.environ.get("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    RESPONSE_CACHE_PATH = str(PROJECT_ROOT / "cache" / "responses.sqlite3")
+    RESPONSE_CACHE_TTL_SECONDS = 24 * 60 * 60
+    RESPONSE_CACHE_MAX_ENTRIES = 10000
+    RESPONSE_CACHE_SIMILARITY = 0.95  # user_state 임베딩 코사인 유사도 임계값
+
+    # 분석 로그 설정 (백그라운드 writer)
+    LOG_BACKEND = os.environ.get("LOG_BACKEND", "sqlite")  # "sqlite" (LOGS_DIR/LOG_DB_NAME, scripts/query_logs.py로 집계) | "jsonl"
+    LOG_DB_NAME = "analysis.sqlite3"
+    LOG_QUEUE_SIZE = 1000  # 쓰기 대기 레코드 최대 수
+    LOG_QUEUE_POLICY = os.environ.get("LOG_QUEUE_POLICY", "drop")  # 큐가 가득 찼을 때 "drop" (바로 버림) | "block" (잠시 대기 후 버림)
+    LOG_QUEUE_BLOCK_SECONDS = 0.5  # "block" 정책의 최대 대기 시간
+    LOG_MAX_BYTES = 64 * 1024 * 1024  # JSONL 로그 파일 하나의 최대 크기
+    LOG_ROTATE_SECONDS = 60 * 60  # JSONL 로그 파일 교체 주기
+    LOG_FLUSH_SECONDS = 1.0  # 유휴 시 flush 주기
+
+    # 트레이싱 설정
+    TRACING_ENABLED = os.environ.get("TRACING_ENABLED", "true").lower() == "true"
+    TRACE_EXPORTER = os.environ.get("TRACE_EXPORTER", "jsonl")  # "jsonl" (TRACE_DIR) | "otlp" (OTLP/HTTP JSON) | "none"
+    TRACE_DIR = str(PROJECT_ROOT / "logs" / "traces")  # traces_{시각}_{pid}.jsonl (LOG_MAX_BYTES/LOG_ROTATE_SECONDS 기준 교체)
+    TRACE_QUEUE_SIZE = 1000  # 내보내기 대기 트레이스 최대 수 (가득 차면 버림)
+    OTLP_ENDPOINT = os.environ.get("OTLP_ENDPOINT", "http://localhost:4318")
+    TRACE_EXCLUDED_PATHS = ("/metrics", "/health")  # 트레이스를 만들지 않는 경로 (메트릭 수집, 헬스 체크)
 
     # Cloudinary 설정
     CLOUDINARY_CLOUD_NAME = os.environ.get("CLOUDINARY_CLOUD_NAME")
@@ -46,6 +104,15 @@ class Config:
     CLOUDINARY_API_SECRET = os.environ.get("CLOUDINARY_API_SECRET")
     CLOUDINARY_IMAGE_PATH = "Nada/users"
     CLOUDINARY_EXPIRE_MINUTES = 5  # 인증 이미지 접근 만료 시간 (분)
+    CLOUDINARY_REUSE_MIN_SECONDS = 60  # 같은 이미지 재사용 시 남아 있어야 하는 최소 접근 허용 시간 (초)
+    CLOUDINARY_UPLOAD_CACHE_SIZE = 1024  # 콘텐츠 해시 업로드 캐시 최대 개수
+
+    # 동시성 설정
+    WARMUP_ON_STARTUP = os.environ.get("WARMUP_ON_STARTUP", "true").lower() == "true"  # 앱 시작 시 분석 서비스(모델, 벡터 DB, BM25) 미리 로드
+    THREAD_POOL_WORKERS = int(os.environ.get("THREAD_POOL_WORKERS", 8))  # 블로킹 작업(임베딩, BM25, 업로드) 스레드 수
+    BATCH_MAX_ITEMS = 200  # /api/analyze/batch 요청당 최대 항목 수
+    BATCH_MAX_BYTES = int(os.environ.get("BATCH_MAX_BYTES", 100 * 1024 * 1024))  # 배치 요청 이미지 전체 최대 크기 (메모리에 함께 올라감)
+    BATCH_CONCURRENCY = int(os.environ.get("BATCH_CONCURRENCY", 4))  # 배치 요청에서 동시에 분석하는 항목 수 (LLM 동시 호출 제한)
 
     @classmethod
     def validate(cls):
@@ -59,8 +126,9 @@ class Config:
         """현재 설정 출력"""
         logger.info("⚙️  현재 설정:")
         logger.info(f"   데이터 폴더: {cls.DATA_DIR}")
-        logger.info(f"   벡터 DB: {cls.CHROMA_DB_PATH}")
+        logger.info(f"   벡터 DB: {cls.NUMPY_STORE_PATH if cls.VECTOR_BACKEND == 'numpy' else cls.CHROMA_DB_PATH} ({cls.VECTOR_BACKEND})")
+        logger.info(f"   BM25 인덱스: {cls.BM25_INDEX_PATH}")
         logger.info(f"   청크 크기: {cls.CHUNK_SIZE}")
-        logger.info(f"   임베딩 모델: {cls.EMBEDDING_MODEL}")
+        logger.info(f"   임베딩 모델: {cls.EMBEDDING_MODEL} ({cls.EMBEDDING_BACKEND})")
         logger.info(f"   LLM: {cls.LLM_MODEL}")
         logger.info(f"   검색 결과 수: {cls.TOP_K}개")
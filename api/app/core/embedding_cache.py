@@ -0,0 +1,270 @@
+"""
+임베딩 캐시 모듈
+- CachedEmbeddings: 비슷한 사용자 입력이 반복될 때 대형 임베딩 모델의 forward 연산을 건너뜁니다.
+- DocumentEmbeddingStore: 인덱싱 시 청크 텍스트 임베딩을 디스크에 보관해 청킹 설정을 바꿔도 같은 텍스트는 다시 계산하지 않습니다.
+"""
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.core import metrics
+from app.core.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(text: str) -> str:
+    """캐시 키용 텍스트 정규화 (유니코드 NFC, 연속 공백 축약)"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class CachedEmbeddings(Embeddings):
+    """embed_query 결과를 LRU로 캐시하는 임베딩 래퍼
+
+    키는 (모델명, 정규화된 텍스트)이며, 여러 스레드에서 동시에 사용해도 안전합니다.
+    embed_documents(인덱싱)는 캐시하지 않고 그대로 전달합니다.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, maxsize: int = 1024):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def embed_query(self, text: str) -> List[float]:
+        """쿼리 임베딩 (캐시 우선)"""
+        key = (self.model_name, normalize_query(text))
+
+        with self._lock:
+            vector = self._cache.get(key)
+            if vector is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                metrics.record_cache("query_embedding", hit=True)
+                return list(vector)
+            self.misses += 1
+        metrics.record_cache("query_embedding", hit=False)
+
+        # 모델 연산은 락 밖에서 수행
+        vector = tuple(self.embeddings.embed_query(key[1]))
+        self.put(key[1], vector)
+        return list(vector)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """문서 임베딩 (캐시하지 않음)"""
+        return self.embeddings.embed_documents(texts)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """여러 쿼리를 한 번의 배치 인코딩으로 임베딩 (캐시에 없는 것만 계산해 캐시에 저장)
+
+        현재 백엔드들은 쿼리와 문서를 같은 방식으로 인코딩하므로(e5 프리픽스 없음) embed_documents로 배치 계산합니다.
+        """
+        keys = [normalize_query(text) for text in texts]
+
+        with self._lock:
+            cached = {}
+            for key in keys:
+                vector = self._cache.get((self.model_name, key))
+                if vector is not None:
+                    cached[key] = vector
+                    self.hits += 1
+                else:
+                    self.misses += 1
+
+        for key in keys:
+            metrics.record_cache("query_embedding", hit=key in cached)
+
+        missing = [key for key in dict.fromkeys(keys) if key not in cached]
+        if missing:
+            for key, vector in zip(missing, self.embeddings.embed_documents(missing)):
+                cached[key] = tuple(vector)
+                self.put(key, vector)
+
+        return [list(cached[key]) for key in keys]
+
+    def put(self, text: str, vector) -> None:
+        """미리 계산한 쿼리 임베딩을 캐시에 저장"""
+        if self.maxsize <= 0:
+            return
+
+        key = (self.model_name, normalize_query(text))
+        with self._lock:
+            self._cache[key] = tuple(vector)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+
+    def stats(self) -> Dict[str, float]:
+        """캐시 적중 통계"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._cache),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+    def clear(self) -> None:
+        """캐시 비우기"""
+        with self._lock:
+            self._cache.clear()
+
+
+class DocumentEmbeddingStore:
+    """청크 임베딩 디스크 캐시
+
+    - 키: SHA-256(청크 텍스트), 모델/백엔드별로 디렉토리를 분리
+    - 인덱스: SQLite (키 → 행 번호)
+    - 벡터: float16 행렬 파일 (append 전용, 읽을 때 memmap)
+
+    벡터를 먼저 파일에 쓰고 나서 SQLite에 커밋하므로, 중간에 중단되어도 커밋된 키는 항상 완전한 행을 가리킵니다.
+    """
+
+    SQL_BATCH_SIZE = 500
+
+    def __init__(self, model_name: str = None, backend: str = None, cache_dir: str = None):
+        self.model_name = model_name or Config.EMBEDDING_MODEL
+        self.backend = backend or Config.EMBEDDING_BACKEND
+        namespace = re.sub(r"[^A-Za-z0-9._-]+", "_", f"{self.model_name}@{self.backend}")
+        self.dir = Path(cache_dir or Config.EMBEDDING_CACHE_DIR) / namespace
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.vectors_path = self.dir / "vectors.f16"
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._matrix = None
+        self._conn = sqlite3.connect(str(self.dir / "index.sqlite3"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, row INTEGER NOT NULL) WITHOUT ROWID")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.commit()
+
+        row = self._conn.execute("SELECT value FROM meta WHERE name = 'dim'").fetchone()
+        self.dim = int(row[0]) if row else None
+        if self.dim:
+            self._repair()
+
+    @staticmethod
+    def text_key(text: str) -> bytes:
+        """캐시 키 (청크 텍스트 SHA-256)"""
+        return hashlib.sha256(text.encode("utf-8")).digest()
+
+    @property
+    def _row_bytes(self) -> int:
+        return self.dim * np.dtype(np.float16).itemsize
+
+    def _repair(self):
+        """쓰기 도중 중단되어 남은 불완전한 마지막 행을 잘라내고, 파일에 없는 행을 가리키는 키는 삭제"""
+        size = self.vectors_path.stat().st_size if self.vectors_path.exists() else 0
+        if size % self._row_bytes:
+            os.truncate(self.vectors_path, size - size % self._row_bytes)
+        rows = size // self._row_bytes
+        deleted = self._conn.execute("DELETE FROM embeddings WHERE row >= ?", (rows,)).rowcount
+        self._conn.commit()
+        if deleted:
+            logger.warning(f"⚠️  임베딩 캐시 벡터 파일이 잘려 있어 키 {deleted}개를 삭제했습니다 (다시 계산)")
+
+    def _rows(self, max_row: int) -> np.ndarray:
+        """max_row까지 포함하는 memmap 행렬 (파일이 커졌으면 다시 매핑)"""
+        if self._matrix is None or self._matrix.shape[0] <= max_row:
+            rows = self.vectors_path.stat().st_size // self._row_bytes
+            self._matrix = np.memmap(self.vectors_path, dtype=np.float16, mode="r", shape=(rows, self.dim))
+        return self._matrix
+
+    def _lookup_rows(self, keys: Sequence[bytes]) -> Dict[bytes, int]:
+        rows = {}
+        for start in range(0, len(keys), self.SQL_BATCH_SIZE):
+            batch = keys[start:start + self.SQL_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            rows.update(self._conn.execute(
+                f"SELECT key, row FROM embeddings WHERE key IN ({placeholders})", batch
+            ).fetchall())
+        return rows
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """
+        텍스트들의 캐시된 임베딩 조회
+
+        Returns:
+            List: 입력 순서대로의 임베딩 (없으면 None)
+        """
+        keys = [self.text_key(text) for text in texts]
+        with self._lock:
+            rows = self._lookup_rows(keys) if self.dim else {}
+            matrix = self._rows(max(rows.values())) if rows else None
+            vectors = [
+                matrix[rows[key]].astype(np.float32).tolist() if key in rows else None
+                for key in keys
+            ]
+            found = len([v for v in vectors if v is not None])
+            self.hits += found
+            self.misses += len(vectors) - found
+        return vectors
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        """임베딩 저장 (이미 있는 텍스트는 건너뜀)"""
+        if not texts:
+            return
+
+        matrix = np.asarray(vectors, dtype=np.float16)
+        with self._lock:
+            if self.dim is None:
+                self.dim = matrix.shape[1]
+                self._conn.execute("INSERT INTO meta (name, value) VALUES ('dim', ?)", (str(self.dim),))
+            elif matrix.shape[1] != self.dim:
+                raise ValueError(f"임베딩 차원이 캐시와 다릅니다: {matrix.shape[1]} != {self.dim}")
+
+            keys = [self.text_key(text) for text in texts]
+            existing = self._lookup_rows(keys)
+            new = {}
+            for i, key in enumerate(keys):
+                if key not in existing and key not in new:
+                    new[key] = i
+            if not new:
+                return
+
+            with open(self.vectors_path, "ab") as f:
+                first_row = f.tell() // self._row_bytes
+                f.write(matrix[list(new.values())].tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, row) VALUES (?, ?)",
+                [(key, first_row + offset) for offset, key in enumerate(new)],
+            )
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, float]:
+        """캐시 적중 통계"""
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "size": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def close(self) -> None:
+        """연결 종료"""
+        with self._lock:
+            self._matrix = None
+            self._conn.close()
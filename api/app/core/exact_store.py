@@ -0,0 +1,329 @@
+"""
+NumPy 정확(brute-force) 검색 벡터 스토어
+정규화된 임베딩을 행렬 파일에 저장하고 memory-map으로 읽어, 쿼리마다 행렬-벡터 곱과
+argpartition으로 top-k를 구합니다. 근사 인덱스(HNSW)가 없으므로 recall은 1입니다 (float16 저장 시 반올림 오차 제외).
+
+저장 dtype (Config.NUMPY_STORE_DTYPE):
+- float32 (기본): memmap 행렬에 바로 BLAS 곱 한 번 (변환 비용이 없어 더 빠름)
+- float16: 파일/페이지 캐시 크기 절반. 검색 시 블록 단위로 float32 변환 후 BLAS 곱
+
+파일 구성 (persist_directory):
+- vectors.f16 / vectors.f32: (행 수, 차원) 행렬 (append 전용)
+- docs.sqlite3: 행 번호 → id, 텍스트, 메타데이터 (삭제는 tombstone 표시)
+
+langchain VectorStore 인터페이스(similarity_search_with_score, as_retriever, get 등)를 제공하므로
+VectorStoreManager에서 Chroma 대신 사용할 수 있습니다 (Config.VECTOR_BACKEND = "numpy").
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILES = {"float16": "vectors.f16", "float32": "vectors.f32"}
+DOCS_FILE = "docs.sqlite3"
+
+# 코사인 유사도 → 거리 (Chroma hnsw space와 같은 형식)
+DISTANCES = {
+    "l2": lambda similarity: 2.0 - 2.0 * similarity,
+    "cosine": lambda similarity: 1.0 - similarity,
+    "ip": lambda similarity: 1.0 - similarity,
+}
+
+
+class ExactVectorStore(VectorStore):
+    """memmap 행렬 기반 정확 검색 벡터 스토어 (float32 기본, float16 선택)
+
+    점수는 Chroma와 같은 거리 형식이며 작을수록 유사합니다 (정규화 벡터 기준).
+    - l2: 제곱 L2 거리 (2 - 2·cos)
+    - cosine / ip: 1 - cos
+    float16으로 저장한 경우 BLOCK_ROWS 행씩 float32 버퍼에 복사해 곱하므로 검색 중 추가 메모리는 블록 하나 크기로 제한됩니다.
+    upsert/삭제는 행렬 memmap과 삭제 마스크를 추가된 행만큼만 갱신합니다 (저장소 전체를 다시 읽지 않음).
+    """
+
+    BLOCK_ROWS = 4096
+    SQL_BATCH_SIZE = 500
+
+    def __init__(self, persist_directory: str, embedding_function: Embeddings = None, dtype: str = None, distance: str = "l2"):
+        if distance not in DISTANCES:
+            raise ValueError(f"지원하지 않는 거리 함수입니다: {distance}")
+        self.dir = Path(persist_directory)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.embedding_function = embedding_function
+        self.distance = distance
+        self._default_dtype = dtype or "float32"
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.dir / DOCS_FILE), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS docs (
+                row INTEGER PRIMARY KEY,
+                id TEXT NOT NULL,
+                source TEXT,
+                text TEXT NOT NULL,
+                metadata TEXT,
+                deleted INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_docs_id ON docs (id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_docs_source ON docs (source)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.commit()
+        self._load()
+
+    @property
+    def embeddings(self) -> Optional[Embeddings]:
+        return self.embedding_function
+
+    def _load(self) -> None:
+        """차원, 행렬 memmap, 삭제 마스크 로드"""
+        meta = dict(self._conn.execute("SELECT name, value FROM meta").fetchall())
+        self.dim = int(meta["dim"]) if "dim" in meta else None
+        # 이미 만들어진 저장소는 저장된 dtype을 따름
+        self.dtype = np.dtype(meta.get("dtype", self._default_dtype))
+        self.vectors_path = self.dir / VECTORS_FILES[self.dtype.name]
+        self.num_rows = self._conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM docs").fetchone()[0]
+
+        self._matrix = None
+        # 삭제 마스크는 여유 용량을 둔 버퍼의 앞부분 (upsert마다 전체를 복사하지 않도록)
+        self._deleted_buffer = np.zeros(self.num_rows, dtype=bool)
+        self._deleted = self._deleted_buffer
+        if not self.dim or not self.num_rows:
+            return
+
+        # 커밋되지 않은 꼬리(쓰기 도중 중단)는 버림
+        row_bytes = self.dim * self.dtype.itemsize
+        if self.vectors_path.stat().st_size > self.num_rows * row_bytes:
+            os.truncate(self.vectors_path, self.num_rows * row_bytes)
+
+        self._matrix = np.memmap(self.vectors_path, dtype=self.dtype, mode="r", shape=(self.num_rows, self.dim))
+        deleted_rows = [r for (r,) in self._conn.execute("SELECT row FROM docs WHERE deleted = 1")]
+        self._deleted[deleted_rows] = True
+
+    def __len__(self) -> int:
+        return int(self.num_rows - self._deleted.sum())
+
+    # ------------------------------------------------------------------
+    # 쓰기
+    # ------------------------------------------------------------------
+    def upsert(self, ids: Sequence[str], embeddings, documents: Sequence[str], metadatas: Sequence[Optional[dict]]) -> None:
+        """
+        미리 계산한 임베딩 저장 (같은 id가 있으면 이전 행은 삭제 표시)
+
+        Args:
+            ids: 문서 id 리스트
+            embeddings: 임베딩 (정규화하여 저장)
+            documents: 텍스트 리스트
+            metadatas: 메타데이터 리스트
+        """
+        if not ids:
+            return
+
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                self._conn.execute("INSERT INTO meta (name, value) VALUES ('dim', ?)", (str(self.dim),))
+                self._conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('dtype', ?)", (self.dtype.name,))
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"임베딩 차원이 저장소와 다릅니다: {vectors.shape[1]} != {self.dim}")
+
+            # 벡터를 먼저 기록한 뒤 메타데이터를 커밋 (중단되어도 커밋된 행은 항상 완전함)
+            with open(self.vectors_path, "ab") as f:
+                f.write(vectors.astype(self.dtype).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+            replaced_rows = self._mark_deleted("id", ids)
+            self._conn.executemany(
+                "INSERT INTO docs (row, id, source, text, metadata) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        self.num_rows + i,
+                        doc_id,
+                        (metadata or {}).get("source"),
+                        text,
+                        json.dumps(metadata, ensure_ascii=False) if metadata else None,
+                    )
+                    for i, (doc_id, text, metadata) in enumerate(zip(ids, documents, metadatas))
+                ],
+            )
+            self._conn.commit()
+            self._append_rows(len(vectors), replaced_rows)
+
+    def _append_rows(self, count: int, deleted_rows: List[int]) -> None:
+        """새로 기록한 행만큼 행렬 memmap과 삭제 마스크 확장"""
+        num_rows = self.num_rows + count
+        if len(self._deleted_buffer) < num_rows:
+            buffer = np.zeros(max(num_rows, 2 * len(self._deleted_buffer)), dtype=bool)
+            buffer[:self.num_rows] = self._deleted
+            self._deleted_buffer = buffer
+        deleted = self._deleted_buffer[:num_rows]
+        deleted[deleted_rows] = True
+
+        # memmap 생성은 파일을 읽지 않고 주소 공간만 매핑
+        self._matrix = np.memmap(self.vectors_path, dtype=self.dtype, mode="r", shape=(num_rows, self.dim))
+        self._deleted = deleted
+        self.num_rows = num_rows
+
+    def _mark_deleted(self, column: str, values: Sequence[str]) -> List[int]:
+        """삭제 표시 후 삭제된 행 번호 반환"""
+        rows = []
+        for start in range(0, len(values), self.SQL_BATCH_SIZE):
+            batch = list(values[start:start + self.SQL_BATCH_SIZE])
+            placeholders = ",".join("?" * len(batch))
+            found = [r for (r,) in self._conn.execute(
+                f"SELECT row FROM docs WHERE deleted = 0 AND {column} IN ({placeholders})", batch
+            )]
+            self._conn.executemany("UPDATE docs SET deleted = 1 WHERE row = ?", [(r,) for r in found])
+            rows.extend(found)
+        return rows
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        """텍스트를 임베딩하여 저장"""
+        texts = list(texts)
+        if ids is None:
+            from uuid import uuid4
+            ids = [str(uuid4()) for _ in texts]
+        metadatas = metadatas or [None] * len(texts)
+        self.upsert(ids, self.embedding_function.embed_documents(texts), texts, metadatas)
+        return list(ids)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        """id로 삭제"""
+        return self.delete_by("id", ids or [])
+
+    def delete_by(self, column: str, values: Sequence[str]) -> bool:
+        """id 또는 source로 삭제 표시 (행렬 공간은 reset_collection 후 재구축 시 회수)"""
+        if column not in ("id", "source"):
+            raise ValueError(f"지원하지 않는 삭제 기준입니다: {column}")
+        with self._lock:
+            rows = self._mark_deleted(column, values)
+            self._conn.commit()
+            self._deleted[rows] = True
+        return True
+
+    def reset_collection(self) -> None:
+        """모든 문서 삭제 (저장 dtype도 생성자 설정으로 초기화)"""
+        with self._lock:
+            self._matrix = None
+            self._conn.execute("DELETE FROM docs")
+            self._conn.execute("DELETE FROM meta")
+            self._conn.commit()
+            for name in VECTORS_FILES.values():
+                (self.dir / name).unlink(missing_ok=True)
+            self._load()
+
+    # ------------------------------------------------------------------
+    # 읽기
+    # ------------------------------------------------------------------
+    def _top_rows(self, query_vector, k: int) -> List[Tuple[int, float]]:
+        """정확 top-k (행 번호, 코사인 유사도)"""
+        with self._lock:
+            matrix, deleted = self._matrix, self._deleted
+        if matrix is None or k <= 0:
+            return []
+
+        query = np.asarray(query_vector, dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+
+        if matrix.dtype == np.float32:
+            scores = matrix @ query
+        else:
+            scores = np.empty(matrix.shape[0], dtype=np.float32)
+            buffer = np.empty((min(self.BLOCK_ROWS, matrix.shape[0]), matrix.shape[1]), dtype=np.float32)
+            for start in range(0, matrix.shape[0], self.BLOCK_ROWS):
+                block = matrix[start:start + self.BLOCK_ROWS]
+                np.copyto(buffer[:len(block)], block)
+                np.dot(buffer[:len(block)], query, out=scores[start:start + len(block)])
+        scores[deleted] = -np.inf
+
+        if len(scores) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(row), float(scores[row])) for row in top if np.isfinite(scores[row])]
+
+    def _fetch(self, rows: Sequence[int]) -> Dict[int, Document]:
+        placeholders = ",".join("?" * len(rows))
+        with self._lock:
+            records = self._conn.execute(
+                f"SELECT row, id, text, metadata FROM docs WHERE row IN ({placeholders})", list(rows)
+            ).fetchall()
+        return {
+            row: Document(id=doc_id, page_content=text, metadata=json.loads(metadata) if metadata else {})
+            for row, doc_id, text, metadata in records
+        }
+
+    def similarity_search_by_vector_with_score(self, embedding: List[float], k: int = 4) -> List[Tuple[Document, float]]:
+        """임베딩으로 검색 (Document, 거리) 리스트"""
+        top = self._top_rows(embedding, k)
+        if not top:
+            return []
+        docs = self._fetch([row for row, _ in top])
+        to_distance = DISTANCES[self.distance]
+        return [(docs[row], to_distance(similarity)) for row, similarity in top]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        """쿼리 텍스트로 검색 (Document, 거리) 리스트"""
+        return self.similarity_search_by_vector_with_score(self.embedding_function.embed_query(query), k)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k)]
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self):
+        if self.distance == "l2":
+            return lambda distance: 1.0 - distance / 2.0
+        return lambda distance: 1.0 - distance
+
+    def get(self, ids: Optional[Sequence[str]] = None, limit: Optional[int] = None, offset: int = 0,
+            include: Sequence[str] = ("documents", "metadatas")) -> Dict[str, list]:
+        """Chroma get()과 같은 형식으로 저장된 문서 조회 (행 번호 순)"""
+        query = "SELECT id, text, metadata FROM docs WHERE deleted = 0"
+        params: list = []
+        if ids is not None:
+            query += f" AND id IN ({','.join('?' * len(ids))})"
+            params.extend(ids)
+        query += " ORDER BY row LIMIT ? OFFSET ?"
+        params.extend([-1 if limit is None else limit, offset])
+
+        with self._lock:
+            records = self._conn.execute(query, params).fetchall()
+
+        result = {"ids": [doc_id for doc_id, _, _ in records]}
+        if "documents" in include:
+            result["documents"] = [text for _, text, _ in records]
+        if "metadatas" in include:
+            result["metadatas"] = [json.loads(metadata) if metadata else None for _, _, metadata in records]
+        return result
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None,
+                   ids: Optional[List[str]] = None, persist_directory: str = None, **kwargs: Any) -> "ExactVectorStore":
+        store = cls(persist_directory=persist_directory, embedding_function=embedding)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
+
+    def close(self) -> None:
+        """연결 종료"""
+        with self._lock:
+            self._matrix = None
+            self._conn.close()
@@ -3,19 +3,30 @@
 문서를 로드하고 청킹하여 벡터 DB에 저장합니다.
 
 포함된 클래스:
-- DocumentLoader: PDF/TXT 파일 로드
+- DocumentLoader: PDF/TXT 파일 로드 (PDF는 워커 프로세스에서 병렬 파싱)
 - TextChunker: 문서 청킹
 - EmbeddingManager: 임베딩 모델 관리
-- VectorStoreManager: 벡터 DB 관리
+- ParallelEmbedder: 프로세스 풀 배치 임베딩 (인덱싱용)
+- VectorStoreManager: 벡터 DB 관리 (Chroma 또는 NumPy 정확 검색)
+- IndexManifest: 파일별 콘텐츠 해시 기록 (증분 인덱싱)
 - DocumentIndexer: 전체 인덱싱 오케스트레이션
 """
 import os
+import json
+import hashlib
 import logging
+import multiprocessing
 import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing.connection import wait
+from datetime import datetime
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+CHUNK_WINDOW_FACTOR = 16  # 스트리밍 청킹 시 한 번에 분할하는 텍스트 길이 (chunk_size 배수)
+
 os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
 
 from langchain_community.document_loaders import PyPDFLoader, TextLoader
@@ -25,89 +36,229 @@ from langchain_chroma import Chroma
 from langchain_core.documents import Document
 
 from app.core.config import Config
+from app.core.bm25 import BM25Index, iter_vectorstore_records, load_index
+from app.core.embedding_cache import CachedEmbeddings, DocumentEmbeddingStore
+from app.core.exact_store import ExactVectorStore
+
+
+def _parse_pdf(path):
+    """PDF 하나를 파싱하여 유효한 페이지들을 병합 (워커 프로세스에서 실행)"""
+    start_time = time.time()
+    pages = PyPDFLoader(str(path)).load()
+    if pages is None:
+        raise ValueError("loader returned None")
+
+    valid_pages = [p.page_content for p in pages if getattr(p, "page_content", "") and p.page_content.strip()]
+    return {
+        "pages": valid_pages,
+        "total_pages": len(pages),
+        "elapsed": time.time() - start_time,
+    }
+
+
+def _pdf_worker(conn):
+    """PDF 파싱 워커: 경로를 받아 결과(또는 오류)를 돌려보냄. None을 받으면 종료"""
+    while True:
+        path = conn.recv()
+        if path is None:
+            break
+        try:
+            conn.send((path, _parse_pdf(path), None))
+        except Exception as e:
+            conn.send((path, None, f"{type(e).__name__}: {e}"))
+
+
+class PdfParsePool:
+    """PDF 병렬 파싱 프로세스 풀
+
+    워커마다 파이프를 두고 파일을 하나씩 배정해 어떤 워커가 어떤 파일을 언제부터 처리 중인지 추적합니다.
+    파일 하나가 timeout을 넘기면 해당 워커만 강제 종료하고 새 워커로 교체하므로,
+    손상된 PDF 하나가 전체 인덱싱을 멈추게 하지 않습니다.
+    """
+
+    def __init__(self, num_workers=None, timeout=None):
+        self.num_workers = num_workers or Config.PDF_LOAD_WORKERS or os.cpu_count() or 1
+        self.timeout = timeout or Config.PDF_LOAD_TIMEOUT_SECONDS
+        self._context = multiprocessing.get_context("spawn")
+
+    def _start_worker(self):
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(target=_pdf_worker, args=(child_conn,), daemon=True)
+        process.start()
+        child_conn.close()
+        return {"process": process, "conn": parent_conn, "path": None, "started": None}
+
+    @staticmethod
+    def _stop_worker(worker, kill=False):
+        if kill:
+            worker["process"].kill()
+        else:
+            try:
+                worker["conn"].send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        worker["process"].join(timeout=5)
+        worker["conn"].close()
+
+    def parse(self, paths):
+        """
+        PDF들을 병렬로 파싱
+
+        Args:
+            paths: PDF 경로 리스트
+
+        Yields:
+            Tuple[Path, Dict | None, str | None]: (경로, 파싱 결과, 오류 메시지). 완료 순서대로 반환
+        """
+        queue = deque(paths)
+        workers = [self._start_worker() for _ in range(min(self.num_workers, len(queue)))]
+
+        try:
+            while queue or any(w["path"] is not None for w in workers):
+                # 쉬는 워커에 파일 배정
+                for worker in workers:
+                    if worker["path"] is None and queue:
+                        worker["path"] = queue.popleft()
+                        worker["started"] = time.time()
+                        worker["conn"].send(worker["path"])
+
+                busy = [w for w in workers if w["path"] is not None]
+                now = time.time()
+                deadline = min(w["started"] + self.timeout for w in busy)
+                ready = wait([w["conn"] for w in busy], timeout=max(0.0, deadline - now))
+
+                for i, worker in enumerate(workers):
+                    if worker["path"] is None:
+                        continue
+                    if worker["conn"] in ready:
+                        try:
+                            path, result, error = worker["conn"].recv()
+                        except EOFError:
+                            # 워커 비정상 종료 (segfault 등)
+                            path, result, error = worker["path"], None, "worker crashed"
+                            self._stop_worker(worker, kill=True)
+                            worker = workers[i] = self._start_worker()
+                        worker["path"] = None
+                        yield path, result, error
+                    elif time.time() - worker["started"] >= self.timeout:
+                        path = worker["path"]
+                        self._stop_worker(worker, kill=True)
+                        workers[i] = self._start_worker()
+                        yield path, None, f"timeout ({self.timeout}초 초과)"
+        finally:
+            for worker in workers:
+                self._stop_worker(worker, kill=worker["path"] is not None)
 
 
 class DocumentLoader:
     """문서 로더: PDF와 TXT 파일을 로드합니다."""
 
-    def __init__(self, folder_path=None):
+    def __init__(self, folder_path=None, num_workers=None, timeout=None):
         self.folder_path = folder_path or Config.DATA_DIR
+        self.num_workers = num_workers
+        self.timeout = timeout
+        self.report = {}
 
-    def load_documents(self):
-        """폴더 안의 모든 PDF와 TXT 파일을 로드
+    def list_files(self):
+        """폴더 안의 PDF와 TXT 파일 목록"""
+        if not os.path.exists(self.folder_path):
+            return []
+        folder = Path(self.folder_path)
+        return sorted(folder.glob("*.pdf")) + sorted(folder.glob("*.txt"))
 
-        PDF 파일은 페이지들을 병합하여 한 문서로 만듭니다.
-        (청킹 전에 페이지를 나누면 의미 있는 청킹이 불가능)
+    def iter_sources(self, paths=None):
+        """파일을 하나씩 로드하여 (metadata, 페이지 텍스트 리스트)를 yield
+
+        PDF 파싱은 PdfParsePool에서 병렬로 수행하며 완료 순서대로 반환합니다.
+        소비하는 쪽이 다음 파일을 요청할 때만 새 파일을 워커에 배정하므로 메모리에는 워커 수만큼의 파일만 올라옵니다.
+        파일별 소요 시간과 실패 목록은 self.report에 기록합니다.
+
+        Args:
+            paths: 로드할 파일 경로 리스트 (None이면 폴더 전체)
         """
-        documents = []
+        self.report = {"timings": {}, "failed": {}}
 
-        if not os.path.exists(self.folder_path):
+        if paths is None and not os.path.exists(self.folder_path):
             logger.error(f"❌ 폴더 없음: {self.folder_path}")
-            return documents
+            return
 
-        pdf_files = list(Path(self.folder_path).glob("*.pdf"))
-        txt_files = list(Path(self.folder_path).glob("*.txt"))
+        if paths is None:
+            paths = self.list_files()
+        pdf_files = [Path(p) for p in paths if Path(p).suffix == ".pdf"]
+        txt_files = [Path(p) for p in paths if Path(p).suffix == ".txt"]
 
         logger.info(f"📄 문서 로드 중... (PDF: {len(pdf_files)}, TXT: {len(txt_files)})")
 
         if len(pdf_files) == 0 and len(txt_files) == 0:
             logger.warning("⚠️  문서가 없습니다. PDF 또는 TXT 파일을 추가해주세요.")
-            return documents
+            return
 
-        # PDF 로드: 페이지들을 병합하여 한 문서로
-        for pdf_file in pdf_files:
-            try:
-                loader = PyPDFLoader(str(pdf_file))
-                pages = loader.load()
-
-                if pages is None:
-                    logger.warning(f"   ⚠️  {pdf_file.name}: loader returned None")
-                    continue
-
-                total_pages = len(pages)
-                valid_pages = [p for p in pages if getattr(p, "page_content", "") and p.page_content.strip()]
-                valid_count = len(valid_pages)
-                chars = sum(len(p.page_content) for p in valid_pages) if valid_pages else 0
-                logger.info(f"   [{pdf_file.name}] pages_loaded={total_pages}, valid_pages={valid_count}, chars={chars}")
-
-                if not valid_pages:
-                    logger.warning(f"   ⚠️  {pdf_file.name}: 유효한 텍스트가 없음 (OCR 필요 가능성)")
-                    continue
-
-                merged_content = "\n\n".join([p.page_content for p in valid_pages])
+        start_time = time.time()
+        loaded = 0
+
+        # PDF 로드: 유효한 페이지들을 한 문서로 (청킹 전에 페이지를 나누면 의미 있는 청킹이 불가능)
+        for pdf_file, result, error in PdfParsePool(self.num_workers, self.timeout).parse(pdf_files):
+            if error is not None:
+                self.report["failed"][pdf_file.name] = error
+                logger.error(f"   ❌ {pdf_file.name}: {error}")
+                continue
+
+            pages = result["pages"]
+            valid_count = len(pages)
+            self.report["timings"][pdf_file.name] = result["elapsed"]
+            logger.info(
+                f"   [{pdf_file.name}] pages_loaded={result['total_pages']}, valid_pages={valid_count}, "
+                f"chars={sum(len(p) for p in pages)}, 소요={result['elapsed']:.2f}초"
+            )
 
-                merged_doc = Document(
-                    page_content=merged_content,
-                    metadata={
-                        "source": pdf_file.name,
-                        "type": "pdf",
-                        "total_pages": valid_count,
-                        "start_page": 0,
-                        "end_page": valid_count - 1,
-                    },
-                )
+            if not valid_count:
+                logger.warning(f"   ⚠️  {pdf_file.name}: 유효한 텍스트가 없음 (OCR 필요 가능성)")
+                continue
 
-                documents.append(merged_doc)
-            except Exception as e:
-                logger.error(f"   ❌ {pdf_file.name}: {e}")
+            loaded += 1
+            yield {
+                "source": pdf_file.name,
+                "type": "pdf",
+                "total_pages": valid_count,
+                "start_page": 0,
+                "end_page": valid_count - 1,
+            }, pages
 
         # TXT 로드
         for txt_file in txt_files:
             try:
-                loader = TextLoader(str(txt_file), encoding="utf-8")
-                docs = loader.load()
-
-                for doc in docs:
-                    wrapped = Document(page_content=doc.page_content, metadata={
-                        "source": txt_file.name,
-                        "type": "txt",
-                    })
-                    documents.append(wrapped)
+                docs = TextLoader(str(txt_file), encoding="utf-8").load()
             except Exception as e:
+                self.report["failed"][txt_file.name] = f"{type(e).__name__}: {e}"
                 logger.error(f"   ❌ {txt_file.name}: {e}")
+                continue
+
+            for doc in docs:
+                loaded += 1
+                yield {"source": txt_file.name, "type": "txt"}, [doc.page_content]
+
+        self.report["elapsed"] = time.time() - start_time
+        logger.info(
+            f"   ✅ {len(pdf_files) + len(txt_files)}개 파일에서 {loaded}개 문서 로드 "
+            f"(소요: {self.report['elapsed']:.2f}초, 실패: {len(self.report['failed'])}개)"
+        )
+        slowest = sorted(self.report["timings"].items(), key=lambda item: item[1], reverse=True)[:3]
+        if slowest:
+            logger.info("   🐢 가장 느린 PDF: " + ", ".join(f"{name} ({elapsed:.2f}초)" for name, elapsed in slowest))
+
+    def load_documents(self, paths=None):
+        """폴더 안의 모든 PDF와 TXT 파일을 Document 리스트로 로드
 
-        logger.info(f"   ✅ {len(pdf_files) + len(txt_files)}개 파일에서 {len(documents)}개 문서 로드")
-        return documents
+        PDF 파일은 페이지들을 병합하여 한 문서로 만듭니다.
+        인덱싱은 메모리를 일정하게 유지하기 위해 iter_sources를 직접 사용합니다.
+
+        Args:
+            paths: 로드할 파일 경로 리스트 (None이면 폴더 전체)
+        """
+        return [
+            Document(page_content="\n\n".join(pages), metadata=metadata)
+            for metadata, pages in self.iter_sources(paths)
+        ]
 
 
 class TextChunker:
@@ -117,18 +268,19 @@ class TextChunker:
         self.chunk_size = chunk_size or Config.CHUNK_SIZE
         self.chunk_overlap = chunk_overlap or Config.CHUNK_OVERLAP
 
-    def chunk_documents(self, documents):
-        """문서를 작은 청크로 분할"""
-        logger.info(f"✂️  청킹 중... (크기: {self.chunk_size}, 오버랩: {self.chunk_overlap})")
-
-        splitter = RecursiveCharacterTextSplitter(
+    def _splitter(self):
+        return RecursiveCharacterTextSplitter(
             chunk_size=self.chunk_size,
             chunk_overlap=self.chunk_overlap,
             separators=["\n\n", "\n", ". ", " "],
             keep_separator=False,
         )
 
-        chunks = splitter.split_documents(documents)
+    def chunk_documents(self, documents):
+        """문서를 작은 청크로 분할"""
+        logger.info(f"✂️  청킹 중... (크기: {self.chunk_size}, 오버랩: {self.chunk_overlap})")
+
+        chunks = self._splitter().split_documents(documents)
 
         min_length = Config.MIN_CHUNK_SIZE
         filtered_chunks = [chunk for chunk in chunks if len(chunk.page_content.strip()) >= min_length]
@@ -138,13 +290,65 @@ class TextChunker:
 
         return filtered_chunks
 
+    def split_pages(self, pages):
+        """페이지 텍스트들을 이어서 청크 텍스트로 분할 (yield)
+
+        문서 전체를 한 문자열로 합치지 않고 chunk_size * CHUNK_WINDOW_FACTOR 길이씩 분할합니다.
+        매번 마지막 조각은 다음 페이지 앞에 붙여 다시 분할하므로 페이지 경계를 넘는 청크도 만들어집니다.
+        텍스트는 빠짐없이 청크에 포함되지만, 구분자 선택이 윈도우 단위로 이루어지므로
+        문서 전체를 한 번에 분할할 때와 청크 경계는 다를 수 있습니다.
+        """
+        splitter = self._splitter()
+        window = self.chunk_size * CHUNK_WINDOW_FACTOR
+        buffer = ""
+
+        for page in pages:
+            buffer = f"{buffer}\n\n{page}" if buffer else page
+            if len(buffer) >= window:
+                pieces = splitter.split_text(buffer)
+                yield from pieces[:-1]
+                buffer = pieces[-1] if pieces else ""
+
+        if buffer:
+            yield from splitter.split_text(buffer)
+
+    def iter_chunks(self, sources):
+        """
+        (metadata, 페이지 리스트) 스트림을 청크 Document 스트림으로 변환
+
+        Args:
+            sources: DocumentLoader.iter_sources() 결과
+
+        Yields:
+            Document: MIN_CHUNK_SIZE 이상인 청크
+        """
+        logger.info(f"✂️  청킹 중... (크기: {self.chunk_size}, 오버랩: {self.chunk_overlap})")
+
+        min_length = Config.MIN_CHUNK_SIZE
+        total, kept = 0, 0
+        for metadata, pages in sources:
+            for text in self.split_pages(pages):
+                total += 1
+                if len(text.strip()) < min_length:
+                    continue
+                kept += 1
+                yield Document(page_content=text, metadata=dict(metadata))
+
+        logger.info(f"   ✅ {total}개 청크 생성 → {total - kept}개 제거 → {kept}개 최종")
+
 
 class EmbeddingManager:
-    """임베딩 관리자: 문서를 벡터로 변환합니다."""
+    """임베딩 관리자: 문서를 벡터로 변환합니다.
 
-    def __init__(self, model_name=None, device=None):
+    백엔드 (Config.EMBEDDING_BACKEND):
+    - huggingface: sentence-transformers (PyTorch fp32)
+    - onnx: ONNX Runtime + 동적 int8 양자화 (CPU 메모리/지연 시간 절감)
+    """
+
+    def __init__(self, model_name=None, device=None, backend=None):
         self.model_name = model_name or Config.EMBEDDING_MODEL
-        self.device = device or os.getenv("HF_EMBEDDING_DEVICE", "cpu")
+        self.device = device or Config.EMBEDDING_DEVICE
+        self.backend = backend or Config.EMBEDDING_BACKEND
         self.embeddings = None
 
     def get_embeddings(self):
@@ -152,59 +356,335 @@ class EmbeddingManager:
         if self.embeddings is not None:
             return self.embeddings
 
-        logger.info(f"🔢 임베딩 모델 로드 중... ({self.model_name}) device={self.device}")
+        logger.info(f"🔢 임베딩 모델 로드 중... ({self.model_name}) backend={self.backend} device={self.device}")
+
+        embeddings = self._load_backend()
+
+        # 반복되는 쿼리는 모델 연산 없이 캐시에서 반환
+        if Config.QUERY_EMBEDDING_CACHE_SIZE > 0:
+            embeddings = CachedEmbeddings(embeddings, self.model_name, Config.QUERY_EMBEDDING_CACHE_SIZE)
+        self.embeddings = embeddings
+
+        logger.info(f"   ✅ 임베딩 모델 준비 완료")
+        return self.embeddings
+
+    def _load_backend(self):
+        """설정된 백엔드의 임베딩 모델 생성"""
+        if self.backend == "onnx":
+            from app.core.onnx_embeddings import OnnxEmbeddings
+            return OnnxEmbeddings(model_name=self.model_name)
+
+        if self.backend != "huggingface":
+            raise ValueError(f"지원하지 않는 임베딩 백엔드입니다: {self.backend}")
+
+        if Config.EMBEDDING_NUM_THREADS:
+            import torch
+            torch.set_num_threads(Config.EMBEDDING_NUM_THREADS)
 
         try:
-            self.embeddings = HuggingFaceEmbeddings(
+            return HuggingFaceEmbeddings(
                 model_name=self.model_name,
                 model_kwargs={"device": self.device},
-                encode_kwargs={'normalize_embeddings': True}
+                encode_kwargs={
+                    'normalize_embeddings': Config.NORMALIZE_EMBEDDINGS,
+                    'batch_size': Config.EMBEDDING_BATCH_SIZE,
+                }
             )
         except TypeError:
-            self.embeddings = HuggingFaceEmbeddings(model_name=self.model_name)
+            return HuggingFaceEmbeddings(model_name=self.model_name)
+
+
+# 워커 프로세스별 임베딩 모델 (프로세스 시작 시 1회 로드)
+_worker_embeddings = None
+
+
+def _init_embedding_worker(model_name, backend, num_threads):
+    """임베딩 워커 초기화: 코어를 워커 수만큼 나눠 쓰도록 스레드 수 제한 후 모델 로드"""
+    global _worker_embeddings
+    Config.EMBEDDING_NUM_THREADS = num_threads
+    _worker_embeddings = EmbeddingManager(model_name=model_name, backend=backend)._load_backend()
+
+
+def _embed_batch(texts):
+    """워커 프로세스에서 배치 하나 임베딩"""
+    return _worker_embeddings.embed_documents(texts)
 
-        logger.info(f"   ✅ 임베딩 모델 준비 완료")
-        return self.embeddings
+
+class ParallelEmbedder:
+    """프로세스 풀 배치 임베딩
+
+    청크를 batch_size 단위로 나눠 워커 프로세스들에 분배하고, 입력 순서대로 결과를 돌려줍니다.
+    동시에 처리 중인 배치 수를 워커 수의 2배로 제한해 메모리 사용량을 일정하게 유지합니다.
+    디스크 임베딩 캐시(DocumentEmbeddingStore)에 있는 텍스트는 워커에 보내지 않으며,
+    모든 텍스트가 캐시에 있으면 워커(모델)를 아예 띄우지 않습니다.
+    """
+
+    def __init__(self, model_name=None, backend=None, num_workers=None, batch_size=None, embeddings=None, use_cache=None):
+        self.model_name = model_name or Config.EMBEDDING_MODEL
+        self.backend = backend or Config.EMBEDDING_BACKEND
+        self.num_workers = num_workers or Config.INDEX_EMBED_WORKERS or max(1, (os.cpu_count() or 1) // 4)
+        self.batch_size = batch_size or Config.INDEX_EMBED_BATCH_SIZE
+        self.embeddings = embeddings  # 워커 1개일 때 현재 프로세스에서 사용할 임베딩
+
+        use_cache = Config.EMBEDDING_CACHE_ENABLED if use_cache is None else use_cache
+        self.cache = DocumentEmbeddingStore(self.model_name, self.backend) if use_cache else None
+
+    def embed_batches(self, batches):
+        """
+        텍스트 배치 이터러블을 임베딩 (캐시 우선)
+
+        Args:
+            batches: 텍스트 리스트의 이터러블
+
+        Yields:
+            List[List[float]]: 입력 배치 순서대로의 임베딩
+        """
+        if self.cache is None:
+            yield from self._compute_batches(batches)
+            return
+
+        looked_up = deque()  # (텍스트, 캐시 조회 결과, 캐시 미스 텍스트)
+
+        def missing_batches():
+            for texts in batches:
+                vectors = self.cache.get_many(texts)
+                missing = [text for text, vector in zip(texts, vectors) if vector is None]
+                looked_up.append((vectors, missing))
+                yield missing
+
+        for computed in self._compute_batches(missing_batches()):
+            vectors, missing = looked_up.popleft()
+            self.cache.put_many(missing, computed)
+            computed = iter(computed)
+            yield [vector if vector is not None else next(computed) for vector in vectors]
+
+        stats = self.cache.stats()
+        logger.info(f"   💽 임베딩 캐시: 적중 {stats['hits']}개, 새로 계산 {stats['misses']}개 (캐시 크기 {stats['size']})")
+
+    def _compute_batches(self, batches):
+        """텍스트 배치들을 모델로 임베딩 (빈 배치는 모델 없이 빈 결과)"""
+        if self.num_workers <= 1:
+            embeddings = self.embeddings
+            for texts in batches:
+                if not texts:
+                    yield []
+                    continue
+                if embeddings is None:
+                    embeddings = EmbeddingManager(self.model_name, backend=self.backend)._load_backend()
+                yield embeddings.embed_documents(texts)
+            return
+
+        threads_per_worker = max(1, (os.cpu_count() or 1) // self.num_workers)
+        executor = None
+        pending = deque()
+        try:
+            for texts in batches:
+                if texts:
+                    if executor is None:
+                        logger.info(f"   🧮 임베딩 워커 {self.num_workers}개 시작 (워커당 스레드 {threads_per_worker}, 배치 {self.batch_size})")
+                        # PyTorch/토크나이저 스레드가 fork로 복제되지 않도록 spawn 사용
+                        executor = ProcessPoolExecutor(
+                            max_workers=self.num_workers,
+                            mp_context=multiprocessing.get_context("spawn"),
+                            initializer=_init_embedding_worker,
+                            initargs=(self.model_name, self.backend, threads_per_worker),
+                        )
+                    future = executor.submit(_embed_batch, texts)
+                else:
+                    future = Future()
+                    future.set_result([])
+                pending.append(future)
+                if len(pending) >= self.num_workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    def embed(self, texts):
+        """텍스트 리스트를 batch_size 단위로 임베딩 (배치 단위로 yield)"""
+        batches = (texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size))
+        return self.embed_batches(batches)
 
 
 class VectorStoreManager:
-    """벡터 DB 관리자: Chroma 벡터 DB를 관리합니다."""
+    """벡터 DB 관리자: 벡터 DB를 관리합니다.
+
+    백엔드 (Config.VECTOR_BACKEND):
+    - chroma: Chroma (SQLite + HNSW)
+    - numpy: ExactVectorStore (memmap 행렬 정확 검색, Config.NUMPY_STORE_DTYPE: float32 기본 / float16)
+    """
 
-    def __init__(self, embeddings):
+    def __init__(self, embeddings, backend=None):
         self.embeddings = embeddings
-        self.persist_dir = Config.CHROMA_DB_PATH
-        self.collection_name = "papers"
+        self.backend = backend or Config.VECTOR_BACKEND
+        self.persist_dir = self.default_persist_dir(self.backend)
+        self.collection_name = Config.CHROMA_COLLECTION_NAME
         self.vectorstore = None
 
-    def create_vectorstore(self, chunks):
-        """청크들을 임베딩하고 벡터 DB에 저장"""
-        logger.info(f"💾 벡터 DB 저장 중... ({len(chunks)}개 청크)")
+    @staticmethod
+    def default_persist_dir(backend=None):
+        """백엔드별 저장 경로"""
+        backend = backend or Config.VECTOR_BACKEND
+        if backend == "numpy":
+            return Config.NUMPY_STORE_PATH
+        if backend != "chroma":
+            raise ValueError(f"지원하지 않는 벡터 DB 백엔드입니다: {backend}")
+        return Config.CHROMA_DB_PATH
+
+    @staticmethod
+    def hnsw_configuration():
+        """Config의 HNSW 파라미터로 만든 Chroma 컬렉션 설정"""
+        return {
+            "hnsw": {
+                "space": Config.VECTOR_DISTANCE,
+                "max_neighbors": Config.HNSW_M,
+                "ef_construction": Config.HNSW_EF_CONSTRUCTION,
+                "ef_search": Config.HNSW_EF_SEARCH,
+            }
+        }
+
+    def open_vectorstore(self):
+        """벡터 DB 열기 (없으면 새로 생성)"""
+        if self.backend == "numpy":
+            self.vectorstore = ExactVectorStore(
+                persist_directory=self.persist_dir,
+                embedding_function=self.embeddings,
+                dtype=Config.NUMPY_STORE_DTYPE,
+                distance=Config.VECTOR_DISTANCE,
+            )
+        else:
+            self.vectorstore = Chroma(
+                collection_name=self.collection_name,
+                persist_directory=self.persist_dir,
+                embedding_function=self.embeddings,
+                collection_configuration=self.hnsw_configuration(),
+            )
+            self._apply_search_params()
+        return self.vectorstore
+
+    def _apply_search_params(self):
+        """기존 컬렉션의 HNSW 설정을 Config와 맞춤
+
+        Chroma는 이미 만들어진 컬렉션을 열 때 전달한 설정을 무시합니다.
+        ef_search는 바로 변경하고, 구축 시점에 고정되는 값(거리, M, ef_construction)이 다르면 재인덱싱을 안내합니다.
+        """
+        collection = self.vectorstore._collection
+        current = (collection.configuration or {}).get("hnsw") or {}
+        wanted = self.hnsw_configuration()["hnsw"]
+
+        if current.get("ef_search") != wanted["ef_search"]:
+            collection.modify(configuration={"hnsw": {"ef_search": wanted["ef_search"]}})
+            logger.info(f"   🔧 HNSW ef_search: {current.get('ef_search')} → {wanted['ef_search']}")
+
+        fixed = [name for name in ("space", "max_neighbors", "ef_construction") if current.get(name) != wanted[name]]
+        if fixed:
+            logger.warning(
+                "⚠️  컬렉션의 HNSW 설정이 Config와 다릅니다 ("
+                + ", ".join(f"{name}: {current.get(name)} ≠ {wanted[name]}" for name in fixed)
+                + "). python scripts/embed_papers.py --full 로 재인덱싱하세요."
+            )
+
+    def create_vectorstore(self, chunks, embedder=None):
+        """기존 내용을 비우고 청크들을 임베딩하여 벡터 DB에 저장"""
+        self.open_vectorstore()
+        self.vectorstore.reset_collection()
+        self.add_chunks(chunks, embedder=embedder)
+        return self.vectorstore
+
+    def add_chunks(self, chunks, embedder=None):
+        """청크 스트림을 임베딩하면서 벡터 DB에 upsert
+
+        청크를 embedder.batch_size 단위로 모아 ParallelEmbedder에 넘기고,
+        임베딩이 끝난 배치는 CHROMA_UPSERT_BATCH_SIZE 단위로 바로 upsert합니다.
+        ParallelEmbedder가 처리 중인 배치 수를 제한하므로 청크 이터러블은 그만큼만 앞서 소비됩니다.
+
+        Args:
+            chunks: metadata["chunk_id"]가 있는 Document 이터러블
+            embedder: ParallelEmbedder (기본: 설정값으로 생성)
+
+        Returns:
+            int: 저장한 청크 수
+        """
+        logger.info(f"💾 벡터 DB 저장 중...")
 
         start_time = time.time()
 
-        self.vectorstore = Chroma.from_documents(
-            documents=chunks,
-            embedding=self.embeddings,
-            persist_directory=self.persist_dir,
-        )
+        if self.vectorstore is None:
+            self.open_vectorstore()
+
+        embedder = embedder or ParallelEmbedder(embeddings=self.embeddings)
+        in_flight = deque()  # 임베딩 중인 청크 배치 (embed_batches 결과와 같은 순서)
+
+        def text_batches():
+            batch = []
+            for chunk in chunks:
+                batch.append(chunk)
+                if len(batch) >= embedder.batch_size:
+                    in_flight.append(batch)
+                    yield [c.page_content for c in batch]
+                    batch = []
+            if batch:
+                in_flight.append(batch)
+                yield [c.page_content for c in batch]
+
+        done = 0
+        buffer = []
+        for vectors in embedder.embed_batches(text_batches()):
+            batch = in_flight.popleft()
+            buffer.extend((chunk.metadata["chunk_id"], chunk, vector) for chunk, vector in zip(batch, vectors))
+            done += len(batch)
+            if len(buffer) >= Config.CHROMA_UPSERT_BATCH_SIZE:
+                self.upsert(buffer)
+                buffer = []
+
+                elapsed_time = time.time() - start_time
+                logger.info(f"   ⏳ {done}개 청크 저장 ({done / max(elapsed_time, 1e-9):.1f} 청크/초)")
+        self.upsert(buffer)
 
         elapsed_time = time.time() - start_time
-        logger.info(f"   ✅ 벡터 DB 저장 완료 (소요: {elapsed_time:.2f}초)")
-        return self.vectorstore
+        logger.info(
+            f"   ✅ 벡터 DB 저장 완료 ({done}개, 소요: {elapsed_time:.2f}초, {done / max(elapsed_time, 1e-9):.1f} 청크/초)"
+        )
+        return done
+
+    def delete_sources(self, sources):
+        """source(파일명)에 해당하는 청크 삭제"""
+        for source in sources:
+            if self.backend == "numpy":
+                self.vectorstore.delete_by("source", [source])
+            else:
+                self.vectorstore._collection.delete(where={"source": source})
+            logger.info(f"   🗑️  {source} 청크 삭제")
+
+    def upsert(self, records):
+        """(id, Document, embedding) 리스트를 벡터 DB에 upsert"""
+        if not records:
+            return
+
+        ids, documents, vectors = zip(*records)
+        store = self.vectorstore if self.backend == "numpy" else self.vectorstore._collection
+        store.upsert(
+            ids=list(ids),
+            embeddings=[list(vector) for vector in vectors],
+            documents=[doc.page_content for doc in documents],
+            metadatas=[doc.metadata or None for doc in documents],
+        )
 
     def load_vectorstore(self):
         """기존 벡터 DB 로드"""
         if not os.path.exists(self.persist_dir):
             raise FileNotFoundError(f"벡터 DB를 찾을 수 없습니다: {self.persist_dir}")
 
-        logger.info(f"📂 벡터 DB 로드 중...")
+        logger.info(f"📂 벡터 DB 로드 중... ({self.backend})")
 
-        self.vectorstore = Chroma(
-            persist_directory=self.persist_dir,
-            embedding_function=self.embeddings,
-        )
+        self.open_vectorstore()
 
-        logger.info(f"   ✅ 벡터 DB 로드 완료")
+        count = len(self.vectorstore) if self.backend == "numpy" else self.vectorstore._collection.count()
+        if count == 0:
+            logger.warning(f"⚠️  벡터 DB가 비어 있습니다 ({self.persist_dir}). python scripts/embed_papers.py 로 인덱싱하세요.")
+        logger.info(f"   ✅ 벡터 DB 로드 완료 ({count}개 청크)")
         return self.vectorstore
 
     def get_retriever(self):
@@ -217,11 +697,81 @@ class VectorStoreManager:
             search_kwargs={"k": Config.TOP_K},
         )
 
-    def get_bm25_retriever(self, documents):
-        """BM25 Retriever 생성"""
-        from langchain_community.retrievers import BM25Retriever
-        logger.info(f"🔍 BM25 리트리버 생성 중...")
-        return BM25Retriever.from_documents(documents)
+    def build_bm25_index(self):
+        """벡터 DB의 전체 청크로 BM25 인덱스를 생성하여 디스크에 저장"""
+        if self.vectorstore is None:
+            raise ValueError("벡터 스토어가 초기화되지 않았습니다")
+
+        return BM25Index.build(iter_vectorstore_records(self.vectorstore), Config.BM25_INDEX_PATH)
+
+    def load_bm25_index(self):
+        """BM25 인덱스 로드 (memory-map, 생성은 build_bm25_index / scripts/embed_papers.py)"""
+        return load_index(Config.BM25_INDEX_PATH)
+
+
+class IndexManifest:
+    """인덱스 매니페스트: 파일별 콘텐츠 해시와 인덱싱 설정을 기록합니다.
+
+    청커 설정이나 임베딩 모델이 바뀌면 기존 청크를 재사용할 수 없으므로 전체 재인덱싱합니다.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path=None):
+        self.path = Path(path or Config.INDEX_MANIFEST_PATH)
+        self.settings = {}
+        self.files = {}
+
+    @staticmethod
+    def current_settings():
+        """현재 청커/임베딩 설정"""
+        return {
+            "chunk_size": Config.CHUNK_SIZE,
+            "chunk_overlap": Config.CHUNK_OVERLAP,
+            "min_chunk_size": Config.MIN_CHUNK_SIZE,
+            "embedding_model": Config.EMBEDDING_MODEL,
+            "embedding_backend": Config.EMBEDDING_BACKEND,
+            "vector_backend": Config.VECTOR_BACKEND,
+            "numpy_store_dtype": Config.NUMPY_STORE_DTYPE,
+            "collection_name": Config.CHROMA_COLLECTION_NAME,
+            "distance": Config.VECTOR_DISTANCE,
+            "hnsw_m": Config.HNSW_M,
+            "hnsw_ef_construction": Config.HNSW_EF_CONSTRUCTION,
+        }
+
+    @staticmethod
+    def file_hash(path):
+        """파일 SHA-256"""
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def load(self):
+        """매니페스트 로드 (없으면 빈 상태)"""
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == self.VERSION:
+                self.settings = data.get("settings", {})
+                self.files = data.get("files", {})
+        return self
+
+    def save(self):
+        """매니페스트 저장 (임시 파일에 쓴 뒤 교체)"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": self.VERSION, "settings": self.settings, "files": self.files},
+                f, indent=2, ensure_ascii=False,
+            )
+        os.replace(tmp_path, self.path)
+
+    def is_compatible(self):
+        """현재 설정으로 만든 인덱스인지 여부"""
+        return self.settings == self.current_settings()
 
 
 class DocumentIndexer:
@@ -233,30 +783,95 @@ class DocumentIndexer:
         self.embedding_manager = EmbeddingManager()
         self.db_manager = None
 
-    def build_vectorstore(self):
+    def build_vectorstore(self, full=False):
         """
-        벡터 DB 생성
-        문서 로드 → 청킹 → 임베딩 → 벡터 DB 저장
+        벡터 DB 생성 (증분)
+        문서 로드 → 청킹 → 임베딩 → 벡터 DB 저장 → BM25 인덱스 저장
+
+        매니페스트의 파일 해시와 비교해 새로 추가되거나 바뀐 파일만 처리하고,
+        삭제되거나 바뀐 파일의 기존 청크는 벡터 DB에서 제거합니다.
+        청커 설정/임베딩 모델이 바뀌었거나 full=True이면 전체를 다시 인덱싱합니다.
+
+        Args:
+            full: 전체 재인덱싱 여부
 
         Returns:
             VectorStoreManager: 생성된 벡터 DB 관리자
         """
         logger.info("📑 문서 인덱싱 시작...")
 
-        documents = self.loader.load_documents()
-        if len(documents) == 0:
+        files = {path.name: path for path in self.loader.list_files()}
+        if not files:
             logger.error("❌ 문서를 로드할 수 없습니다")
             return None
 
-        chunks = self.chunker.chunk_documents(documents)
+        manifest = IndexManifest().load()
+        full = full or not manifest.is_compatible() or not os.path.exists(VectorStoreManager.default_persist_dir())
+
+        hashes = {name: IndexManifest.file_hash(path) for name, path in files.items()}
+        if full:
+            logger.info("   🔁 전체 인덱싱 (설정 변경 또는 기존 인덱스 없음)")
+            manifest.files = {}
+        changed = [name for name, digest in hashes.items() if manifest.files.get(name, {}).get("sha256") != digest]
+        removed = [name for name in manifest.files if name not in files]
+        logger.info(f"   📋 변경: {len(changed)}개, 삭제: {len(removed)}개, 유지: {len(files) - len(changed)}개")
 
         embeddings = self.embedding_manager.get_embeddings()
         self.db_manager = VectorStoreManager(embeddings)
-        self.db_manager.create_vectorstore(chunks)
+        self.db_manager.open_vectorstore()
+
+        if not full and not changed and not removed:
+            logger.info("✅ 변경된 문서 없음")
+            if not os.path.exists(Config.BM25_INDEX_PATH):
+                self.db_manager.build_bm25_index()
+            return self.db_manager
+
+        if full:
+            # 비운 매니페스트를 먼저 저장해 두어, 아래 작업 중 중단되면 다음 실행도 전체 인덱싱
+            manifest.settings = {}
+            manifest.save()
+            self.db_manager.vectorstore.reset_collection()
+        else:
+            # 삭제/변경된 파일의 기존 청크 제거
+            self.db_manager.delete_sources(removed + [name for name in changed if name in manifest.files])
+
+        # 로드 → 청킹 → 임베딩 → upsert를 스트리밍으로 연결 (문서/청크/임베딩 전체를 메모리에 두지 않음)
+        chunk_counts = {}
+        sources = self.loader.iter_sources([files[name] for name in changed])
+        chunks = self._with_chunk_ids(self.chunker.iter_chunks(sources), hashes, chunk_counts)
+        self.db_manager.add_chunks(chunks)
+
+        # 매니페스트 갱신
+        for name in removed:
+            manifest.files.pop(name, None)
+        for name in changed:
+            if name in self.loader.report.get("failed", {}):
+                # 로드 실패한 파일은 기록하지 않아 다음 실행에서 다시 시도
+                manifest.files.pop(name, None)
+                continue
+            manifest.files[name] = {
+                "sha256": hashes[name],
+                "chunks": chunk_counts.get(name, 0),
+                "indexed_at": datetime.now().isoformat(),
+            }
+        manifest.settings = IndexManifest.current_settings()
+        manifest.save()
+
+        self.db_manager.build_bm25_index()
 
         logger.info(f"✅ 벡터 DB 생성 완료")
         return self.db_manager
 
+    @staticmethod
+    def _with_chunk_ids(chunks, hashes, counts):
+        """파일 해시 + 파일 내 순번으로 결정적인 청크 ID 부여 (metadata["chunk_id"]), 파일별 청크 수는 counts에 기록"""
+        for chunk in chunks:
+            source = chunk.metadata["source"]
+            index = counts.get(source, 0)
+            counts[source] = index + 1
+            chunk.metadata["chunk_id"] = f"{hashes[source][:16]}-{index:05d}"
+            yield chunk
+
     def get_or_create_vectorstore(self):
         """
         기존 벡터 DB가 있으면 로드, 없으면 생성
@@ -267,7 +882,7 @@ class DocumentIndexer:
         embeddings = self.embedding_manager.get_embeddings()
         db_manager = VectorStoreManager(embeddings)
 
-        if os.path.exists(Config.CHROMA_DB_PATH):
+        if os.path.exists(db_manager.persist_dir):
             logger.info(f"📂 기존 벡터 DB 발견")
             try:
                 db_manager.load_vectorstore()
@@ -1,6 +1,8 @@
 """
 LLM 모듈
 """
+from typing import Type
+from pydantic import BaseModel
 from langchain_openai import ChatOpenAI
 from app.core.config import Config
 
@@ -10,5 +12,30 @@ def get_llm():
     return ChatOpenAI(
         model=Config.LLM_MODEL,
         temperature=Config.LLM_TEMPERATURE,
-        api_key=Config.OPENAI_API_KEY
+        api_key=Config.OPENAI_API_KEY,
+        stream_usage=True,  # 스트리밍 응답에도 토큰 사용량 포함
     )
+
+
+def json_schema_format(schema: Type[BaseModel]) -> dict:
+    """Pydantic 모델을 OpenAI response_format(json_schema, strict)으로 변환"""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": schema.__name__,
+            "strict": True,
+            "schema": schema.model_json_schema(),
+        },
+    }
+
+
+def with_json_schema(llm, schema: Type[BaseModel]):
+    """
+    응답을 스키마에 맞는 JSON으로 제한한 LLM 반환
+
+    토큰 스트리밍은 그대로 유지되고, 출력 텍스트는 parse_llm_output으로 한 번에 검증합니다.
+    Config.LLM_STRUCTURED_OUTPUT이 꺼져 있으면 원래 LLM을 그대로 반환합니다.
+    """
+    if not Config.LLM_STRUCTURED_OUTPUT:
+        return llm
+    return llm.bind(response_format=json_schema_format(schema))
@@ -0,0 +1,79 @@
+"""
+Prometheus 메트릭 모듈
+프로세스 내에서 수집하고 /metrics에서 텍스트 형식으로 노출합니다.
+
+- nada_stage_duration_seconds{stage}: 파이프라인 단계 및 세부 작업 소요 시간
+  (prepare_image, upload, speculative_search, generate_query, search, generate,
+   dense_search, bm25_search, rrf_merge, log_write)
+- nada_stage_errors_total{stage}: 단계별 실패 수
+- nada_analyses_total{status}: 분석 결과 수 (success / error / cached)
+- nada_analyses_in_flight: 처리 중인 분석 수
+- nada_http_request_duration_seconds{method, path, status}: HTTP 요청 처리 시간 (라우트 템플릿 기준)
+- nada_http_requests_in_flight: 처리 중인 HTTP 요청 수
+- nada_cache_requests_total{cache, result}: 캐시 적중/실패 (query_embedding / response / cloudinary_upload)
+- nada_llm_tokens_total{model, type}: LLM 토큰 사용량 (input / output)
+
+uvicorn 워커가 여러 개면 워커별로 따로 집계됩니다 (PROMETHEUS_MULTIPROC_DIR 미사용).
+"""
+import time
+from contextlib import contextmanager
+from typing import Any, Dict
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+from app.core import tracing
+
+# 5ms ~ 60s (임베딩/검색은 ms 단위, LLM 호출은 초 단위)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+STAGE_SECONDS = Histogram(
+    "nada_stage_duration_seconds", "파이프라인 단계 소요 시간", ["stage"], buckets=LATENCY_BUCKETS
+)
+STAGE_ERRORS = Counter("nada_stage_errors_total", "파이프라인 단계 실패 수", ["stage"])
+ANALYSES = Counter("nada_analyses_total", "분석 결과 수", ["status"])
+ANALYSES_IN_FLIGHT = Gauge("nada_analyses_in_flight", "처리 중인 분석 수")
+HTTP_SECONDS = Histogram(
+    "nada_http_request_duration_seconds", "HTTP 요청 처리 시간", ["method", "path", "status"], buckets=LATENCY_BUCKETS
+)
+HTTP_IN_FLIGHT = Gauge("nada_http_requests_in_flight", "처리 중인 HTTP 요청 수")
+CACHE_REQUESTS = Counter("nada_cache_requests_total", "캐시 조회 수", ["cache", "result"])
+LLM_TOKENS = Counter("nada_llm_tokens_total", "LLM 토큰 사용량", ["model", "type"])
+
+
+def observe_stage(stage: str, seconds: float, failed: bool = False) -> None:
+    """단계 소요 시간 기록 (실패 시 실패 수도 증가)"""
+    STAGE_SECONDS.labels(stage).observe(seconds)
+    if failed:
+        STAGE_ERRORS.labels(stage).inc()
+
+
+@contextmanager
+def timed(stage: str):
+    """with 블록 소요 시간을 단계 메트릭과 트레이스 span으로 기록"""
+    start = time.perf_counter()
+    failed = False
+    try:
+        with tracing.span(stage):
+            yield
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        observe_stage(stage, time.perf_counter() - start, failed)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """캐시 적중/실패 기록"""
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def record_token_usage(token_usage: Dict[str, Dict[str, Any]]) -> None:
+    """UsageMetadataCallbackHandler.usage_metadata ({모델명: {...}}) 기록"""
+    for model, usage in (token_usage or {}).items():
+        LLM_TOKENS.labels(model, "input").inc(usage.get("input_tokens", 0) or 0)
+        LLM_TOKENS.labels(model, "output").inc(usage.get("output_tokens", 0) or 0)
+
+
+def render():
+    """Prometheus 텍스트 형식 (본문, Content-Type)"""
+    return generate_latest(), CONTENT_TYPE_LATEST
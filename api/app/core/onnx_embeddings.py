@@ -0,0 +1,128 @@
+"""
+ONNX Runtime 임베딩 백엔드
+e5 모델을 ONNX로 내보내고 동적 int8 양자화하여 CPU에서 적은 메모리로 빠르게 인코딩합니다.
+HuggingFaceEmbeddings와 같은 embed_query / embed_documents 인터페이스를 제공합니다.
+
+필요 패키지: onnxruntime, optimum-onnx (최초 내보내기 시, optimum.onnxruntime 제공), transformers
+"""
+import logging
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.core.config import Config
+
+logger = logging.getLogger(__name__)
+
+FP32_MODEL_FILE = "model.onnx"
+INT8_MODEL_FILE = "model_quantized.onnx"
+
+
+def export_onnx_model(model_name: str, model_dir: str, quantize: bool = True) -> Path:
+    """
+    HuggingFace 모델을 ONNX로 내보내고 (선택) 동적 int8 양자화
+
+    Args:
+        model_name: HuggingFace 모델 이름
+        model_dir: 저장 경로
+        quantize: int8 동적 양자화 여부
+
+    Returns:
+        Path: 사용할 ONNX 모델 파일 경로
+    """
+    model_dir = Path(model_dir)
+    fp32_path = model_dir / FP32_MODEL_FILE
+    int8_path = model_dir / INT8_MODEL_FILE
+
+    if not fp32_path.exists():
+        try:
+            from optimum.onnxruntime import ORTModelForFeatureExtraction
+        except ImportError:
+            raise ImportError("ONNX 내보내기에는 optimum-onnx가 필요합니다: pip install 'optimum-onnx[onnxruntime]==0.1.0'")
+        from transformers import AutoTokenizer
+
+        logger.info(f"📦 ONNX 내보내기 중... ({model_name} → {model_dir})")
+        start_time = time.time()
+        model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+        model.save_pretrained(model_dir)
+        AutoTokenizer.from_pretrained(model_name).save_pretrained(model_dir)
+        logger.info(f"   ✅ ONNX 내보내기 완료 (소요: {time.time() - start_time:.2f}초)")
+
+    if not quantize:
+        return fp32_path
+
+    if not int8_path.exists():
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        logger.info(f"🗜️  int8 동적 양자화 중... ({int8_path})")
+        start_time = time.time()
+        quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+        logger.info(f"   ✅ 양자화 완료 (소요: {time.time() - start_time:.2f}초)")
+
+    return int8_path
+
+
+class OnnxEmbeddings(Embeddings):
+    """ONNX Runtime 기반 문장 임베딩 (mean pooling + L2 정규화, e5 방식)"""
+
+    def __init__(self, model_name: str = None, model_dir: str = None, quantize: bool = None,
+                 batch_size: int = None, max_length: int = 512, num_threads: int = None):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name or Config.EMBEDDING_MODEL
+        self.model_dir = Path(model_dir or Config.ONNX_MODEL_DIR) / self.model_name.replace("/", "__")
+        self.quantize = Config.ONNX_QUANTIZE if quantize is None else quantize
+        self.batch_size = batch_size or Config.EMBEDDING_BATCH_SIZE
+        self.max_length = max_length
+        self.normalize = Config.NORMALIZE_EMBEDDINGS
+
+        model_path = export_onnx_model(self.model_name, self.model_dir, self.quantize)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        num_threads = num_threads if num_threads is not None else Config.EMBEDDING_NUM_THREADS
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+
+        self.session = ort.InferenceSession(str(model_path), options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(str(self.model_dir))
+
+        logger.info(f"   ✅ ONNX 세션 준비 완료 ({model_path.name}, threads={num_threads or 'auto'})")
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """배치 인코딩"""
+        encoded = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_length,
+            return_tensors="np",
+        )
+        inputs = {name: value.astype(np.int64) for name, value in encoded.items() if name in self.input_names}
+        hidden = self.session.run(None, inputs)[0]
+
+        # attention mask 기준 mean pooling
+        mask = encoded["attention_mask"][..., None].astype(np.float32)
+        vectors = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        if self.normalize:
+            vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """문서 임베딩 (batch_size 단위)"""
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            vectors.append(self._encode(texts[start:start + self.batch_size]))
+        if not vectors:
+            return []
+        return np.concatenate(vectors).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """쿼리 임베딩"""
+        return self._encode([text])[0].tolist()
@@ -0,0 +1,142 @@
+"""
+파이프라인 스케줄러 모듈
+분석 단계를 의존성 그래프(DAG)로 정의하고, 서로 독립적인 단계를 동시에 실행합니다.
+
+예시:
+    pipeline = StagePipeline()
+    pipeline.add_stage("upload", upload)
+    pipeline.add_stage("search", search)
+    pipeline.add_stage("generate", generate, deps=("upload", "search"))
+    results = await pipeline.run()
+    pipeline.timings  # {"upload": {"start_ms": ..., "end_ms": ..., "duration_ms": ...}, ...}
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List
+
+from app.core import metrics, tracing
+
+logger = logging.getLogger(__name__)
+
+
+class Stage:
+    """파이프라인 단계
+
+    func는 선행 단계 결과 딕셔너리({단계명: 결과})를 받아 결과를 반환하는 코루틴 함수입니다.
+    """
+
+    def __init__(self, name: str, func: Callable[[Dict[str, Any]], Awaitable[Any]], deps: Iterable[str] = ()):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+
+
+class StagePipeline:
+    """의존성 그래프 기반 단계 스케줄러
+
+    모든 단계를 태스크로 띄우고, 각 단계는 선행 단계가 끝나는 즉시 실행됩니다.
+    한 단계가 실패하면 나머지 단계를 취소하고 예외를 전달합니다.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, Stage] = {}
+        self.timings: Dict[str, Dict[str, float]] = {}
+        self.total_ms = 0.0
+
+    def add_stage(self, name: str, func, deps: Iterable[str] = ()):
+        """단계 추가 (선행 단계가 먼저 추가되어 있어야 함)"""
+        if name in self.stages:
+            raise ValueError(f"이미 등록된 단계입니다: {name}")
+        for dep in deps:
+            if dep not in self.stages:
+                raise ValueError(f"알 수 없는 선행 단계입니다: {name} → {dep}")
+        self.stages[name] = Stage(name, func, deps)
+        return self
+
+    async def run(self, on_stage_done: Callable[[str, Any], None] = None) -> Dict[str, Any]:
+        """전체 단계 실행
+
+        Args:
+            on_stage_done: 단계가 성공적으로 끝날 때마다 (단계명, 결과)로 호출되는 콜백 (진행 상황 스트리밍용)
+
+        Returns:
+            Dict: {단계명: 결과}
+        """
+        results: Dict[str, Any] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+        self.timings = {}
+        pipeline_start = time.perf_counter()
+
+        async def run_stage(stage: Stage):
+            if stage.deps:
+                await asyncio.gather(*(tasks[dep] for dep in stage.deps))
+
+            start = time.perf_counter()
+            outcome = None  # 취소된 단계는 메트릭에 기록하지 않음
+            try:
+                with tracing.span(stage.name, kind="stage"):
+                    results[stage.name] = await stage.func(results)
+                outcome = "ok"
+            except Exception:
+                outcome = "error"
+                raise
+            finally:
+                end = time.perf_counter()
+                if outcome:
+                    metrics.observe_stage(stage.name, end - start, failed=outcome == "error")
+                self.timings[stage.name] = {
+                    "start_ms": round((start - pipeline_start) * 1000, 1),
+                    "end_ms": round((end - pipeline_start) * 1000, 1),
+                    "duration_ms": round((end - start) * 1000, 1),
+                }
+            if on_stage_done:
+                on_stage_done(stage.name, results[stage.name])
+            return results[stage.name]
+
+        # 등록 순서가 위상 정렬 순서이므로 선행 태스크가 항상 먼저 생성됨
+        for stage in self.stages.values():
+            tasks[stage.name] = asyncio.ensure_future(run_stage(stage))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        finally:
+            self.total_ms = round((time.perf_counter() - pipeline_start) * 1000, 1)
+
+        return results
+
+    def critical_path(self) -> List[str]:
+        """실행 결과 기준 임계 경로 (가장 늦게 끝난 선행 단계를 따라 역추적)"""
+        if not self.timings:
+            return []
+
+        current = max(self.timings, key=lambda name: self.timings[name]["end_ms"])
+        path = [current]
+        while self.stages[current].deps:
+            current = max(self.stages[current].deps, key=lambda name: self.timings[name]["end_ms"])
+            path.append(current)
+        return list(reversed(path))
+
+    def summary(self) -> Dict[str, Any]:
+        """로깅용 단계별 소요 시간 요약"""
+        return {
+            "stages": self.timings,
+            "total_ms": self.total_ms,
+            "sum_of_stages_ms": round(sum(t["duration_ms"] for t in self.timings.values()), 1),
+            "critical_path": self.critical_path(),
+        }
+
+    def log_summary(self):
+        """단계별 소요 시간 로그 출력"""
+        summary = self.summary()
+        stages = ", ".join(f"{name}={t['duration_ms']:.0f}ms" for name, t in self.timings.items())
+        logger.info(f"⏱️  단계별 소요: {stages}")
+        logger.info(
+            f"   전체 {summary['total_ms']:.0f}ms (단계 합 {summary['sum_of_stages_ms']:.0f}ms), "
+            f"임계 경로: {' → '.join(summary['critical_path'])}"
+        )
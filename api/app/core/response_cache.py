@@ -0,0 +1,156 @@
+"""
+분석 응답 캐시 모듈
+같은 사진을 비슷한 고민과 함께 다시 보내면 LLM 호출 없이 이전 분석 결과를 반환합니다.
+
+- 키: 이미지 perceptual hash (dHash) + user_state 임베딩
+- 적중 조건: 이미지 해시 일치 + user_state 코사인 유사도 ≥ 임계값
+- 저장소: 로컬 SQLite (TTL 만료 + 최대 개수 초과 시 오래 사용되지 않은 항목부터 삭제)
+"""
+import io
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from app.core import metrics
+from app.core.config import Config
+
+logger = logging.getLogger(__name__)
+
+HASH_SIZE = 8
+
+
+def perceptual_hash(image_data: bytes) -> str:
+    """이미지 dHash (64비트, 16진수 문자열)
+
+    같은 사진의 재전송·재인코딩에는 대부분 같은 값을 내고, 다른 사진에는 다른 값을 냅니다.
+    """
+    with Image.open(io.BytesIO(image_data)) as image:
+        image.draft("L", (HASH_SIZE * 16, HASH_SIZE * 16))  # JPEG는 디코딩 단계에서 축소
+        image = ImageOps.exif_transpose(image)
+        gray = image.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS)
+
+    pixels = np.asarray(gray, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return f"{int(''.join('1' if bit else '0' for bit in bits), 2):016x}"
+
+
+class ResponseCache:
+    """SQLite 기반 분석 응답 캐시"""
+
+    def __init__(self, path: str = None, ttl_seconds: int = None, max_entries: int = None, similarity_threshold: float = None):
+        self.path = Path(path or Config.RESPONSE_CACHE_PATH)
+        self.ttl_seconds = ttl_seconds or Config.RESPONSE_CACHE_TTL_SECONDS
+        self.max_entries = max_entries or Config.RESPONSE_CACHE_MAX_ENTRIES
+        self.similarity_threshold = similarity_threshold or Config.RESPONSE_CACHE_SIMILARITY
+        self.hits = 0
+        self.misses = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                image_hash TEXT NOT NULL,
+                user_state TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_image_hash ON responses (image_hash)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)")
+        self._conn.commit()
+
+    def lookup(self, image_hash: str, embedding: List[float]) -> Optional[Dict[str, Any]]:
+        """
+        캐시 조회
+
+        Args:
+            image_hash: 이미지 perceptual hash
+            embedding: user_state 임베딩
+
+        Returns:
+            Dict: 저장된 응답 (적중 시) 또는 None
+        """
+        now = time.time()
+        query = np.asarray(embedding, dtype=np.float32)
+        query_norm = np.linalg.norm(query) or 1.0
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, embedding, response FROM responses WHERE image_hash = ? AND created_at >= ?",
+                (image_hash, now - self.ttl_seconds),
+            ).fetchall()
+
+            best_id, best_response, best_similarity = None, None, -1.0
+            for row_id, blob, response in rows:
+                vector = np.frombuffer(blob, dtype=np.float32)
+                similarity = float(vector @ query / ((np.linalg.norm(vector) or 1.0) * query_norm))
+                if similarity > best_similarity:
+                    best_id, best_response, best_similarity = row_id, response, similarity
+
+            if best_id is None or best_similarity < self.similarity_threshold:
+                self.misses += 1
+                metrics.record_cache("response", hit=False)
+                return None
+
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE id = ?", (now, best_id))
+            self._conn.commit()
+            self.hits += 1
+            metrics.record_cache("response", hit=True)
+
+        logger.info(f"⚡ 응답 캐시 적중 (유사도: {best_similarity:.3f})")
+        return json.loads(best_response)
+
+    def store(self, image_hash: str, user_state: str, embedding: List[float], response: Dict[str, Any]) -> None:
+        """응답 저장 후 만료/초과 항목 정리"""
+        now = time.time()
+        blob = np.asarray(embedding, dtype=np.float32).tobytes()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO responses (image_hash, user_state, embedding, response, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (image_hash, user_state, blob, json.dumps(response, ensure_ascii=False), now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        """TTL 만료 항목 삭제 후, 최대 개수를 넘으면 오래 사용되지 않은 항목부터 삭제"""
+        self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM responses WHERE id IN (SELECT id FROM responses ORDER BY last_access ASC LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def stats(self) -> Dict[str, Any]:
+        """캐시 적중 통계"""
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "size": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def close(self) -> None:
+        """연결 종료"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,428 @@
+"""
+요청 트레이싱 모듈
+요청마다 span 트리를 만들고 끝나면 로컬 파일 또는 OTLP 수집기로 내보냅니다.
+
+- HTTP 요청: LoggingMiddleware가 루트 span을 만들고 X-Request-ID(상관 ID)를 응답 헤더에 넣음
+- 파이프라인 단계: StagePipeline이 단계마다 span 생성
+- 세부 작업: metrics.timed 블록 (dense_search, bm25_search, rrf_merge, log_write)
+- LangChain 실행: TracingCallbackHandler가 체인/LLM 실행을 span으로 기록 (LLM은 토큰 수 포함)
+
+현재 span은 contextvars로 전달되므로 asyncio 태스크와 run_blocking 스레드에서도 부모가 유지됩니다.
+트레이스가 시작되지 않은 곳(스크립트, 벤치마크)에서는 아무것도 기록하지 않습니다.
+
+요청 처리 쪽은 끝난 트레이스를 제한된 큐에 넣기만 하고, 전용 스레드 하나가 내보냅니다.
+(OTLP 수집기가 느려도 분석용 스레드 풀을 점유하지 않으며, 큐가 가득 차면 버림)
+
+내보내기 (Config.TRACE_EXPORTER):
+- "jsonl": Config.TRACE_DIR에 트레이스당 한 줄 (분석 로그와 같은 크기/시간 기준으로 파일 교체)
+- "otlp": OTLP/HTTP JSON으로 Config.OTLP_ENDPOINT/v1/traces에 전송
+- "none": 내보내지 않음
+"""
+import atexit
+import functools
+import json
+import logging
+import queue
+import re
+import threading
+import time
+import urllib.request
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from app.core.config import Config
+
+logger = logging.getLogger(__name__)
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("nada_trace", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("nada_span", default=None)
+
+_STOP = object()
+
+_TRACE_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+# 클라이언트가 보낸 상관 ID는 응답 헤더/로그/DB에 그대로 남으므로 짧은 토큰만 허용
+_REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9._-]{1,128}")
+
+
+class Span:
+    """트레이스 안의 작업 구간"""
+
+    __slots__ = ("span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, kind: str, parent_id: Optional[str], attributes: Dict[str, Any] = None):
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = dict(attributes or {})
+        self.error = None
+
+    def end(self, error: BaseException = None):
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+
+    @property
+    def duration_ms(self) -> float:
+        return round(((self.end_ns or time.time_ns()) - self.start_ns) / 1e6, 1)
+
+    def to_dict(self, trace_start_ns: int) -> Dict[str, Any]:
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_ms": round((self.start_ns - trace_start_ns) / 1e6, 1),
+            "duration_ms": self.duration_ms,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class Trace:
+    """요청 하나의 span 모음"""
+
+    def __init__(self, name: str, request_id: str = None, attributes: Dict[str, Any] = None):
+        # 형식에 맞지 않는 상관 ID는 버리고 새로 생성
+        if not (request_id and _REQUEST_ID_PATTERN.fullmatch(request_id)):
+            request_id = uuid.uuid4().hex
+        self.request_id = request_id
+        # 상관 ID가 OTLP trace ID 형식(32자리 16진수)이면 그대로 사용
+        self.trace_id = self.request_id if _TRACE_ID_PATTERN.match(self.request_id) else uuid.uuid4().hex
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+        self.root = self.start_span(name, "server", None, attributes)
+
+    def start_span(self, name: str, kind: str, parent: Optional[Span], attributes: Dict[str, Any] = None) -> Span:
+        span = Span(name, kind, parent.span_id if parent else None, attributes)
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    def to_dict(self) -> Dict[str, Any]:
+        start_ns = self.root.start_ns
+        with self._lock:
+            spans = [span.to_dict(start_ns) for span in self.spans]
+        return {
+            "trace_id": self.trace_id,
+            "request_id": self.request_id,
+            "name": self.root.name,
+            "timestamp": start_ns / 1e9,
+            "duration_ms": self.root.duration_ms,
+            "spans": spans,
+        }
+
+
+def start_trace(name: str, request_id: str = None, attributes: Dict[str, Any] = None) -> Optional[Trace]:
+    """현재 컨텍스트에서 새 트레이스 시작 (Config.TRACING_ENABLED가 꺼져 있으면 None)"""
+    if not Config.TRACING_ENABLED:
+        return None
+    trace = Trace(name, request_id, attributes)
+    _current_trace.set(trace)
+    _current_span.set(trace.root)
+    return trace
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def current_request_id() -> Optional[str]:
+    """현재 요청의 상관 ID (트레이스 밖이면 None)"""
+    trace = _current_trace.get()
+    return trace.request_id if trace else None
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attributes):
+    """현재 span의 자식 span으로 with 블록 기록 (트레이스 밖이면 아무것도 하지 않음)"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    current = trace.start_span(name, kind, _current_span.get(), attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.end(e)
+        raise
+    else:
+        current.end()
+    finally:
+        _current_span.reset(token)
+
+
+def traced(name: str, kind: str = "internal"):
+    """코루틴 함수 전체를 span으로 기록하는 데코레이터"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(name, kind):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """LangChain 실행(체인/LLM)을 현재 트레이스의 span으로 기록
+
+    최상위 실행은 콜백이 시작될 때의 현재 span(파이프라인 단계) 아래에 붙습니다.
+    """
+
+    run_inline = True  # 비동기 실행에서도 같은 컨텍스트에서 호출 (현재 span 유지)
+
+    def __init__(self, trace: Trace):
+        self.trace = trace
+        self._spans: Dict[UUID, Span] = {}
+
+    def _start(self, run_id: UUID, parent_run_id: Optional[UUID], name: str, kind: str, **attributes):
+        parent = self._spans.get(parent_run_id) if parent_run_id else _current_span.get()
+        self._spans[run_id] = self.trace.start_span(name, kind, parent, attributes)
+
+    def _end(self, run_id: UUID, error: BaseException = None, **attributes):
+        span_ = self._spans.pop(run_id, None)
+        if span_ is not None:
+            span_.attributes.update(attributes)
+            span_.end(error)
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name") or "chain"
+        self._start(run_id, parent_run_id, name, "chain")
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        model = (metadata or {}).get("ls_model_name") or kwargs.get("invocation_params", {}).get("model_name")
+        self._start(run_id, parent_run_id, "llm", "llm", model=model)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        model = (metadata or {}).get("ls_model_name")
+        self._start(run_id, parent_run_id, "llm", "llm", model=model)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        attributes = {}
+        try:
+            usage = response.generations[0][0].message.usage_metadata or {}
+            attributes = {
+                "input_tokens": usage.get("input_tokens"),
+                "output_tokens": usage.get("output_tokens"),
+            }
+        except (AttributeError, IndexError):
+            pass
+        self._end(run_id, **attributes)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    def on_retriever_start(self, serialized, query, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, kwargs.get("name") or "retriever", "retriever")
+
+    def on_retriever_end(self, documents, *, run_id, **kwargs):
+        self._end(run_id, documents=len(documents))
+
+    def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+
+def callback_handlers() -> list:
+    """현재 트레이스용 LangChain 콜백 (트레이스 밖이면 빈 리스트)"""
+    trace = _current_trace.get()
+    return [TracingCallbackHandler(trace)] if trace else []
+
+
+class JsonlTraceExporter:
+    """트레이스당 한 줄 JSON으로 파일에 추가 (traces_{시각}_{pid}.jsonl, LOG_MAX_BYTES/LOG_ROTATE_SECONDS 기준 교체)"""
+
+    def __init__(self, trace_dir: str = None):
+        # chain_logger가 tracing을 import하므로 순환 import를 피해 여기서 import
+        from app.core.chain_logger import JsonlLogWriter
+
+        self.trace_dir = Path(trace_dir or Config.TRACE_DIR)
+        self.trace_dir.mkdir(parents=True, exist_ok=True)
+        self._writer = JsonlLogWriter(self.trace_dir, prefix="traces")
+        self._lock = threading.Lock()
+
+    def export(self, trace: Trace):
+        with self._lock:
+            self._writer.write(trace.to_dict())
+            self._writer.flush()
+
+
+class OtlpTraceExporter:
+    """OTLP/HTTP JSON 형식으로 수집기에 전송 (OpenTelemetry Collector, Jaeger, Tempo 등)"""
+
+    def __init__(self, endpoint: str = None, service_name: str = "nada-api"):
+        self.url = (endpoint or Config.OTLP_ENDPOINT).rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+
+    @staticmethod
+    def _attributes(values: Dict[str, Any]) -> List[Dict[str, Any]]:
+        attributes = []
+        for key, value in values.items():
+            if value is None:
+                continue
+            if isinstance(value, bool):
+                attributes.append({"key": key, "value": {"boolValue": value}})
+            elif isinstance(value, int):
+                attributes.append({"key": key, "value": {"intValue": str(value)}})
+            elif isinstance(value, float):
+                attributes.append({"key": key, "value": {"doubleValue": value}})
+            else:
+                attributes.append({"key": key, "value": {"stringValue": str(value)}})
+        return attributes
+
+    def payload(self, trace: Trace) -> Dict[str, Any]:
+        """OTLP ExportTraceServiceRequest (JSON)"""
+        spans = []
+        for span_ in list(trace.spans):
+            item = {
+                "traceId": trace.trace_id,
+                "spanId": span_.span_id,
+                "name": span_.name,
+                "kind": 2 if span_.kind == "server" else 1,  # SPAN_KIND_SERVER / SPAN_KIND_INTERNAL
+                "startTimeUnixNano": str(span_.start_ns),
+                "endTimeUnixNano": str(span_.end_ns or span_.start_ns),
+                "attributes": self._attributes({"nada.kind": span_.kind, **span_.attributes}),
+                "status": {"code": 2, "message": span_.error} if span_.error else {"code": 1},
+            }
+            if span_.parent_id:
+                item["parentSpanId"] = span_.parent_id
+            spans.append(item)
+
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": self._attributes({"service.name": self.service_name})},
+                "scopeSpans": [{"scope": {"name": "app.core.tracing"}, "spans": spans}],
+            }]
+        }
+
+    def export(self, trace: Trace):
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(self.payload(trace)).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=5) as response:
+            response.read()
+
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def get_exporter():
+    """설정된 exporter (처음 호출 시 생성, "none"이면 None)"""
+    global _exporter
+    if _exporter is None and Config.TRACE_EXPORTER != "none":
+        with _exporter_lock:
+            if _exporter is None:
+                _exporter = OtlpTraceExporter() if Config.TRACE_EXPORTER == "otlp" else JsonlTraceExporter()
+    return _exporter
+
+
+def export_trace(trace: Trace):
+    """트레이스 내보내기 (실패해도 요청에는 영향 없음)"""
+    exporter = get_exporter()
+    if exporter is None:
+        return
+    try:
+        exporter.export(trace)
+    except Exception as e:
+        logger.warning(f"⚠️  트레이스 내보내기 실패: {e}")
+
+
+class TraceExportQueue:
+    """트레이스 내보내기 전용 백그라운드 writer
+
+    - 큐가 가득 차면 바로 버림 (응답 경로를 막지 않음)
+    - close() 이후 들어온 트레이스는 버림
+    - close() 또는 프로세스 종료 시 큐에 남은 트레이스를 모두 내보내고 종료
+    """
+
+    def __init__(self, queue_size: int = None):
+        self.exported = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size or Config.TRACE_QUEUE_SIZE)
+        self._drop_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def submit(self, trace: Trace) -> bool:
+        """내보낼 트레이스를 큐에 추가 (닫혔거나 가득 차면 버림)"""
+        if self._closed:
+            self._drop("종료 후 들어온")
+            return False
+        try:
+            self._queue.put_nowait(trace)
+            return True
+        except queue.Full:
+            self._drop("큐가 가득 차서")
+            return False
+
+    def _drop(self, reason: str):
+        with self._drop_lock:
+            self.dropped += 1
+            dropped = self.dropped
+        if dropped == 1 or dropped % 100 == 0:
+            logger.warning(f"⚠️  {reason} 트레이스를 버렸습니다 (누적 {dropped}개)")
+
+    def _run(self):
+        """(내보내기 스레드) 큐에서 트레이스를 꺼내 exporter로 전송"""
+        while True:
+            trace = self._queue.get()
+            if trace is _STOP:
+                break
+            export_trace(trace)
+            self.exported += 1
+
+    def close(self, timeout: float = 10.0):
+        """남은 트레이스를 모두 내보내고 스레드 종료"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning(f"⚠️  트레이스 내보내기 종료 대기 시간 초과 (남은 트레이스 {self._queue.qsize()}개)")
+
+
+_export_queue: Optional[TraceExportQueue] = None
+_export_queue_lock = threading.Lock()
+
+
+def _get_export_queue() -> TraceExportQueue:
+    global _export_queue
+    if _export_queue is None:
+        with _export_queue_lock:
+            if _export_queue is None:
+                _export_queue = TraceExportQueue()
+    return _export_queue
+
+
+def submit_trace(trace: Trace) -> bool:
+    """끝난 트레이스를 내보내기 큐에 넣음 (이벤트 루프/스레드 풀을 막지 않음)"""
+    return _get_export_queue().submit(trace)
+
+
+def shutdown_tracing():
+    """남은 트레이스를 내보내고 내보내기 스레드 종료 (앱 종료 시, 이후 들어오는 트레이스는 버림)"""
+    _get_export_queue().close()
+
+
+atexit.register(shutdown_tracing)
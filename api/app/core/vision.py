@@ -4,13 +4,15 @@ LLM에 전달할 멀티모달 메시지 구성 함수들
 """
 import json
 import logging
-import re
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Type, TypeVar
+from pydantic import BaseModel, ValidationError
 from langchain_core.messages import SystemMessage, HumanMessage
 from langchain_core.language_models import BaseLanguageModel
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T", bound=BaseModel)
+
 
 def format_docs(docs: List) -> str:
     """검색된 문서를 텍스트로 포맷팅"""
@@ -77,36 +79,43 @@ def create_multimodal_message(inputs: Dict[str, Any]) -> List:
     ]
 
 
-def extract_json(content: str) -> Dict[str, Any]:
+class LLMOutputError(ValueError):
+    """LLM 출력이 스키마에 맞지 않음"""
+
+
+_decoder = json.JSONDecoder()
+
+
+def parse_llm_output(content: str, schema: Type[T]) -> T:
     """
-    응답에서 JSON을 추출합니다.
+    LLM 응답을 스키마로 파싱합니다.
+
+    구조화 출력을 사용하면 응답 전체가 JSON이므로 한 번의 검증으로 끝납니다.
+    실패하면 첫 '{'부터 JSON 객체 하나만 디코딩해 다시 검증합니다 (코드 블록이나 앞뒤 설명이 붙은 경우).
 
     Args:
         content: LLM 응답 텍스트
+        schema: 출력 스키마 (Pydantic 모델)
 
     Returns:
-        Dict: 추출된 JSON 객체
+        스키마 인스턴스
+
+    Raises:
+        LLMOutputError: JSON이 없거나 스키마에 맞지 않는 경우
     """
     if not content:
-        raise ValueError("빈 응답입니다")
+        raise LLMOutputError("빈 응답입니다")
 
     try:
-        return json.loads(content.strip())
-    except json.JSONDecodeError:
+        return schema.model_validate_json(content)
+    except ValidationError:
         pass
 
-    brace_pattern = r'\{.*\}'
-    matches = re.findall(brace_pattern, content, re.DOTALL)
-
-    for match in matches:
-        try:
-            return json.loads(match.strip())
-        except json.JSONDecodeError:
-            continue
-
-    logger.warning(f"⚠️  JSON 추출 실패. 원본 응답 반환")
-    return {
-        "raw_response": content,
-        "error": "JSON 추출 실패",
-        "parsing_attempted": True
-    }
+    start = content.find("{")
+    if start < 0:
+        raise LLMOutputError(f"응답에 JSON이 없습니다: {content[:100]}")
+    try:
+        data, _ = _decoder.raw_decode(content, start)
+        return schema.model_validate(data)
+    except (json.JSONDecodeError, ValidationError) as e:
+        raise LLMOutputError(f"{schema.__name__} 형식이 아닙니다: {e}") from e
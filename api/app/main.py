@@ -2,22 +2,52 @@
 FastAPI 앱
 """
 import os
+import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from app.core import metrics
+from app.core.tracing import shutdown_tracing
+from app.core.config import Config
 from app.routes import analyze
+from app.services.analysis_service import get_analysis_service
 from app.utils.logging import LoggingMiddleware, setup_logging
+from app.utils.concurrency import run_blocking, shutdown_executor
+from app.core.chain_logger import shutdown_loggers
 
 # PROJECT_ROOT 설정
 PROJECT_ROOT = Path(__file__).parent.parent
 os.environ['PROJECT_ROOT'] = str(PROJECT_ROOT)
 
 setup_logging()
+logger = logging.getLogger("app")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    시작: 분석 서비스(임베딩 모델, 벡터 DB, BM25 인덱스)를 미리 로드해 첫 요청이 로드 비용을 내지 않도록 함
+    종료: 블로킹 작업 스레드 풀 정리 후 남은 트레이스와 분석 로그 저장
+    """
+    if Config.WARMUP_ON_STARTUP:
+        try:
+            await run_blocking(get_analysis_service)
+            logger.info("✅ 분석 서비스 로드 완료")
+        except Exception:
+            # 서버는 띄우고 첫 요청에서 다시 로드 시도 (헬스 체크는 계속 응답)
+            logger.exception("❌ 분석 서비스 로드 실패, 첫 요청에서 다시 시도합니다")
+    yield
+    shutdown_executor()
+    shutdown_tracing()
+    shutdown_loggers()
+
 
 app = FastAPI(
     title="NADA AI RAG API",
     description="이미지 기반 뷰티 코칭 API",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # CORS 설정
@@ -36,6 +66,13 @@ app.add_middleware(LoggingMiddleware)
 app.include_router(analyze.router)
 
 
+@app.get("/metrics")
+def metrics_endpoint():
+    """Prometheus 메트릭 (텍스트 형식)"""
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+
 @app.get("/health")
 def health_check():
     """헬스 체크"""
@@ -1,16 +1,28 @@
 """
 분석 라우터
 """
+import json
 import logging
+from typing import List
 from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
+from app.core.config import Config
 from app.schemas.request import AnalysisRequest
-from app.schemas.response import AnalysisResponse
+from app.schemas.response import AnalysisResponse, BatchAnalysisItem
 from app.services.analysis_service import get_analysis_service
+from app.utils.concurrency import run_blocking
+from app.utils.image import ImageTooLargeError, InvalidImageError, UnsupportedImageError, check_image, read_upload
 
 logger = logging.getLogger("app")
 router = APIRouter(prefix="/api", tags=["analysis"])
 
 
+def _image_error(e: InvalidImageError, prefix: str = "") -> HTTPException:
+    """디코딩할 수 없는 이미지 → 415 (이미지가 아닌 파일) / 400 (손상, 해상도 과다)"""
+    status_code = 415 if isinstance(e, UnsupportedImageError) else 400
+    return HTTPException(status_code=status_code, detail=f"{prefix}{e}")
+
+
 @router.post("/analyze", response_model=AnalysisResponse)
 async def analyze(
     image_file: UploadFile = File(...),
@@ -27,9 +39,21 @@ async def analyze(
         AnalysisResponse: 분석 결과
     """
     try:
-        request = AnalysisRequest(image_file=image_file, user_state=user_state)
-        service = get_analysis_service()
-        response = service.analyze(request)
+        # 크기 제한을 두고 청크 단위로 읽기
+        try:
+            image_data = await read_upload(image_file, Config.MAX_UPLOAD_BYTES)
+        except ImageTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
+
+        # 헤더만 읽어 이미지가 아닌 파일은 파이프라인 전에 거절
+        try:
+            check_image(image_data)
+            request = AnalysisRequest(image_data=image_data, user_state=user_state)
+            # 첫 호출 시 모델/벡터 DB 로드가 이벤트 루프를 막지 않도록 스레드 풀에서 생성
+            service = await run_blocking(get_analysis_service)
+            response = await service.aanalyze(request)
+        except InvalidImageError as e:
+            raise _image_error(e)
 
         if response.status == "error":
             raise HTTPException(status_code=500, detail=response.error)
@@ -41,3 +65,130 @@ async def analyze(
     except Exception as e:
         logger.exception(f"❌ 분석 중 에러 발생: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/analyze/batch")
+async def analyze_batch(
+    image_files: List[UploadFile] = File(...),
+    user_states: List[str] = Form(...)
+):
+    """
+    여러 이미지 + 사용자 상태를 한 번에 분석
+
+    image_files[i]와 user_states[i]가 한 쌍입니다.
+    결과는 NDJSON(application/x-ndjson)으로 항목이 끝나는 순서대로 한 줄씩 스트리밍합니다.
+    각 줄은 AnalysisResponse에 요청 순서(index)를 더한 형식입니다.
+    업로드 이미지는 분석 전에 모두 메모리에 올라가므로 전체 크기를 Config.BATCH_MAX_BYTES로 제한합니다.
+    디코딩할 수 없는 이미지 항목은 분석하지 않고 status="error" 항목으로 먼저 반환합니다.
+
+    Args:
+        image_files: 분석할 이미지 파일 리스트
+        user_states: 사용자 상태 리스트
+
+    Returns:
+        StreamingResponse: 항목별 BatchAnalysisItem (NDJSON)
+    """
+    if len(image_files) != len(user_states):
+        raise HTTPException(
+            status_code=400,
+            detail=f"image_files({len(image_files)})와 user_states({len(user_states)}) 개수가 다릅니다",
+        )
+    if len(image_files) > Config.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"배치 항목은 최대 {Config.BATCH_MAX_ITEMS}개입니다")
+
+    requests = []
+    indexes = []  # requests[j]의 원래 항목 인덱스
+    invalid = []  # 디코딩할 수 없는 이미지 항목 (분석 없이 바로 에러 응답)
+    total_bytes = 0
+    for i, (image_file, user_state) in enumerate(zip(image_files, user_states)):
+        # 항목별 제한과 남은 배치 전체 한도 중 작은 쪽까지만 읽음
+        remaining = Config.BATCH_MAX_BYTES - total_bytes
+        try:
+            image_data = await read_upload(image_file, min(Config.MAX_UPLOAD_BYTES, remaining))
+        except ImageTooLargeError as e:
+            if remaining < Config.MAX_UPLOAD_BYTES:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"배치 이미지 전체 크기가 제한({Config.BATCH_MAX_BYTES // (1024 * 1024)}MB)을 초과했습니다",
+                )
+            raise HTTPException(status_code=413, detail=f"[{i}] {e}")
+        total_bytes += len(image_data)
+        try:
+            check_image(image_data)
+        except InvalidImageError as e:
+            invalid.append(BatchAnalysisItem(index=i, status="error", analysis={}, error=str(e)))
+            continue
+        requests.append(AnalysisRequest(image_data=image_data, user_state=user_state))
+        indexes.append(i)
+
+    try:
+        service = await run_blocking(get_analysis_service)
+    except Exception as e:
+        logger.exception(f"❌ 분석 서비스 초기화 실패: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    logger.info(f"📦 배치 분석 시작 ({len(requests)}개, 동시 {Config.BATCH_CONCURRENCY}개)")
+
+    async def stream():
+        for item in invalid:
+            yield item.model_dump_json(exclude_none=True) + "\n"
+        if not requests:
+            return
+        async for index, response in service.aanalyze_batch(requests):
+            item = BatchAnalysisItem(index=indexes[index], **response.model_dump())
+            yield item.model_dump_json(exclude_none=True) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@router.post("/analyze/stream")
+async def analyze_stream(
+    image_file: UploadFile = File(...),
+    user_state: str = Form(...)
+):
+    """
+    이미지 + 사용자 상태로 분석 수행 (Server-Sent Events 스트리밍)
+
+    최종 분석이 끝나기 전에 진행 상황을 바로 전달합니다.
+    POST 요청이므로 브라우저에서는 EventSource 대신 fetch 응답 스트림으로 읽습니다.
+
+    이벤트:
+        stage: 단계 완료 ({"stage", "duration_ms"} + generate_query는 search_query/image_analysis, search는 references)
+        token: 최종 분석 LLM 출력 토큰 ({"text"})
+        result: 최종 AnalysisResponse (성공)
+        error: 최종 AnalysisResponse (실패, status="error")
+
+    Args:
+        image_file: 분석할 이미지 파일
+        user_state: 사용자 상태
+
+    Returns:
+        StreamingResponse: text/event-stream
+    """
+    try:
+        image_data = await read_upload(image_file, Config.MAX_UPLOAD_BYTES)
+    except ImageTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    try:
+        check_image(image_data)
+    except InvalidImageError as e:
+        raise _image_error(e)
+
+    request = AnalysisRequest(image_data=image_data, user_state=user_state)
+    try:
+        service = await run_blocking(get_analysis_service)
+    except Exception as e:
+        logger.exception(f"❌ 분석 서비스 초기화 실패: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def stream():
+        async for event, data in service.aanalyze_stream(request):
+            if event == "result":
+                if data.status == "error":
+                    event = "error"
+                data = data.model_dump(exclude_none=True)
+            yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    # 프록시(nginx) 버퍼링을 끄고 이벤트를 바로 전달
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(stream(), media_type="text/event-stream", headers=headers)
@@ -0,0 +1,40 @@
+"""
+LLM 출력 스키마
+구조화 출력(json_schema strict)에 그대로 사용하므로 모든 필드는 필수이고 정의되지 않은 필드는 허용하지 않습니다.
+"""
+from typing import List
+from pydantic import BaseModel, ConfigDict
+
+
+class ImageAnalysis(BaseModel):
+    """쿼리 생성 단계의 이미지 분석"""
+    model_config = ConfigDict(extra="forbid")
+
+    hair: str
+    skin: str
+    contour: str
+
+
+class QueryGeneration(BaseModel):
+    """쿼리 생성 LLM 출력"""
+    model_config = ConfigDict(extra="forbid")
+
+    image_analysis: ImageAnalysis
+    search_query: str
+
+
+class CategoryAnalysis(BaseModel):
+    """카테고리별 분석"""
+    model_config = ConfigDict(extra="forbid")
+
+    status: str
+    improvement_tips: List[str]
+
+
+class FinalAnalysis(BaseModel):
+    """최종 분석 LLM 출력 (analysis_ko.prt의 Output JSON 형식)"""
+    model_config = ConfigDict(extra="forbid")
+
+    Hair: CategoryAnalysis
+    Skin: CategoryAnalysis
+    Contour: CategoryAnalysis
@@ -13,3 +13,8 @@ class AnalysisResponse(BaseModel):
     analysis: Dict[str, Any]
     references: Optional[List[str]] = None
     error: Optional[str] = None
+
+
+class BatchAnalysisItem(AnalysisResponse):
+    """배치 분석 응답 항목 (NDJSON 한 줄)"""
+    index: int
@@ -2,24 +2,37 @@
 분석 서비스
 """
 import os
+import asyncio
 import logging
 import hashlib
+import threading
 from pathlib import Path
+from langchain_core.callbacks import UsageMetadataCallbackHandler
+from app.core import metrics, tracing
 from app.core.config import Config
+from app.core.embedding_cache import CachedEmbeddings
 from app.core.indexer import EmbeddingManager, VectorStoreManager
 from app.core.llm import get_llm
-from app.core.rag import build_analysis_chain
-from app.core.vision import extract_json
+from app.core.pipeline import StagePipeline
+from app.core.rag import build_analysis_chain, agenerate_optimized_query
+from app.core.vision import parse_llm_output
 from app.core.chain_logger import ChainLogger
+from app.core.response_cache import ResponseCache, perceptual_hash
+from app.schemas.analysis import FinalAnalysis
 from app.schemas.request import AnalysisRequest
 from app.schemas.response import AnalysisResponse
-from app.utils import cloudinary
+from app.utils import cloudinary, image
+from app.utils.concurrency import run_blocking
 
 logger = logging.getLogger(__name__)
 
 
-def _merge_with_rrf(dense_docs, sparse_docs, k=60):
-    """RRF (Reciprocal Rank Fusion)로 두 리트리버 결과 병합
+def _merge_with_rrf(*ranked_lists, k=60):
+    """RRF (Reciprocal Rank Fusion)로 여러 리트리버 결과 병합
+
+    Args:
+        *ranked_lists: 순위순 Document 리스트들 (Dense, BM25, ...)
+        k: RRF 상수
 
     Returns:
         tuple: (merged_docs, rrf_scores_dict)
@@ -37,8 +50,8 @@ def _merge_with_rrf(dense_docs, sparse_docs, k=60):
                 scores[content_hash] = {"doc": doc, "score": 0}
             scores[content_hash]["score"] += score
 
-    add_results(dense_docs)
-    add_results(sparse_docs)
+    for docs in ranked_lists:
+        add_results(docs)
 
     # 점수 순으로 정렬
     merged = sorted(scores.values(), key=lambda x: x["score"], reverse=True)
@@ -56,24 +69,58 @@ def _merge_with_rrf(dense_docs, sparse_docs, k=60):
 class AnalysisService:
     """분석 서비스"""
 
-    def __init__(self):
-        """서비스 초기화"""
-        self.embedding_manager = EmbeddingManager()
-        self.embeddings = self.embedding_manager.get_embeddings()
+    def __init__(
+        self,
+        embeddings=None,
+        db_manager=None,
+        llm=None,
+        bm25_index=None,
+        chain_logger=None,
+        response_cache=None,
+        uploader=None,
+    ):
+        """서비스 초기화
+
+        구성 요소를 인자로 넘기면 설정값으로 만드는 대신 그대로 사용합니다
+        (벤치마크에서 가짜 LLM/업로더, 합성 코퍼스 저장소를 주입할 때 사용).
 
-        self.db_manager = VectorStoreManager(self.embeddings)
-        try:
-            self.db_manager.load_vectorstore()
-        except Exception as e:
-            raise RuntimeError(f"벡터 DB를 로드할 수 없습니다: {e}")
+        Args:
+            embeddings: 쿼리 임베딩 (기본: EmbeddingManager)
+            db_manager: 벡터 DB가 열린 VectorStoreManager (기본: 설정 경로에서 로드)
+            llm: 채팅 모델 (기본: get_llm())
+            bm25_index: BM25Index (기본: 벡터 DB와 함께 로드, db_manager를 넘기면 넘긴 값만 사용)
+            chain_logger: ChainLogger (기본: Config.LOGS_DIR)
+            response_cache: ResponseCache (기본: Config.RESPONSE_CACHE_ENABLED이면 생성)
+            uploader: 이미지 바이트 → URL 함수 (기본: Cloudinary 인증 업로드)
+        """
+        if embeddings is None:
+            embeddings = EmbeddingManager().get_embeddings()
+        self.embeddings = embeddings
+
+        if db_manager is None:
+            db_manager = VectorStoreManager(self.embeddings)
+            try:
+                db_manager.load_vectorstore()
+            except Exception as e:
+                raise RuntimeError(f"벡터 DB를 로드할 수 없습니다: {e}")
+
+            # BM25 인덱스 로드 (인덱서가 미리 만든 인덱스를 memory-map)
+            if bm25_index is None:
+                try:
+                    bm25_index = db_manager.load_bm25_index()
+                except Exception as e:
+                    logger.warning(f"⚠️  BM25 인덱스 로드 실패: {e}, Dense만 사용 (python scripts/embed_papers.py 로 생성)")
+        self.db_manager = db_manager
+        self.bm25_index = bm25_index
 
-        self.llm = get_llm()
+        self.llm = llm or get_llm()
         self.analysis_prompt = self._load_prompt("analysis_ko.prt")
         self.make_query_prompt = self._load_prompt("make_query_ko.prt")
-        self.logger = ChainLogger()
-
-        # BM25용 문서 로드 (초기화 시 1회)
-        self.bm25_retriever = None
+        self.logger = chain_logger or ChainLogger()
+        if response_cache is None and Config.RESPONSE_CACHE_ENABLED:
+            response_cache = ResponseCache()
+        self.response_cache = response_cache
+        self.uploader = uploader or self._upload_image
 
     def _load_prompt(self, name) -> str:
         """시스템 프롬프트 로드"""
@@ -83,7 +130,7 @@ class AnalysisService:
 
     def analyze(self, request: AnalysisRequest) -> AnalysisResponse:
         """
-        분석 실행
+        분석 실행 (동기 래퍼, 이벤트 루프 밖에서 사용)
 
         Args:
             request: AnalysisRequest
@@ -91,107 +138,377 @@ class AnalysisService:
         Returns:
             AnalysisResponse
         """
+        return asyncio.run(self.aanalyze(request))
+
+    async def aanalyze(self, request: AnalysisRequest) -> AnalysisResponse:
+        """
+        분석 실행 (비동기)
+
+        분석 단계를 의존성 그래프로 구성해 독립적인 단계를 동시에 실행합니다.
+
+            prepare_image ──► upload ──► generate_query ──► search ──► generate
+            speculative_search ─────────────────────────────┘           ▲
+            upload ─────────────────────────────────────────────────────┘
+
+        - prepare_image: EXIF 제거, 모델 입력 해상도로 축소 후 JPEG 재인코딩
+        - upload: Cloudinary 업로드 또는 data URL 변환 (Config.IMAGE_TRANSPORT)
+        - speculative_search: 쿼리 생성 LLM 호출과 겹쳐서 원본 user_state로 미리 검색 (실패하면 최적화된 쿼리 결과만 사용)
+        - search: 최적화된 쿼리로 검색한 결과를 미리 검색한 결과와 RRF로 병합
+
+        LLM 호출은 ainvoke로 이벤트 루프에서 대기하고,
+        업로드/임베딩/BM25/로그 저장 같은 블로킹 작업은 공유 스레드 풀에서 실행합니다.
+
+        Args:
+            request: AnalysisRequest
+
+        Returns:
+            AnalysisResponse (실패 시 status="error")
+
+        Raises:
+            InvalidImageError: 이미지로 디코딩할 수 없음 (클라이언트 입력 오류)
+        """
+        return await self._run_analysis(request)
+
+    async def aanalyze_stream(self, request: AnalysisRequest):
+        """
+        분석 실행 (진행 이벤트 스트리밍)
+
+        최종 응답을 기다리지 않고 진행 상황을 이벤트로 바로 전달합니다.
+        - ("stage", {...}): 단계 완료 (단계명, 소요 시간, 생성된 검색 쿼리/검색된 참고문헌 등)
+        - ("token", {"text": ...}): 최종 분석 LLM 출력 토큰
+        - ("result", AnalysisResponse): 최종 응답 (항상 마지막 이벤트, 실패 시 status="error")
+
+        Args:
+            request: AnalysisRequest
+
+        Yields:
+            tuple: (이벤트 이름, 데이터)
+        """
+        queue = asyncio.Queue()
+        task = asyncio.create_task(
+            self._run_analysis(request, emit=lambda event, data: queue.put_nowait((event, data)))
+        )
+        task.add_done_callback(lambda _: queue.put_nowait(None))
+        try:
+            while (item := await queue.get()) is not None:
+                yield item
+            try:
+                response = task.result()
+            except image.InvalidImageError as e:
+                response = AnalysisResponse(status="error", analysis={}, error=str(e))
+            yield "result", response
+        finally:
+            # 클라이언트 연결이 끊겨 중단되면 분석 취소
+            task.cancel()
+
+    @tracing.traced("analysis")
+    async def _run_analysis(self, request: AnalysisRequest, emit=None) -> AnalysisResponse:
+        """
+        분석 파이프라인 실행
+
+        Args:
+            request: AnalysisRequest
+            emit: 진행 이벤트 콜백 (event, data), None이면 이벤트 없이 최종 응답만 생성
+        """
+        metrics.ANALYSES_IN_FLIGHT.inc()
+        usage = None
         try:
-            # 1. 이미지 파일을 Cloudinary에 인증 업로드
-            logger.info("📤 이미지를 Cloudinary에 업로드 중...")
-            image_data = request.image_file.file.read()
-            upload_result = cloudinary.upload_authenticated_image(
-                image_data=image_data,
-                expire_minutes=Config.CLOUDINARY_EXPIRE_MINUTES
+            # 같은 이미지 + 비슷한 user_state의 이전 응답이 있으면 바로 반환
+            cache_key = None
+            if self.response_cache:
+                cached, cache_key = await run_blocking(self._lookup_cached_response, request)
+                if cached:
+                    metrics.ANALYSES.labels("cached").inc()
+                    return cached
+
+            user_state = request.user_state
+            # 두 LLM 호출의 토큰 사용량 집계 (로그 저장용) + 체인/LLM 실행 트레이싱
+            usage = UsageMetadataCallbackHandler()
+            llm_config = {"callbacks": [usage, *tracing.callback_handlers()]}
+            filled_make_query_prompt = self.make_query_prompt.format(user_query=user_state)
+
+            async def prepare_image(_):
+                # EXIF 제거 + 모델 입력 해상도로 축소 + 재인코딩
+                return await run_blocking(image.preprocess_image, request.image_data, Config.IMAGE_DETAIL)
+
+            async def upload(results):
+                # data_url 모드: 업로드 없이 base64 인라인, 기본: Cloudinary 인증 업로드
+                if Config.IMAGE_TRANSPORT == "data_url":
+                    return image.to_data_url(results["prepare_image"])
+                return await run_blocking(self.uploader, results["prepare_image"])
+
+            async def speculative_search(_):
+                # 원본 사용자 입력으로 미리 검색 (Dense + BM25), 실패해도 분석은 계속
+                try:
+                    return await run_blocking(self._search_candidates, user_state)
+                except Exception as e:
+                    logger.warning(f"⚠️  미리 검색 실패: {e}, 최적화된 쿼리 검색 결과만 사용")
+                    return None
+
+            async def generate_query(results):
+                # 이미지 분석 + 최적화된 검색 쿼리 생성
+                return await agenerate_optimized_query(
+                    self.llm, filled_make_query_prompt, results["upload"], Config.IMAGE_DETAIL, config=llm_config
+                )
+
+            async def search(results):
+                # 최적화된 쿼리로 검색 후 미리 검색한 결과와 RRF 병합
+                candidates = []
+                query_result = results["generate_query"]
+                if query_result:
+                    candidates.append(await run_blocking(self._search_candidates, query_result["search_query"]))
+                else:
+                    logger.info(f"   📌 원본 사용자 입력 검색 결과 사용")
+                speculative = results["speculative_search"]
+                if speculative is not None:
+                    candidates.append(speculative)
+                elif not candidates:
+                    # 쿼리 생성과 미리 검색이 모두 실패하면 원본 사용자 입력으로 다시 검색
+                    candidates.append(await run_blocking(self._search_candidates, user_state))
+                return self._fuse_candidates(candidates)
+
+            async def generate(results):
+                # 검색된 문서로 최종 분석
+                search_results, _ = results["search"]
+                chain = build_analysis_chain(
+                    llm=self.llm,
+                    analysis_prompt=self.analysis_prompt,
+                    user_state=user_state,
+                    image_url=results["upload"],
+                )
+                if not emit:
+                    return await chain.ainvoke(search_results, config=llm_config)
+
+                # 스트리밍: 토큰이 도착하는 대로 전달하고 전체 응답은 모아서 반환
+                parts = []
+                async for token in chain.astream(search_results, config=llm_config):
+                    parts.append(token)
+                    emit("token", {"text": token})
+                return "".join(parts)
+
+            pipeline = (
+                StagePipeline()
+                .add_stage("prepare_image", prepare_image)
+                .add_stage("upload", upload, deps=("prepare_image",))
+                .add_stage("speculative_search", speculative_search)
+                .add_stage("generate_query", generate_query, deps=("upload",))
+                .add_stage("search", search, deps=("generate_query", "speculative_search"))
+                .add_stage("generate", generate, deps=("upload", "search"))
+            )
+            on_stage_done = None
+            if emit:
+                on_stage_done = lambda name, result: emit("stage", self._stage_event(name, result, pipeline.timings[name]))
+            results = await pipeline.run(on_stage_done=on_stage_done)
+            pipeline.log_summary()
+
+            # 응답 생성 및 로그 저장
+            response = await run_blocking(
+                self._build_response, request, results, pipeline.summary(), cache_key, usage.usage_metadata
             )
-            image_url = upload_result["secure_url"]
-            logger.info(f"✅ 이미지 업로드 완료: {image_url}")
+            metrics.ANALYSES.labels("success").inc()
+            return response
 
-            # 2. 하이브리드 검색 (Dense + BM25 + RRF)
-            logger.info("🔍 하이브리드 검색 시작...")
+        except image.InvalidImageError:
+            # 클라이언트 입력 오류는 호출한 쪽(라우터)에서 4xx로 응답
+            metrics.ANALYSES.labels("error").inc()
+            raise
+        except Exception as e:
+            logger.exception(f"❌ 분석 중 에러 발생")
+            metrics.ANALYSES.labels("error").inc()
+            return AnalysisResponse(
+                status="error",
+                analysis={},
+                error=str(e),
+            )
+        finally:
+            metrics.ANALYSES_IN_FLIGHT.dec()
+            if usage:
+                metrics.record_token_usage(usage.usage_metadata)
 
-            # Dense 검색
+    async def aanalyze_batch(self, requests, concurrency: int = None):
+        """
+        여러 요청을 동시에 분석하고 끝나는 순서대로 결과 반환
+
+        - 모든 user_state를 한 번의 배치 인코딩으로 임베딩해 쿼리 임베딩 캐시에 미리 저장
+          (이후 응답 캐시 조회/원본 user_state 검색은 모델 연산 없이 캐시 사용)
+        - 동시에 분석하는 요청 수를 concurrency로 제한 (LLM 동시 호출 수 제한)
+
+        Args:
+            requests: AnalysisRequest 리스트
+            concurrency: 동시 분석 수 (기본: Config.BATCH_CONCURRENCY)
+
+        Yields:
+            tuple: (요청 인덱스, AnalysisResponse)
+        """
+        semaphore = asyncio.Semaphore(concurrency or Config.BATCH_CONCURRENCY)
+
+        try:
+            await run_blocking(self._prime_query_embeddings, [request.user_state for request in requests])
+        except Exception as e:
+            logger.warning(f"⚠️  배치 쿼리 임베딩 실패: {e}, 항목별로 임베딩")
+
+        async def analyze_one(index, request):
+            async with semaphore:
+                try:
+                    return index, await self.aanalyze(request)
+                except image.InvalidImageError as e:
+                    return index, AnalysisResponse(status="error", analysis={}, error=str(e))
+
+        tasks = [asyncio.create_task(analyze_one(i, request)) for i, request in enumerate(requests)]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            # 클라이언트 연결이 끊겨 중단되면 남은 분석 취소
+            for task in tasks:
+                task.cancel()
+
+    def _prime_query_embeddings(self, texts):
+        """user_state들을 한 번에 임베딩해 쿼리 임베딩 캐시에 저장"""
+        if isinstance(self.embeddings, CachedEmbeddings):
+            self.embeddings.embed_queries(texts)
+            logger.info(f"🔢 배치 쿼리 임베딩 완료 ({len(texts)}개)")
+
+    @staticmethod
+    def _stage_event(name, result, timing):
+        """스트리밍용 단계 완료 이벤트 (클라이언트에 보여줄 만한 중간 결과만 포함)"""
+        event = {"stage": name, "duration_ms": timing["duration_ms"]}
+        if name == "generate_query" and result:
+            event["search_query"] = result["search_query"]
+            event["image_analysis"] = result["image_analysis"]
+        elif name == "search":
+            search_results, _ = result
+            event["references"] = [doc.metadata.get("source", f"doc_{i}") for i, doc in enumerate(search_results)]
+        return event
+
+    def _lookup_cached_response(self, request: AnalysisRequest):
+        """
+        응답 캐시 조회
+
+        Returns:
+            tuple: (AnalysisResponse 또는 None, 캐시 키 (image_hash, embedding))
+        """
+        try:
+            image_hash = perceptual_hash(request.image_data)
+            # 쿼리 임베딩 캐시에 저장되므로 이후 원본 user_state 검색에서 재사용됨
+            embedding = self.embeddings.embed_query(request.user_state)
+            cached = self.response_cache.lookup(image_hash, embedding)
+            return (AnalysisResponse(**cached) if cached else None), (image_hash, embedding)
+        except Exception as e:
+            logger.warning(f"⚠️  응답 캐시 조회 실패: {e}")
+            return None, None
+
+    def _upload_image(self, image_data: bytes) -> str:
+        """이미지를 Cloudinary에 인증 업로드하고 URL 반환"""
+        logger.info("📤 이미지를 Cloudinary에 업로드 중...")
+        upload_result = cloudinary.upload_authenticated_image(
+            image_data=image_data,
+            expire_minutes=Config.CLOUDINARY_EXPIRE_MINUTES
+        )
+        image_url = upload_result["secure_url"]
+        logger.info(f"✅ 이미지 업로드 완료: {image_url}")
+        return image_url
+
+    def _search_candidates(self, query: str):
+        """
+        하나의 쿼리로 Dense + BM25 검색
+
+        Returns:
+            dict: {"dense": [(Document, score), ...], "sparse": [(Document, score), ...]}
+        """
+        logger.info(f"🔍 하이브리드 검색 시작... (쿼리: {query[:30]})")
+
+        # Dense 검색
+        with metrics.timed("dense_search"):
             dense_docs_with_scores = self.db_manager.vectorstore.similarity_search_with_score(
-                request.user_state,
+                query,
                 k=Config.TOP_K
             )
-            dense_docs = [doc for doc, score in dense_docs_with_scores]
-            dense_scores = {doc.metadata.get("source", str(i)): score for i, (doc, score) in enumerate(dense_docs_with_scores)}
-            logger.info(f"   ✓ Dense: {len(dense_docs)}개 문서")
+        logger.info(f"   ✓ Dense: {len(dense_docs_with_scores)}개 문서")
 
-            # BM25 검색
-            if self.bm25_retriever is None:
-                try:
-                    # Chroma에서 모든 문서 가져오기
-                    all_results = self.db_manager.vectorstore.get()
-                    if all_results and all_results.get("documents"):
-                        # 문자열과 메타데이터를 Document 객체로 변환
-                        from langchain_core.documents import Document
-                        all_docs = [
-                            Document(page_content=doc, metadata=meta)
-                            for doc, meta in zip(all_results["documents"], all_results["metadatas"])
-                        ]
-                        self.bm25_retriever = self.db_manager.get_bm25_retriever(all_docs)
-                    else:
-                        logger.warning("⚠️  BM25 문서 없음, Dense만 사용")
-                        self.bm25_retriever = None
-                except Exception as e:
-                    logger.warning(f"⚠️  BM25 리트리버 생성 실패: {e}, Dense만 사용")
-                    self.bm25_retriever = None
-
-            sparse_docs = []
-            sparse_scores = {}
-            if self.bm25_retriever:
-                sparse_docs = self.bm25_retriever.invoke(request.user_state)
-                logger.info(f"   ✓ BM25: {len(sparse_docs)}개 문서")
-
-            # RRF 병합
-            rrf_scores = {}
-            if sparse_docs:
-                search_results, rrf_scores = _merge_with_rrf(dense_docs, sparse_docs, k=Config.RRF_K)
-                logger.info(f"   ✓ RRF 병합: {len(search_results)}개 문서")
-            else:
-                search_results = dense_docs
-                logger.info(f"   ✓ Dense만 사용")
-                rrf_scores = dense_scores
-
-            # 상위 7개로 제한
-            search_results = search_results[:Config.TOP_K]
-
-            # 3. 체인 구성
-            retriever = self.db_manager.get_retriever()
-            chain, query_generator = build_analysis_chain(
-                retriever=retriever,
-                llm=self.llm,
-                analysis_prompt=self.analysis_prompt,
-                make_query_prompt=self.make_query_prompt,
-                user_state=request.user_state,
-                image_url=image_url,
-            )
+        # BM25 검색
+        sparse_docs_with_scores = []
+        if self.bm25_index:
+            with metrics.timed("bm25_search"):
+                sparse_docs_with_scores = self.bm25_index.search(query, k=Config.TOP_K)
+            logger.info(f"   ✓ BM25: {len(sparse_docs_with_scores)}개 문서")
+
+        return {"dense": dense_docs_with_scores, "sparse": sparse_docs_with_scores}
 
-            # 4. 체인 실행 (이미 검색한 문서들을 사용하도록 수정 가능)
-            # 현재는 기존 retriever 사용, 추후 검색 결과를 직접 전달 가능
-            raw_response = chain.invoke(request.user_state)
-
-            # 5. JSON 추출
-            analysis = extract_json(raw_response)
-
-            # 6. LLM 원본 응답 추출 (이미지 분석 및 쿼리 생성 결과)
-            llm_raw_response = query_generator.raw_response if query_generator.raw_response else {}
-
-            # 7. 참고문헌 추출 (source 목록)
-            references = [doc.metadata.get("source", f"doc_{i}") for i, doc in enumerate(search_results)]
-
-            # 8. 로깅용 정보 준비 (Dense, BM25, RRF 점수)
-            search_metadata = []
-            for i, doc in enumerate(search_results):
-                source_key = doc.metadata.get("source", f"doc_{i}")
-                search_metadata.append({
-                    "rank": i + 1,
-                    "source": source_key,
-                    "dense_score": dense_scores.get(source_key, None),
-                    "bm25_score": sparse_scores.get(source_key, None),
-                    "rrf_score": rrf_scores.get(source_key, None),
-                })
-
-            # 7. 로그 저장
-            log_path = self.logger.save_analysis(
-                image_url=image_url,
+    def _fuse_candidates(self, candidates):
+        """
+        여러 쿼리의 검색 결과를 RRF로 병합
+
+        Args:
+            candidates: _search_candidates 결과 리스트 (우선순위 순)
+
+        Returns:
+            tuple: (search_results, search_metadata)
+                - search_results: 상위 TOP_K Document 리스트
+                - search_metadata: 로깅용 Dense, BM25, RRF 점수 리스트
+        """
+        ranked_lists = []
+        dense_scores = {}
+        sparse_scores = {}
+        has_sparse = False
+        for candidate in candidates:
+            dense_docs_with_scores = candidate["dense"]
+            ranked_lists.append([doc for doc, score in dense_docs_with_scores])
+            for i, (doc, score) in enumerate(dense_docs_with_scores):
+                dense_scores.setdefault(doc.metadata.get("source", str(i)), score)
+            sparse_docs_with_scores = candidate["sparse"]
+            if sparse_docs_with_scores:
+                ranked_lists.append([doc for doc, score in sparse_docs_with_scores])
+                for i, (doc, score) in enumerate(sparse_docs_with_scores):
+                    sparse_scores.setdefault(doc.metadata.get("source", str(i)), score)
+                has_sparse = True
+
+        # RRF 병합 (같은 문서는 content 해시로 중복 제거)
+        if has_sparse or len(ranked_lists) > 1:
+            with metrics.timed("rrf_merge"):
+                search_results, rrf_scores = _merge_with_rrf(*ranked_lists, k=Config.RRF_K)
+            logger.info(f"   ✓ RRF 병합: {len(ranked_lists)}개 결과 → {len(search_results)}개 문서")
+        else:
+            search_results = ranked_lists[0] if ranked_lists else []
+            logger.info(f"   ✓ Dense만 사용")
+            rrf_scores = dense_scores
+
+        # 상위 7개로 제한
+        search_results = search_results[:Config.TOP_K]
+
+        # 로깅용 정보 준비 (Dense, BM25, RRF 점수)
+        search_metadata = []
+        for i, doc in enumerate(search_results):
+            source_key = doc.metadata.get("source", f"doc_{i}")
+            search_metadata.append({
+                "rank": i + 1,
+                "source": source_key,
+                "dense_score": dense_scores.get(source_key, None),
+                "bm25_score": sparse_scores.get(source_key, None),
+                "rrf_score": rrf_scores.get(source_key, None),
+            })
+
+        return search_results, search_metadata
+
+    def _build_response(self, request, results, stage_timings, cache_key=None, token_usage=None):
+        """LLM 응답에서 분석 결과를 추출하고 로그 저장 후 응답 생성"""
+        image_url = results["upload"]
+        search_results, search_metadata = results["search"]
+
+        # 스키마 검증 (형식이 맞지 않으면 LLMOutputError → 에러 응답)
+        analysis = parse_llm_output(results["generate"], FinalAnalysis).model_dump()
+
+        # LLM 원본 응답 추출 (이미지 분석 및 쿼리 생성 결과)
+        query_result = results["generate_query"]
+        llm_raw_response = query_result.get("raw_response") if query_result else {}
+
+        # 참고문헌 추출 (source 목록)
+        references = [doc.metadata.get("source", f"doc_{i}") for i, doc in enumerate(search_results)]
+
+        # 로그 저장 (큐에 넣기만 하고 파일/DB 쓰기는 백그라운드)
+        with metrics.timed("log_write"):
+            self.logger.save_analysis(
+                image_url=image.describe_image_url(image_url),
                 user_state=request.user_state,
                 search_results=search_results,
                 analysis=analysis,
@@ -199,30 +516,37 @@ class AnalysisService:
                 model=Config.LLM_MODEL,
                 search_metadata=search_metadata,
                 llm_raw_response=llm_raw_response,
+                stage_timings=stage_timings,
+                token_usage=token_usage,
             )
 
-            return AnalysisResponse(
-                status="success",
-                analysis=analysis,
-                references=references
-            )
+        response = AnalysisResponse(
+            status="success",
+            analysis=analysis,
+            references=references
+        )
 
-        except Exception as e:
-            logger.exception(f"❌ 분석 중 에러 발생")
-            return AnalysisResponse(
-                status="error",
-                analysis={},
-                error=str(e),
-            )
+        # 응답 캐시 저장
+        if self.response_cache and cache_key:
+            image_hash, embedding = cache_key
+            try:
+                self.response_cache.store(image_hash, request.user_state, embedding, response.model_dump(exclude_none=True))
+            except Exception as e:
+                logger.warning(f"⚠️  응답 캐시 저장 실패: {e}")
+
+        return response
 
 
 # 싱글톤 인스턴스
 _service = None
+_service_lock = threading.Lock()
 
 
 def get_analysis_service() -> AnalysisService:
     """분석 서비스 인스턴스 반환"""
     global _service
     if _service is None:
-        _service = AnalysisService()
+        with _service_lock:
+            if _service is None:
+                _service = AnalysisService()
     return _service
@@ -1,11 +1,14 @@
 """
 Cloudinary 이미지 업로드 유틸리티
 """
+import hashlib
+import threading
 import cloudinary
 import cloudinary.uploader
+from collections import OrderedDict
 from datetime import datetime, timezone, timedelta
-from uuid import uuid4
 from typing import Dict, Any
+from app.core import metrics
 from app.core.config import Config
 
 # Cloudinary 설정 (모듈 로드 시 한 번만 초기화)
@@ -17,13 +20,67 @@ cloudinary.config(
 )
 
 
+# 콘텐츠 해시 → 업로드 결과 캐시 (접근 허용 기간 내 재전송은 재업로드하지 않음)
+_upload_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_upload_cache_lock = threading.Lock()
+_inflight_uploads: Dict[str, "_InflightUpload"] = {}
+
+
+class _InflightUpload:
+    """같은 이미지의 동시 업로드를 직렬화하는 잠금 (대기 중인 요청이 없을 때만 제거)"""
+
+    __slots__ = ("lock", "waiters")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.waiters = 0
+
+
+def _get_cached_upload(content_hash: str, expire_minutes: int) -> Dict[str, Any]:
+    """요청한 만큼 긴 접근 허용 기간으로 올렸고 아직 충분히 남은 기존 업로드 결과 반환 (없으면 None)
+
+    더 짧은 기간으로 올린 업로드는 재사용하지 않음 (다시 올리면 같은 public_id의 허용 기간이 늘어남)
+    """
+    min_remaining = timedelta(seconds=Config.CLOUDINARY_REUSE_MIN_SECONDS)
+    with _upload_cache_lock:
+        entry = _upload_cache.get(content_hash)
+        if entry is None or entry["expire_minutes"] < expire_minutes:
+            return None
+        if entry["expires_at"] - datetime.now(timezone.utc) < min_remaining:
+            del _upload_cache[content_hash]
+            return None
+        _upload_cache.move_to_end(content_hash)
+        return entry["result"]
+
+
+def _put_cached_upload(content_hash: str, result: Dict[str, Any], expires_at: datetime, expire_minutes: int) -> None:
+    """업로드 결과 저장 (최대 개수 초과 시 오래된 항목부터 삭제)"""
+    with _upload_cache_lock:
+        _upload_cache[content_hash] = {"result": result, "expires_at": expires_at, "expire_minutes": expire_minutes}
+        _upload_cache.move_to_end(content_hash)
+        while len(_upload_cache) > Config.CLOUDINARY_UPLOAD_CACHE_SIZE:
+            _upload_cache.popitem(last=False)
+
+
+def _forget_cached_upload(public_id: str) -> None:
+    """삭제된 이미지의 캐시 항목 제거"""
+    with _upload_cache_lock:
+        for content_hash, entry in list(_upload_cache.items()):
+            if entry["result"]["public_id"] == public_id:
+                del _upload_cache[content_hash]
+
+
 def upload_authenticated_image(
     image_data: bytes,
     expire_minutes: int = 5
 ) -> Dict[str, Any]:
     """
     이미지를 Cloudinary에 authenticated로 업로드합니다.
-    폴더 구조: CLOUDINARY_IMAGE_PATH/{uuid}_{YYYY-MM-DD}
+    폴더 구조: CLOUDINARY_IMAGE_PATH/{content_hash}_{YYYY-MM-DD}
+
+    같은 바이트의 이미지가 접근 허용 기간 안에 다시 들어오면 기존 업로드 결과를 재사용하고,
+    만료되었거나 기존 업로드의 허용 기간이 요청한 expire_minutes보다 짧으면
+    같은 public_id로 다시 업로드해 접근 허용 기간을 갱신합니다.
 
     Args:
         image_data: 이미지 바이트 데이터
@@ -36,9 +93,44 @@ def upload_authenticated_image(
             "secure_url": str
         }
     """
+    content_hash = hashlib.sha256(image_data).hexdigest()
+
+    cached = _get_cached_upload(content_hash, expire_minutes)
+    if cached:
+        print(f"♻️  기존 인증 이미지 재사용: {cached['public_id']}")
+        metrics.record_cache("cloudinary_upload", hit=True)
+        return cached
+
+    # 같은 이미지의 동시 업로드는 한 번만 수행
+    # (잠금을 쥐었거나 기다리는 요청이 남아 있는 동안에는 같은 잠금 객체를 유지)
+    with _upload_cache_lock:
+        inflight = _inflight_uploads.get(content_hash)
+        if inflight is None:
+            inflight = _inflight_uploads[content_hash] = _InflightUpload()
+        inflight.waiters += 1
+
+    try:
+        with inflight.lock:
+            cached = _get_cached_upload(content_hash, expire_minutes)
+            if cached:
+                print(f"♻️  기존 인증 이미지 재사용: {cached['public_id']}")
+                metrics.record_cache("cloudinary_upload", hit=True)
+                return cached
+
+            metrics.record_cache("cloudinary_upload", hit=False)
+            return _upload(image_data, content_hash, expire_minutes)
+    finally:
+        with _upload_cache_lock:
+            inflight.waiters -= 1
+            if inflight.waiters == 0:
+                del _inflight_uploads[content_hash]
+
+
+def _upload(image_data: bytes, content_hash: str, expire_minutes: int) -> Dict[str, Any]:
+    """Cloudinary에 인증 업로드 후 결과를 캐시에 저장"""
     try:
-        # 파일명 생성
-        file_id = str(uuid4())[:8]
+        # 파일명 생성 (콘텐츠 해시 기반이므로 재업로드 시 같은 에셋을 덮어씀)
+        file_id = content_hash[:16]
         date_str = datetime.now().strftime("%Y-%m-%d")
         public_id = f"{file_id}_{date_str}"
 
@@ -52,6 +144,7 @@ def upload_authenticated_image(
             "resource_type": "image",
             "type": "authenticated",
             "invalidate": True,
+            "overwrite": True,
             "use_filename": False,
             "unique_filename": False,
             "sign_url": True,
@@ -73,11 +166,13 @@ def upload_authenticated_image(
 
         print(f"✅ 인증 이미지 업로드 완료: {result['public_id']}")
 
-        return {
+        upload_result = {
             "public_id": result["public_id"],
             "format": result["format"],
             "secure_url": result["secure_url"],
         }
+        _put_cached_upload(content_hash, upload_result, expire_time, expire_minutes)
+        return upload_result
 
     except Exception as e:
         print(f"❌ Cloudinary 인증 업로드 실패: {str(e)}")
@@ -102,6 +197,7 @@ def delete_image(public_id: str) -> bool:
         )
 
         success = result.get("result") == "ok"
+        _forget_cached_upload(public_id)
 
         if success:
             print(f"✅ 이미지 삭제 완료: {public_id}")
@@ -0,0 +1,49 @@
+"""
+블로킹 작업 실행 유틸리티
+이벤트 루프를 막지 않도록 CPU/IO 블로킹 작업을 제한된 스레드 풀에서 실행합니다.
+"""
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from app.core.config import Config
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """공유 스레드 풀 반환 (처음 호출 시 생성)"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=Config.THREAD_POOL_WORKERS,
+                    thread_name_prefix="nada-worker",
+                )
+                logger.info(f"🧵 스레드 풀 생성 (workers={Config.THREAD_POOL_WORKERS})")
+    return _executor
+
+
+async def run_blocking(func, *args, **kwargs):
+    """블로킹 함수를 공유 스레드 풀에서 실행하고 결과를 기다립니다.
+
+    호출한 쪽의 contextvars(현재 트레이스 span 등)를 복사해 스레드에서도 유지합니다.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_executor(), functools.partial(context.run, func, *args, **kwargs))
+
+
+def shutdown_executor():
+    """스레드 풀 종료"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
@@ -0,0 +1,150 @@
+"""
+이미지 전처리 유틸리티
+업로드 이미지를 크기 제한을 두고 읽고, 비전 모델이 실제로 사용하는 해상도로 줄여 재인코딩합니다.
+"""
+import base64
+import io
+import logging
+from PIL import Image, ImageOps, UnidentifiedImageError
+from app.core.config import Config
+
+logger = logging.getLogger(__name__)
+
+# OpenAI 비전 입력 해상도 기준
+# - low: 512x512 안으로 축소된 이미지 한 장만 사용
+# - high/auto: 2048x2048 안으로 맞춘 뒤 짧은 변을 768로 축소
+LOW_DETAIL_MAX_SIDE = 512
+HIGH_DETAIL_MAX_SIDE = 2048
+HIGH_DETAIL_SHORT_SIDE = 768
+
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class ImageTooLargeError(ValueError):
+    """업로드 이미지가 허용 크기를 초과함"""
+
+
+class InvalidImageError(ValueError):
+    """이미지로 디코딩할 수 없음 (손상된 파일, 지나치게 큰 해상도)"""
+
+
+class UnsupportedImageError(InvalidImageError):
+    """이미지 형식을 인식할 수 없음 (이미지가 아닌 파일)"""
+
+
+async def read_upload(upload_file, max_bytes: int = None) -> bytes:
+    """
+    UploadFile을 청크 단위로 읽습니다. 허용 크기를 넘으면 즉시 중단합니다.
+
+    Args:
+        upload_file: FastAPI UploadFile
+        max_bytes: 허용 최대 바이트 수 (기본: Config.MAX_UPLOAD_BYTES)
+
+    Returns:
+        bytes: 이미지 데이터
+    """
+    if max_bytes is None:
+        max_bytes = Config.MAX_UPLOAD_BYTES
+    buffer = bytearray()
+
+    while True:
+        chunk = await upload_file.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        buffer.extend(chunk)
+        if len(buffer) > max_bytes:
+            raise ImageTooLargeError(f"이미지 크기가 제한({max_bytes // (1024 * 1024)}MB)을 초과했습니다")
+
+    return bytes(buffer)
+
+
+def check_image(image_data: bytes) -> None:
+    """
+    헤더만 읽어 디코딩 가능한 이미지인지 확인 (픽셀은 디코딩하지 않음)
+
+    Raises:
+        UnsupportedImageError: 이미지 형식을 인식할 수 없음
+        InvalidImageError: 헤더가 손상되었거나 해상도가 디컴프레션 폭탄 기준을 넘음
+    """
+    with _open_image(image_data):
+        pass
+
+
+def _open_image(image_data: bytes):
+    """PIL 이미지 열기 (PIL 예외를 클라이언트에 보여줄 수 있는 메시지로 변환)"""
+    try:
+        return Image.open(io.BytesIO(image_data))
+    except UnidentifiedImageError:
+        raise UnsupportedImageError("이미지 파일 형식을 인식할 수 없습니다")
+    except Image.DecompressionBombError:
+        raise InvalidImageError("이미지 해상도가 너무 큽니다")
+    except OSError:
+        raise InvalidImageError("이미지 파일이 손상되었습니다")
+
+
+def _target_size(width: int, height: int, detail: str):
+    """detail 수준에서 모델이 실제로 보는 해상도 계산 (확대는 하지 않음)"""
+    if detail == "low":
+        scale = min(1.0, LOW_DETAIL_MAX_SIDE / max(width, height))
+    else:
+        scale = min(1.0, HIGH_DETAIL_MAX_SIDE / max(width, height))
+        short_side = min(width, height) * scale
+        if short_side > HIGH_DETAIL_SHORT_SIDE:
+            scale *= HIGH_DETAIL_SHORT_SIDE / short_side
+
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def preprocess_image(image_data: bytes, detail: str = None) -> bytes:
+    """
+    이미지 전처리
+
+    - EXIF 회전 정보를 픽셀에 반영한 뒤 EXIF 등 메타데이터 제거
+    - detail 수준에서 모델이 사용하는 해상도로 축소
+    - JPEG로 재인코딩
+
+    Args:
+        image_data: 원본 이미지 바이트
+        detail: 이미지 상세도 (기본: Config.IMAGE_DETAIL)
+
+    Returns:
+        bytes: 전처리된 JPEG 바이트
+
+    Raises:
+        InvalidImageError: 이미지로 디코딩할 수 없음
+    """
+    detail = detail or Config.IMAGE_DETAIL
+
+    with _open_image(image_data) as image:
+        try:
+            image.load()
+            image = ImageOps.exif_transpose(image)
+            if image.mode != "RGB":
+                image = image.convert("RGB")
+        except OSError:
+            # 헤더는 정상이지만 픽셀 데이터가 잘렸거나 손상됨
+            raise InvalidImageError("이미지 파일이 손상되었습니다")
+
+        target = _target_size(image.width, image.height, detail)
+        if target != image.size:
+            image = image.resize(target, Image.LANCZOS)
+
+        output = io.BytesIO()
+        image.save(output, format="JPEG", quality=Config.IMAGE_JPEG_QUALITY, optimize=True)
+
+    processed = output.getvalue()
+    logger.info(f"🖼️  이미지 전처리 완료: {len(image_data)} → {len(processed)} bytes, {target[0]}x{target[1]}")
+    return processed
+
+
+def to_data_url(image_data: bytes, mime_type: str = "image/jpeg") -> str:
+    """이미지 바이트를 base64 data URL로 변환"""
+    encoded = base64.b64encode(image_data).decode("ascii")
+    return f"data:{mime_type};base64,{encoded}"
+
+
+def describe_image_url(image_url: str) -> str:
+    """로그용 이미지 URL 표기 (data URL은 본문 대신 크기만 기록)"""
+    if image_url and image_url.startswith("data:"):
+        return f"{image_url.split(',', 1)[0]} ({len(image_url)} chars)"
+    return image_url
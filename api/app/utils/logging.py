@@ -8,6 +8,8 @@ from datetime import datetime
 from fastapi import Request
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import Response
+from app.core import metrics, tracing
+from app.core.config import Config
 
 logger = logging.getLogger("app")
 
@@ -27,23 +29,67 @@ class KSTFormatter(logging.Formatter):
 
 
 class LoggingMiddleware(BaseHTTPMiddleware):
-    """HTTP 요청/응답 로깅 미들웨어"""
+    """HTTP 요청/응답 로깅 미들웨어
+
+    요청마다 트레이스를 시작하고 상관 ID를 X-Request-ID 응답 헤더로 돌려줍니다.
+    (요청의 X-Request-ID가 [A-Za-z0-9._-] 128자 이하면 그대로 사용하고, 아니면 새로 생성)
+    /metrics, /health 같은 인프라 경로는 트레이스하지 않습니다.
+    트레이스는 응답 본문 전송이 끝난 뒤(스트리밍 포함) 전용 내보내기 큐로 넘깁니다.
+    """
 
     async def dispatch(self, request: Request, call_next) -> Response:
-        """요청과 응답을 로깅합니다"""
+        """요청과 응답을 로깅하고 HTTP 메트릭/트레이스를 기록합니다"""
         start_time = time.time()
+        trace = None
+        if request.url.path not in Config.TRACE_EXCLUDED_PATHS:
+            trace = tracing.start_trace(
+                f"{request.method} {request.url.path}",
+                request_id=request.headers.get("x-request-id"),
+                attributes={"http.method": request.method, "http.path": request.url.path},
+            )
 
-        response = await call_next(request)
+        status_code = 500
+        metrics.HTTP_IN_FLIGHT.inc()
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+        except BaseException as e:
+            if trace:
+                trace.root.end(e)
+                tracing.submit_trace(trace)
+            raise
+        finally:
+            metrics.HTTP_IN_FLIGHT.dec()
+            process_time = time.time() - start_time
+            # 라벨 수가 늘지 않도록 실제 경로 대신 라우트 템플릿 사용
+            route = request.scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            metrics.HTTP_SECONDS.labels(request.method, path, str(status_code)).observe(process_time)
 
-        process_time = time.time() - start_time
+        request_id = f"[{trace.request_id}] " if trace else ""
         logger.info(
-            f"{request.method} {request.url.path} - "
+            f"{request_id}{request.method} {request.url.path} - "
             f"Status: {response.status_code} - "
             f"Time: {process_time:.3f}s"
         )
 
+        if trace:
+            response.headers["X-Request-ID"] = trace.request_id
+            trace.root.attributes["http.status_code"] = status_code
+            response.body_iterator = self._finish_trace_after_body(response.body_iterator, trace)
+
         return response
 
+    @staticmethod
+    async def _finish_trace_after_body(body_iterator, trace):
+        """응답 본문을 모두 보낸 뒤 루트 span을 닫고 트레이스 내보내기"""
+        try:
+            async for chunk in body_iterator:
+                yield chunk
+        finally:
+            trace.root.end()
+            tracing.submit_trace(trace)
+
 
 def setup_logging():
     """로깅 설정 (KST)"""
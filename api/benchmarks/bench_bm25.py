@@ -0,0 +1,134 @@
+"""
+BM25 검색 벤치마크
+기존 langchain BM25Retriever(rank_bm25, 순수 Python)와 CSR 행렬 기반 BM25Index를
+합성 한국어/영어 코퍼스에서 비교합니다.
+
+Usage:
+    python benchmarks/bench_bm25.py
+    python benchmarks/bench_bm25.py --sizes 10000 100000 1000000 --queries 100 --baseline-max 100000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# PROJECT_ROOT 설정
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+os.environ['PROJECT_ROOT'] = str(PROJECT_ROOT)
+os.environ.setdefault("OPEN_API_KEY", "benchmark")
+
+import numpy as np
+
+from app.core.bm25 import BM25Index, get_tokenizer
+
+# 조사가 붙는 한국어 어간 + 영어 전문 용어로 구성된 합성 어휘
+KO_STEMS = [
+    "피부", "보습", "건조", "각질", "장벽", "자외선", "색소", "모공", "피지", "여드름",
+    "탄력", "주름", "두피", "탈모", "모발", "손상", "염색", "윤기", "얼굴", "윤곽",
+    "턱선", "부종", "수면", "스트레스", "식습관", "세안", "미백", "홍조", "민감", "진정",
+]
+KO_PARTICLES = ["", "가", "이", "는", "은", "를", "을", "에", "의", "로", "와", "과", "해요", "하다"]
+EN_TERMS = [
+    "skin", "barrier", "moisture", "hydration", "collagen", "retinol", "uv", "sebum", "acne", "pigmentation",
+    "hair", "scalp", "keratin", "follicle", "elasticity", "wrinkle", "ceramide", "niacinamide", "spf", "dermis",
+]
+
+
+def make_corpus(size, doc_tokens=60, seed=0):
+    """Zipf 분포로 단어를 뽑아 합성 문서 생성"""
+    rng = np.random.default_rng(seed)
+    vocab = [stem + particle for stem in KO_STEMS for particle in KO_PARTICLES] + EN_TERMS
+    vocab += [f"term{i}" for i in range(5000)]  # 긴 꼬리 어휘
+    ranks = np.arange(1, len(vocab) + 1)
+    probs = 1.0 / ranks ** 1.1
+    probs /= probs.sum()
+
+    word_ids = rng.choice(len(vocab), size=(size, doc_tokens), p=probs)
+    return [" ".join(vocab[i] for i in row) for row in word_ids]
+
+
+def make_queries(count, seed=1):
+    """사용자 상태와 비슷한 짧은 쿼리 생성"""
+    rng = np.random.default_rng(seed)
+    queries = []
+    for _ in range(count):
+        words = [KO_STEMS[i] + KO_PARTICLES[j] for i, j in zip(rng.integers(0, len(KO_STEMS), 3), rng.integers(0, len(KO_PARTICLES), 3))]
+        words += [EN_TERMS[i] for i in rng.integers(0, len(EN_TERMS), 2)]
+        queries.append(" ".join(words))
+    return queries
+
+
+def measure(search, queries):
+    """쿼리별 지연 시간(ms) 측정"""
+    search(queries[0])  # 워밍업
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.percentile(latencies, [50, 95, 99])
+
+
+def bench_size(size, queries, k, baseline_max, tokenizer):
+    """코퍼스 크기 하나에 대해 두 엔진 비교"""
+    texts = make_corpus(size)
+    rows = []
+
+    if size <= baseline_max:
+        from langchain_community.retrievers import BM25Retriever
+
+        start = time.perf_counter()
+        retriever = BM25Retriever.from_texts(texts, k=k)
+        build_s = time.perf_counter() - start
+        p50, p95, p99 = measure(retriever.invoke, queries)
+        rows.append(("BM25Retriever (rank_bm25)", size, build_s, p50, p95, p99))
+    else:
+        rows.append(("BM25Retriever (rank_bm25)", size, None, None, None, None))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        records = ((str(i), text, {"source": f"doc_{i}.pdf"}) for i, text in enumerate(texts))
+        start = time.perf_counter()
+        index = BM25Index.build(records, Path(tmp) / "bm25_index", tokenizer=get_tokenizer(tokenizer))
+        build_s = time.perf_counter() - start
+        p50, p95, p99 = measure(lambda q: index.search(q, k=k), queries)
+        rows.append((f"BM25Index (CSR, {tokenizer})", size, build_s, p50, p95, p99))
+
+    return rows
+
+
+def print_rows(rows):
+    """결과 표 출력"""
+    print(f"{'engine':<30} {'docs':>10} {'build(s)':>10} {'p50(ms)':>10} {'p95(ms)':>10} {'p99(ms)':>10}")
+    for name, size, build_s, p50, p95, p99 in rows:
+        if build_s is None:
+            print(f"{name:<30} {size:>10} {'skipped':>10}")
+            continue
+        print(f"{name:<30} {size:>10} {build_s:>10.2f} {p50:>10.2f} {p95:>10.2f} {p99:>10.2f}")
+
+
+def main():
+    """벤치마크 실행"""
+    parser = argparse.ArgumentParser(description="BM25 검색 벤치마크")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000], help="코퍼스 청크 수")
+    parser.add_argument("--queries", type=int, default=100, help="측정 쿼리 수")
+    parser.add_argument("--k", type=int, default=7, help="검색 결과 수")
+    parser.add_argument("--tokenizer", default="ngram", help="BM25Index 토크나이저")
+    parser.add_argument("--baseline-max", type=int, default=100_000, help="이 크기를 넘으면 rank_bm25 비교 생략 (메모리/시간)")
+    args = parser.parse_args()
+
+    queries = make_queries(args.queries)
+    rows = []
+    for size in args.sizes:
+        print(f"⏳ {size}개 청크 측정 중...")
+        rows.extend(bench_size(size, queries, args.k, args.baseline_max, args.tokenizer))
+
+    print()
+    print_rows(rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+"""
+임베딩 백엔드 벤치마크
+huggingface(PyTorch fp32)와 onnx(ONNX Runtime int8) 백엔드를 실제 논문 코퍼스에서 비교합니다.
+
+측정 항목:
+- 쿼리 인코딩 지연 시간 (p50/p95)
+- 문서 인코딩 처리량 (청크/초)
+- 메모리 (모델 로드 후 RSS)
+- recall@k: 기준 백엔드(huggingface)의 exact top-k 검색 결과를 얼마나 재현하는지
+
+백엔드마다 별도 프로세스에서 실행하여 메모리를 독립적으로 측정합니다.
+코퍼스는 BM25 인덱스 문서 저장소(Config.BM25_INDEX_PATH)에서 읽습니다.
+
+Usage:
+    python benchmarks/bench_embeddings.py
+    python benchmarks/bench_embeddings.py --backends huggingface onnx --corpus-size 2000 --k 7
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# PROJECT_ROOT 설정
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+os.environ['PROJECT_ROOT'] = str(PROJECT_ROOT)
+os.environ.setdefault("OPEN_API_KEY", "benchmark")
+
+import numpy as np
+
+from app.core.bm25 import BM25Index
+
+SAMPLE_QUERIES = [
+    "피부가 건조해요",
+    "피부가 너무 건조하고 각질이 일어나요",
+    "머리카락이 푸석하고 끝이 갈라져요",
+    "탈모가 걱정돼요",
+    "얼굴이 붓고 턱선이 흐려 보여요",
+    "모공이 넓고 피지가 많아요",
+    "자외선 때문에 기미가 생긴 것 같아요",
+    "여드름 자국이 오래 남아요",
+    "면접을 앞두고 인상이 피곤해 보여요",
+    "두피가 가렵고 비듬이 있어요",
+]
+
+
+def current_rss_mb() -> float:
+    """현재 프로세스 RSS (MB)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_worker(backend: str, work_dir: Path) -> None:
+    """(자식 프로세스) 백엔드 하나를 로드하고 측정 결과를 저장"""
+    from app.core.indexer import EmbeddingManager
+
+    with open(work_dir / "inputs.json", encoding="utf-8") as f:
+        inputs = json.load(f)
+
+    rss_before = current_rss_mb()
+    start = time.perf_counter()
+    embeddings = EmbeddingManager(backend=backend)._load_backend()
+    load_s = time.perf_counter() - start
+    rss_loaded = current_rss_mb()
+
+    # 쿼리 지연 시간 (한 건씩)
+    embeddings.embed_query(inputs["queries"][0])  # 워밍업
+    latencies = []
+    query_vectors = []
+    for query in inputs["queries"]:
+        start = time.perf_counter()
+        query_vectors.append(embeddings.embed_query(query))
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    # 문서 처리량 (배치)
+    start = time.perf_counter()
+    corpus_vectors = embeddings.embed_documents(inputs["corpus"])
+    corpus_s = time.perf_counter() - start
+
+    np.save(work_dir / f"{backend}_queries.npy", np.asarray(query_vectors, dtype=np.float32))
+    np.save(work_dir / f"{backend}_corpus.npy", np.asarray(corpus_vectors, dtype=np.float32))
+
+    p50, p95 = np.percentile(latencies, [50, 95])
+    stats = {
+        "backend": backend,
+        "load_s": load_s,
+        "query_p50_ms": float(p50),
+        "query_p95_ms": float(p95),
+        "docs_per_s": len(inputs["corpus"]) / corpus_s if corpus_s else 0.0,
+        "rss_model_mb": rss_loaded - rss_before,
+        "rss_peak_mb": max(current_rss_mb(), rss_loaded),
+    }
+    with open(work_dir / f"{backend}_stats.json", "w") as f:
+        json.dump(stats, f)
+
+
+def top_k(query_vectors, corpus_vectors, k):
+    """정규화 벡터 exact top-k"""
+    scores = query_vectors @ corpus_vectors.T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return [set(row) for row in top]
+
+
+def main():
+    """벤치마크 실행"""
+    parser = argparse.ArgumentParser(description="임베딩 백엔드 벤치마크")
+    parser.add_argument("--backends", nargs="+", default=["huggingface", "onnx"], help="비교할 백엔드 (첫 번째가 기준)")
+    parser.add_argument("--corpus-size", type=int, default=1000, help="사용할 청크 수")
+    parser.add_argument("--k", type=int, default=7, help="recall@k의 k")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--work-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, Path(args.work_dir))
+        return 0
+
+    index = BM25Index.load()
+    rng = np.random.default_rng(0)
+    doc_ids = rng.choice(index.num_docs, size=min(args.corpus_size, index.num_docs), replace=False)
+    corpus = [index.get_document(int(i)).page_content for i in doc_ids]
+    # 실제 사용자 입력 + 청크 앞부분(문서형 쿼리)
+    queries = SAMPLE_QUERIES + [text[:200] for text in corpus[:20]]
+    k = min(args.k, len(corpus))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        with open(work_dir / "inputs.json", "w", encoding="utf-8") as f:
+            json.dump({"corpus": corpus, "queries": queries}, f, ensure_ascii=False)
+
+        results = []
+        for backend in args.backends:
+            print(f"⏳ {backend} 측정 중... (청크 {len(corpus)}개, 쿼리 {len(queries)}개)")
+            subprocess.run(
+                [sys.executable, __file__, "--worker", backend, "--work-dir", str(work_dir)],
+                check=True,
+            )
+            with open(work_dir / f"{backend}_stats.json") as f:
+                results.append(json.load(f))
+
+        reference = args.backends[0]
+        ref_top = top_k(np.load(work_dir / f"{reference}_queries.npy"), np.load(work_dir / f"{reference}_corpus.npy"), k)
+        for stats in results:
+            backend_top = top_k(
+                np.load(work_dir / f"{stats['backend']}_queries.npy"),
+                np.load(work_dir / f"{stats['backend']}_corpus.npy"),
+                k,
+            )
+            stats["recall"] = float(np.mean([len(a & b) / k for a, b in zip(ref_top, backend_top)]))
+
+    print()
+    print(f"{'backend':<14} {'load(s)':>8} {'q p50(ms)':>10} {'q p95(ms)':>10} {'docs/s':>8} {'model RSS(MB)':>14} {f'recall@{k}':>10}")
+    for stats in results:
+        print(
+            f"{stats['backend']:<14} {stats['load_s']:>8.1f} {stats['query_p50_ms']:>10.1f} {stats['query_p95_ms']:>10.1f} "
+            f"{stats['docs_per_s']:>8.1f} {stats['rss_model_mb']:>14.0f} {stats['recall']:>10.3f}"
+        )
+    print(f"\n(recall 기준: {reference})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,371 @@
+"""
+분석 파이프라인 벤치마크
+AnalysisService.aanalyze 전체를 프로세스 안에서 실행하며 단계별 지연 시간과 동시성별 처리량을 측정합니다.
+
+외부 호출은 가짜 구성 요소로 대체합니다.
+- LLM: 설정한 첫 토큰 지연 + 초당 토큰 수로 스키마에 맞는 JSON을 생성 (토큰 사용량 포함)
+- 업로더: 설정한 지연 후 가짜 URL 반환
+- 임베딩: 토큰 해시 기반 정규화 벡터 (선택적으로 인코딩 지연 추가)
+- 코퍼스: bench_bm25의 합성 문서로 임시 벡터 DB + BM25 인덱스 생성
+
+이미지 전처리, 검색, RRF 병합, 로그 저장(ChainLogger, 임시 디렉토리)은 실제 코드를 그대로 사용합니다.
+단계별 시간은 요청마다 트레이스를 시작해 span(파이프라인 단계, dense_search/bm25_search/rrf_merge/log_write, LLM 호출)에서 수집합니다.
+
+Usage:
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --corpus-size 100000 --concurrency 1 4 16 64 --requests 64
+    python benchmarks/bench_pipeline.py --llm-latency-ms 800 --llm-tokens 400 --tokens-per-second 60 --upload-ms 150
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import zlib
+from io import BytesIO
+from pathlib import Path
+
+# PROJECT_ROOT 설정
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+os.environ['PROJECT_ROOT'] = str(PROJECT_ROOT)
+os.environ.setdefault("OPEN_API_KEY", "benchmark")
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from PIL import Image
+
+from app.core import tracing
+from app.core.bm25 import BM25Index
+from app.core.chain_logger import ChainLogger
+from app.core.config import Config
+from app.core.embedding_cache import CachedEmbeddings
+from app.core.indexer import VectorStoreManager
+from app.schemas.request import AnalysisRequest
+from app.services.analysis_service import AnalysisService
+from benchmarks.bench_bm25 import make_corpus, make_queries
+from benchmarks.bench_embeddings import current_rss_mb
+
+UPSERT_BATCH_SIZE = 1000
+CHUNKS_PER_PAPER = 40
+
+# 벤치마크에서 측정하는 span 종류 (LangChain 체인 내부 span은 제외)
+MEASURED_KINDS = ("stage", "internal", "llm")
+
+
+class FakeChatModel(BaseChatModel):
+    """지연 시간과 출력 토큰 수를 설정할 수 있는 가짜 채팅 모델
+
+    response_format(json_schema)의 스키마 이름에 맞는 JSON을 돌려주며,
+    첫 토큰까지 latency_ms를 기다린 뒤 tokens_per_second 속도로 토큰을 출력합니다.
+    """
+
+    model_name: str = "fake-benchmark"
+    latency_ms: float = 300.0
+    output_tokens: int = 120
+    tokens_per_second: float = 200.0
+    input_tokens: int = 1500
+    jitter: float = 0.2
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-benchmark"
+
+    def _first_token_delay(self) -> float:
+        return self.latency_ms / 1000 * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _pieces(self, messages, kwargs):
+        """출력 JSON을 output_tokens개 조각(토큰)으로 나눔"""
+        schema = ((kwargs.get("response_format") or {}).get("json_schema") or {}).get("name")
+        if schema is None:
+            # 구조화 출력이 꺼져 있으면 메시지 구성으로 구분 (최종 분석만 SystemMessage 포함)
+            schema = "QueryGeneration" if len(messages) == 1 else "FinalAnalysis"
+
+        filler = "피부 장벽과 보습 상태를 고려한 관리가 필요합니다 "
+        width = max(1, self.output_tokens * 4 // 8)  # 토큰당 약 4글자, 문자열 필드 8개에 나눠 채움
+        text = (filler * (width // len(filler) + 1))[:width]
+        if schema == "QueryGeneration":
+            content = {
+                "image_analysis": {"hair": text, "skin": text, "contour": text},
+                "search_query": " ".join(make_queries(1, seed=random.randrange(1 << 30))),
+            }
+        else:
+            category = {"status": text, "improvement_tips": [text, text]}
+            content = {"Hair": category, "Skin": category, "Contour": category}
+        content = json.dumps(content, ensure_ascii=False)
+
+        step = max(1, -(-len(content) // max(1, self.output_tokens)))
+        return [content[i:i + step] for i in range(0, len(content), step)]
+
+    def _usage(self, pieces):
+        return {
+            "input_tokens": self.input_tokens,
+            "output_tokens": len(pieces),
+            "total_tokens": self.input_tokens + len(pieces),
+        }
+
+    def _result(self, pieces):
+        message = AIMessage(
+            content="".join(pieces),
+            usage_metadata=self._usage(pieces),
+            response_metadata={"model_name": self.model_name},
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        pieces = self._pieces(messages, kwargs)
+        time.sleep(self._first_token_delay() + len(pieces) / self.tokens_per_second)
+        return self._result(pieces)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        pieces = self._pieces(messages, kwargs)
+        await asyncio.sleep(self._first_token_delay() + len(pieces) / self.tokens_per_second)
+        return self._result(pieces)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        pieces = self._pieces(messages, kwargs)
+        await asyncio.sleep(self._first_token_delay())
+        for piece in pieces:
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager:
+                await run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+            await asyncio.sleep(1 / self.tokens_per_second)
+        # 마지막 청크에 토큰 사용량 포함 (stream_usage=True인 ChatOpenAI와 같은 형태)
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(
+                content="",
+                usage_metadata=self._usage(pieces),
+                response_metadata={"model_name": self.model_name},
+            )
+        )
+
+
+class HashEmbeddings(Embeddings):
+    """토큰 해시 bag-of-words 정규화 벡터 (같은 단어를 공유하는 텍스트끼리 유사도가 높음)"""
+
+    def __init__(self, dim=384, encode_ms=0.0):
+        self.dim = dim
+        self.encode_ms = encode_ms
+
+    def _embed(self, text):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in text.split():
+            h = zlib.crc32(token.encode())
+            vector[h % self.dim] += 1.0 if (h >> 16) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        if self.encode_ms:
+            time.sleep(self.encode_ms / 1000)  # 모델 인코딩 (GIL 해제) 흉내
+        return self._embed(text)
+
+
+def make_uploader(upload_ms):
+    """설정한 지연 후 가짜 인증 URL을 돌려주는 업로더"""
+    def upload(image_data: bytes) -> str:
+        time.sleep(upload_ms / 1000)
+        digest = hashlib.sha256(image_data).hexdigest()[:16]
+        return f"https://res.cloudinary.com/benchmark/image/authenticated/{digest}.jpg"
+    return upload
+
+
+def make_images(count, size=(1280, 960), seed=0):
+    """전처리(축소/재인코딩) 비용이 실제 사진과 비슷하도록 그라디언트 + 노이즈 JPEG 생성"""
+    rng = np.random.default_rng(seed)
+    width, height = size
+    gradient = np.linspace(0, 255, width, dtype=np.float32)[None, :, None]
+    images = []
+    for _ in range(count):
+        pixels = gradient + rng.normal(0, 25, (height, width, 3)) + rng.uniform(0, 80, 3)
+        buffer = BytesIO()
+        Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).save(buffer, format="JPEG", quality=90)
+        images.append(buffer.getvalue())
+    return images
+
+
+def build_stores(embeddings, size, work_dir, backend):
+    """합성 코퍼스로 벡터 DB와 BM25 인덱스 생성"""
+    texts = make_corpus(size)
+    documents = [
+        Document(
+            page_content=text,
+            metadata={"source": f"paper_{i // CHUNKS_PER_PAPER}.pdf", "page": i % CHUNKS_PER_PAPER, "chunk_id": f"chunk_{i}"},
+        )
+        for i, text in enumerate(texts)
+    ]
+
+    db_manager = VectorStoreManager(embeddings, backend=backend)
+    db_manager.persist_dir = str(work_dir / f"{backend}_store")
+    db_manager.open_vectorstore()
+    for offset in range(0, size, UPSERT_BATCH_SIZE):
+        batch = documents[offset:offset + UPSERT_BATCH_SIZE]
+        vectors = embeddings.embed_documents([doc.page_content for doc in batch])
+        db_manager.upsert([(doc.metadata["chunk_id"], doc, vector) for doc, vector in zip(batch, vectors)])
+
+    records = ((doc.metadata["chunk_id"], doc.page_content, doc.metadata) for doc in documents)
+    bm25_index = BM25Index.build(records, work_dir / "bm25_index")
+    return db_manager, bm25_index
+
+
+async def analyze_traced(service, request):
+    """요청 하나를 트레이스 안에서 분석하고 (상태, 전체 ms, {span 이름: [ms, ...]}) 반환"""
+    trace = tracing.start_trace("benchmark")
+    start = time.perf_counter()
+    response = await service.aanalyze(request)
+    total_ms = (time.perf_counter() - start) * 1000
+    trace.root.end()
+
+    parents = {span.span_id: span for span in trace.spans}
+    durations = {}
+    for span in trace.spans:
+        if span.kind not in MEASURED_KINDS or span is trace.root:
+            continue
+        name = span.name
+        if span.kind == "llm":
+            # LLM 호출은 어느 단계에서 호출했는지로 구분
+            parent = parents.get(span.parent_id)
+            while parent is not None and parent.kind != "stage":
+                parent = parents.get(parent.parent_id)
+            name = f"llm ({parent.name})" if parent is not None else "llm"
+        durations.setdefault(name, []).append(span.duration_ms)
+    return response.status, total_ms, durations
+
+
+async def run_level(service, requests, concurrency):
+    """동시성 하나에서 모든 요청 실행 (closed loop: 워커마다 끝나면 다음 요청)"""
+    pending = iter(requests)
+    totals, stages, statuses = [], {}, {}
+
+    async def worker():
+        for request in pending:
+            status, total_ms, durations = await analyze_traced(service, request)
+            totals.append(total_ms)
+            statuses[status] = statuses.get(status, 0) + 1
+            for name, values in durations.items():
+                stages.setdefault(name, []).extend(values)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return elapsed, totals, stages, statuses
+
+
+def print_level(concurrency, elapsed, totals, stages, statuses):
+    """동시성 하나의 결과 표 출력"""
+    errors = sum(count for status, count in statuses.items() if status != "success")
+    print(
+        f"\n⏱️  concurrency={concurrency}  requests={len(totals)}  elapsed={elapsed:.2f}s  "
+        f"throughput={len(totals) / elapsed:.2f} req/s  errors={errors}  RSS={current_rss_mb():.0f}MB"
+    )
+    print(f"{'stage':<28} {'count':>7} {'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9}")
+    rows = [("(total)", totals)] + list(stages.items())
+    for name, values in rows:
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        print(f"{name:<28} {len(values):>7} {p50:>9.1f} {p95:>9.1f} {p99:>9.1f}")
+
+
+def print_summary(results):
+    """동시성별 처리량 요약"""
+    print(f"\n{'concurrency':>11} {'req/s':>8} {'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9}")
+    for concurrency, elapsed, totals in results:
+        p50, p95, p99 = np.percentile(totals, [50, 95, 99])
+        print(f"{concurrency:>11} {len(totals) / elapsed:>8.2f} {p50:>9.1f} {p95:>9.1f} {p99:>9.1f}")
+
+
+async def run(args, service, requests):
+    """워밍업 후 동시성별 측정"""
+    for request in requests[:args.warmup]:
+        await service.aanalyze(request)
+
+    results = []
+    for level, concurrency in enumerate(args.concurrency):
+        # 동시성마다 다른 user_state를 사용 (이전 측정의 쿼리 임베딩 캐시 적중 방지)
+        offset = args.warmup + level * args.requests
+        elapsed, totals, stages, statuses = await run_level(service, requests[offset:offset + args.requests], concurrency)
+        print_level(concurrency, elapsed, totals, stages, statuses)
+        results.append((concurrency, elapsed, totals))
+    print_summary(results)
+
+
+def main():
+    """벤치마크 실행"""
+    parser = argparse.ArgumentParser(description="분석 파이프라인 벤치마크")
+    parser.add_argument("--corpus-size", type=int, default=10_000, help="합성 코퍼스 청크 수")
+    parser.add_argument("--dim", type=int, default=384, help="임베딩 차원")
+    parser.add_argument("--vector-backend", choices=["chroma", "numpy"], default=Config.VECTOR_BACKEND)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64], help="동시 분석 수")
+    parser.add_argument("--requests", type=int, default=32, help="동시성마다 실행할 요청 수")
+    parser.add_argument("--warmup", type=int, default=2, help="측정 전 실행할 요청 수")
+    parser.add_argument("--images", type=int, default=8, help="번갈아 사용할 합성 이미지 수")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0, help="LLM 첫 토큰까지의 지연")
+    parser.add_argument("--llm-tokens", type=int, default=120, help="LLM 호출당 출력 토큰 수")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="LLM 출력 속도")
+    parser.add_argument("--llm-jitter", type=float, default=0.2, help="첫 토큰 지연의 ± 비율")
+    parser.add_argument("--upload-ms", type=float, default=100.0, help="가짜 업로드 지연")
+    parser.add_argument("--encode-ms", type=float, default=10.0, help="쿼리 임베딩 인코딩 지연 (캐시 미스마다)")
+    parser.add_argument("--transport", choices=["cloudinary", "data_url"], default="cloudinary", help="이미지 전달 방식")
+    parser.add_argument("--workers", type=int, default=Config.THREAD_POOL_WORKERS, help="공유 스레드 풀 크기")
+    args = parser.parse_args()
+
+    # 응답 캐시는 같은 요청을 반복하는 측정을 왜곡하므로 끄고, 트레이스는 수집만 하고 내보내지 않음
+    Config.RESPONSE_CACHE_ENABLED = False
+    Config.TRACING_ENABLED = True
+    Config.TRACE_EXPORTER = "none"
+    Config.IMAGE_TRANSPORT = args.transport
+    Config.THREAD_POOL_WORKERS = args.workers
+
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        embeddings = HashEmbeddings(dim=args.dim, encode_ms=args.encode_ms)
+        if Config.QUERY_EMBEDDING_CACHE_SIZE > 0:
+            # 서비스와 같은 쿼리 임베딩 캐시 (문서 임베딩은 캐시를 거치지 않음)
+            embeddings = CachedEmbeddings(embeddings, "hash-benchmark", Config.QUERY_EMBEDDING_CACHE_SIZE)
+
+        print(f"⏳ 합성 코퍼스 {args.corpus_size}개 청크 인덱싱 중... ({args.vector_backend})")
+        start = time.perf_counter()
+        db_manager, bm25_index = build_stores(embeddings, args.corpus_size, work_dir, args.vector_backend)
+        print(f"   ✅ 완료 ({time.perf_counter() - start:.1f}초)")
+
+        chain_logger = ChainLogger(log_dir=str(work_dir / "logs"))
+        service = AnalysisService(
+            embeddings=embeddings,
+            db_manager=db_manager,
+            llm=FakeChatModel(
+                latency_ms=args.llm_latency_ms,
+                output_tokens=args.llm_tokens,
+                tokens_per_second=args.tokens_per_second,
+                jitter=args.llm_jitter,
+            ),
+            bm25_index=bm25_index,
+            chain_logger=chain_logger,
+            uploader=make_uploader(args.upload_ms),
+        )
+
+        images = make_images(args.images)
+        requests = [
+            AnalysisRequest(image_data=images[i % len(images)], user_state=user_state)
+            for i, user_state in enumerate(make_queries(args.warmup + args.requests * len(args.concurrency), seed=2))
+        ]
+        try:
+            asyncio.run(run(args, service, requests))
+        finally:
+            chain_logger.close()
+            print(f"\n📝 로그 기록 {chain_logger.written}건, 버림 {chain_logger.dropped}건")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+"""
+벡터 DB 백엔드 벤치마크
+Chroma(HNSW)와 ExactVectorStore(memmap float16/float32 정확 검색)를 합성 정규화 벡터에서 비교합니다.
+
+측정 항목:
+- 적재 시간
+- 쿼리 지연 시간 (p50/p99, 문서 조회 포함)
+- 메모리 (저장소 열기 직후 / 쿼리 후 RSS 증가량)
+- recall@k: float32 정확 검색 결과 대비
+
+백엔드마다 별도 프로세스에서 실행하여 메모리를 독립적으로 측정합니다.
+memmap 행렬은 OS 페이지 캐시에 올라가므로 여러 워커 프로세스가 같은 물리 메모리를 공유합니다.
+
+Usage:
+    python benchmarks/bench_vector_store.py
+    python benchmarks/bench_vector_store.py --backends chroma numpy-float16 --size 100000 --dim 1024 --queries 200
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# PROJECT_ROOT 설정
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+os.environ['PROJECT_ROOT'] = str(PROJECT_ROOT)
+os.environ.setdefault("OPEN_API_KEY", "benchmark")
+
+import numpy as np
+
+from benchmarks.bench_embeddings import current_rss_mb
+
+UPSERT_BATCH_SIZE = 1000
+
+
+def make_vectors(count, dim, seed):
+    """군집 구조가 있는 합성 정규화 벡터 (실제 임베딩처럼 이웃 간 유사도가 높음)"""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(1, count // 100), dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), count)] + 0.5 * rng.standard_normal((count, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def open_store(backend, persist_dir):
+    """백엔드 저장소 열기 (numpy는 "numpy-float16" / "numpy-float32"처럼 저장 dtype 지정 가능)"""
+    if backend.startswith("numpy"):
+        from app.core.exact_store import ExactVectorStore
+        dtype = backend.split("-", 1)[1] if "-" in backend else None
+        return ExactVectorStore(persist_directory=persist_dir, dtype=dtype)
+
+    from langchain_chroma import Chroma
+    return Chroma(persist_directory=persist_dir)
+
+
+def search(backend, store, vector, k):
+    """벡터로 검색하여 (id 리스트) 반환"""
+    if backend.startswith("numpy"):
+        results = store.similarity_search_by_vector_with_score(vector, k=k)
+    else:
+        results = store.similarity_search_by_vector_with_relevance_scores(vector, k=k)
+    return [doc.id for doc, _ in results]
+
+
+def run_worker(backend, work_dir, k):
+    """(자식 프로세스) 백엔드 하나를 적재하고 측정 결과를 저장"""
+    corpus = np.load(work_dir / "corpus.npy", mmap_mode="r")
+    queries = np.load(work_dir / "queries.npy")
+    persist_dir = str(work_dir / f"{backend}_store")
+
+    # 적재
+    store = open_store(backend, persist_dir)
+    start = time.perf_counter()
+    for offset in range(0, len(corpus), UPSERT_BATCH_SIZE):
+        vectors = np.asarray(corpus[offset:offset + UPSERT_BATCH_SIZE])
+        ids = [str(i) for i in range(offset, offset + len(vectors))]
+        documents = [f"chunk {i}" for i in ids]
+        metadatas = [{"source": f"paper{int(i) // 50}.pdf"} for i in ids]
+        target = store if backend.startswith("numpy") else store._collection
+        target.upsert(ids=ids, embeddings=vectors.tolist(), documents=documents, metadatas=metadatas)
+    build_s = time.perf_counter() - start
+    del store
+
+    # 새 프로세스 상태에 가깝게 다시 열어서 측정
+    rss_before = current_rss_mb()
+    store = open_store(backend, persist_dir)
+    rss_open = current_rss_mb()
+
+    search(backend, store, queries[0].tolist(), k)  # 워밍업
+    latencies = []
+    results = []
+    for vector in queries:
+        start = time.perf_counter()
+        results.append(search(backend, store, vector.tolist(), k))
+        latencies.append((time.perf_counter() - start) * 1000)
+    rss_query = current_rss_mb()
+
+    p50, p99 = np.percentile(latencies, [50, 99])
+    stats = {
+        "backend": backend,
+        "build_s": build_s,
+        "p50_ms": float(p50),
+        "p99_ms": float(p99),
+        "rss_open_mb": rss_open - rss_before,
+        "rss_query_mb": rss_query - rss_before,
+        "results": results,
+    }
+    with open(work_dir / f"{backend}_stats.json", "w") as f:
+        json.dump(stats, f)
+
+
+def exact_top_k(corpus, queries, k):
+    """float32 정확 top-k (정답)"""
+    scores = queries @ np.asarray(corpus).T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return [{str(i) for i in row} for row in top]
+
+
+def main():
+    """벤치마크 실행"""
+    parser = argparse.ArgumentParser(description="벡터 DB 백엔드 벤치마크")
+    parser.add_argument("--backends", nargs="+", default=["chroma", "numpy-float16", "numpy-float32"], help="비교할 백엔드")
+    parser.add_argument("--size", type=int, default=50000, help="벡터 수")
+    parser.add_argument("--dim", type=int, default=1024, help="벡터 차원 (multilingual-e5-large: 1024)")
+    parser.add_argument("--queries", type=int, default=200, help="쿼리 수")
+    parser.add_argument("--k", type=int, default=7, help="top-k")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--work-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, Path(args.work_dir), args.k)
+        return 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        corpus = make_vectors(args.size, args.dim, seed=0)
+        # 쿼리는 코퍼스 벡터에 잡음을 더해 만듦 (실제 질의처럼 가까운 이웃이 존재)
+        rng = np.random.default_rng(1)
+        queries = corpus[rng.integers(0, args.size, args.queries)] + 0.3 * rng.standard_normal((args.queries, args.dim)).astype(np.float32) / np.sqrt(args.dim)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+        np.save(work_dir / "corpus.npy", corpus)
+        np.save(work_dir / "queries.npy", queries)
+        truth = exact_top_k(corpus, queries, args.k)
+        del corpus
+
+        results = []
+        for backend in args.backends:
+            print(f"⏳ {backend} 측정 중... (벡터 {args.size}개 x {args.dim}차원, 쿼리 {args.queries}개)")
+            subprocess.run(
+                [sys.executable, __file__, "--worker", backend, "--work-dir", str(work_dir), "--k", str(args.k)],
+                check=True,
+            )
+            with open(work_dir / f"{backend}_stats.json") as f:
+                stats = json.load(f)
+            stats["recall"] = float(np.mean([len(set(found) & expected) / args.k for found, expected in zip(stats.pop("results"), truth)]))
+            results.append(stats)
+
+    print()
+    print(f"{'backend':<14} {'build(s)':>9} {'p50(ms)':>8} {'p99(ms)':>8} {'RSS open(MB)':>13} {'RSS query(MB)':>14} {f'recall@{args.k}':>10}")
+    for stats in results:
+        print(
+            f"{stats['backend']:<14} {stats['build_s']:>9.1f} {stats['p50_ms']:>8.2f} {stats['p99_ms']:>8.2f} "
+            f"{stats['rss_open_mb']:>13.0f} {stats['rss_query_mb']:>14.0f} {stats['recall']:>10.3f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
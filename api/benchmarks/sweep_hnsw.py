@@ -0,0 +1,208 @@
+"""
+Chroma HNSW 파라미터 스윕
+거리 함수 / M / ef_construction 조합마다 컬렉션을 새로 만들고, ef_search를 바꿔 가며
+정확 검색 대비 recall@TOP_K와 쿼리 지연 시간(p50/p99)을 측정합니다.
+
+벡터 출처:
+- 기본: 현재 벡터 DB(Config.CHROMA_DB_PATH / CHROMA_COLLECTION_NAME)에 저장된 임베딩
+- --synthetic N: 군집 구조가 있는 합성 정규화 벡터 N개 (벡터 DB가 없을 때)
+
+쿼리는 코퍼스 벡터에 잡음을 더해 만듭니다 (가까운 이웃이 존재하는 실제 질의와 비슷한 분포).
+
+Chroma는 프로세스에 한 번 올린 HNSW 인덱스에 ef_search 변경을 반영하지 않으므로,
+구축과 ef_search별 측정은 각각 별도 프로세스에서 실행합니다 (서비스도 로드 직후 ef_search를 적용).
+
+Usage:
+    python benchmarks/sweep_hnsw.py
+    python benchmarks/sweep_hnsw.py --synthetic 100000 --M 8 16 32 --ef-construction 100 200 --ef-search 10 20 50 100
+    python benchmarks/sweep_hnsw.py --distance l2 cosine --target-recall 0.99
+"""
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# PROJECT_ROOT 설정
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+os.environ['PROJECT_ROOT'] = str(PROJECT_ROOT)
+os.environ.setdefault("OPEN_API_KEY", "benchmark")
+
+import numpy as np
+from langchain_chroma import Chroma
+
+from app.core.config import Config
+from benchmarks.bench_vector_store import exact_top_k, make_vectors
+
+UPSERT_BATCH_SIZE = 1000
+
+
+def load_corpus(limit=None):
+    """현재 벡터 DB의 임베딩 로드 (정규화)"""
+    store = Chroma(collection_name=Config.CHROMA_COLLECTION_NAME, persist_directory=Config.CHROMA_DB_PATH)
+    collection = store._collection
+    total = collection.count()
+    if limit:
+        total = min(total, limit)
+
+    vectors = []
+    for offset in range(0, total, UPSERT_BATCH_SIZE):
+        batch = collection.get(limit=min(UPSERT_BATCH_SIZE, total - offset), offset=offset, include=["embeddings"])
+        vectors.append(np.asarray(batch["embeddings"], dtype=np.float32))
+    if not vectors:
+        return np.zeros((0, 0), dtype=np.float32)
+
+    corpus = np.concatenate(vectors)
+    corpus /= np.clip(np.linalg.norm(corpus, axis=1, keepdims=True), 1e-12, None)
+    return corpus
+
+
+def make_queries(corpus, count, seed=1):
+    """코퍼스 벡터 + 잡음 (정규화)"""
+    rng = np.random.default_rng(seed)
+    dim = corpus.shape[1]
+    queries = corpus[rng.integers(0, len(corpus), count)] + 1.0 * rng.standard_normal((count, dim)).astype(np.float32) / np.sqrt(dim)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return queries
+
+
+def open_collection(persist_dir, name, distance, m, ef_construction, ef_search=None):
+    """주어진 HNSW 설정으로 컬렉션 열기 (없으면 생성)"""
+    hnsw = {"space": distance, "max_neighbors": m, "ef_construction": ef_construction}
+    if ef_search is not None:
+        hnsw["ef_search"] = ef_search
+    return Chroma(collection_name=name, persist_directory=persist_dir, collection_configuration={"hnsw": hnsw})
+
+
+def run_build(work_dir, setting):
+    """(자식 프로세스) 컬렉션 생성 후 적재 시간 기록"""
+    corpus = np.load(work_dir / "corpus.npy", mmap_mode="r")
+    store = open_collection(str(work_dir / "chroma"), setting["name"], setting["distance"], setting["M"], setting["ef_construction"])
+    start = time.perf_counter()
+    for offset in range(0, len(corpus), UPSERT_BATCH_SIZE):
+        vectors = np.asarray(corpus[offset:offset + UPSERT_BATCH_SIZE])
+        ids = [str(i) for i in range(offset, offset + len(vectors))]
+        store._collection.upsert(ids=ids, embeddings=vectors.tolist(), documents=[f"chunk {i}" for i in ids])
+    return {"build_s": time.perf_counter() - start}
+
+
+def run_measure(work_dir, setting):
+    """(자식 프로세스) ef_search 적용 후 recall@k, p50/p99 측정 (문서 조회 포함, 서비스와 같은 경로)"""
+    queries = np.load(work_dir / "queries.npy")
+    with open(work_dir / "truth.json") as f:
+        truth = [set(ids) for ids in json.load(f)]
+    k = len(next(iter(truth)))
+
+    store = open_collection(str(work_dir / "chroma"), setting["name"], setting["distance"], setting["M"], setting["ef_construction"])
+    store._collection.modify(configuration={"hnsw": {"ef_search": setting["ef_search"]}})
+
+    store.similarity_search_by_vector_with_relevance_scores(queries[0].tolist(), k=k)  # 워밍업
+    latencies = []
+    recalls = []
+    for vector, expected in zip(queries, truth):
+        start = time.perf_counter()
+        results = store.similarity_search_by_vector_with_relevance_scores(vector.tolist(), k=k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(len({doc.id for doc, _ in results} & expected) / k)
+    p50, p99 = np.percentile(latencies, [50, 99])
+    return {"recall": float(np.mean(recalls)), "p50_ms": float(p50), "p99_ms": float(p99)}
+
+
+def run_worker(mode, work_dir, setting):
+    """자식 프로세스 실행 후 결과(JSON) 반환"""
+    result_path = work_dir / "result.json"
+    subprocess.run(
+        [sys.executable, __file__, "--worker", mode, "--work-dir", str(work_dir), "--setting", json.dumps(setting)],
+        check=True,
+    )
+    with open(result_path) as f:
+        return json.load(f)
+
+
+def main():
+    """스윕 실행"""
+    parser = argparse.ArgumentParser(description="Chroma HNSW 파라미터 스윕")
+    parser.add_argument("--synthetic", type=int, help="합성 벡터 수 (지정하지 않으면 현재 벡터 DB 사용)")
+    parser.add_argument("--dim", type=int, default=1024, help="합성 벡터 차원")
+    parser.add_argument("--limit", type=int, help="벡터 DB에서 사용할 최대 청크 수")
+    parser.add_argument("--queries", type=int, default=200, help="쿼리 수")
+    parser.add_argument("--k", type=int, default=Config.TOP_K, help="recall@k의 k (기본: TOP_K)")
+    parser.add_argument("--distance", nargs="+", default=[Config.VECTOR_DISTANCE], choices=["l2", "cosine", "ip"])
+    parser.add_argument("--M", nargs="+", type=int, default=[8, 16, 32])
+    parser.add_argument("--ef-construction", nargs="+", type=int, default=[100, 200])
+    parser.add_argument("--ef-search", nargs="+", type=int, default=[10, 20, 50, 100])
+    parser.add_argument("--target-recall", type=float, default=0.99, help="추천 설정을 고를 최소 recall")
+    parser.add_argument("--worker", choices=["build", "measure"], help=argparse.SUPPRESS)
+    parser.add_argument("--work-dir", help=argparse.SUPPRESS)
+    parser.add_argument("--setting", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        work_dir = Path(args.work_dir)
+        run = run_build if args.worker == "build" else run_measure
+        result = run(work_dir, json.loads(args.setting))
+        with open(work_dir / "result.json", "w") as f:
+            json.dump(result, f)
+        return 0
+
+    if args.synthetic:
+        corpus = make_vectors(args.synthetic, args.dim, seed=0)
+        source = f"합성 {args.synthetic}개 x {args.dim}차원"
+    else:
+        corpus = load_corpus(args.limit)
+        source = f"{Config.CHROMA_DB_PATH} ({Config.CHROMA_COLLECTION_NAME})"
+    if len(corpus) == 0:
+        print("❌ 벡터가 없습니다. 먼저 인덱싱하거나 --synthetic N 을 사용하세요.")
+        return 1
+
+    k = min(args.k, len(corpus))
+    queries = make_queries(corpus, args.queries)
+    truth = exact_top_k(corpus, queries, k)
+    print(f"📊 {source}: 벡터 {len(corpus)}개, 쿼리 {len(queries)}개, k={k}")
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = Path(tmp)
+        np.save(work_dir / "corpus.npy", corpus)
+        np.save(work_dir / "queries.npy", queries)
+        with open(work_dir / "truth.json", "w") as f:
+            json.dump([sorted(ids) for ids in truth], f)
+        del corpus
+
+        for i, (distance, m, ef_construction) in enumerate(itertools.product(args.distance, args.M, args.ef_construction)):
+            setting = {"name": f"sweep{i}", "distance": distance, "M": m, "ef_construction": ef_construction}
+            print(f"⏳ 구축: distance={distance}, M={m}, ef_construction={ef_construction}")
+            build = run_worker("build", work_dir, setting)
+            for ef_search in args.ef_search:
+                result = run_worker("measure", work_dir, {**setting, "ef_search": ef_search})
+                rows.append({**setting, "ef_search": ef_search, **build, **result})
+
+    print()
+    print(f"{'distance':<9} {'M':>4} {'ef_c':>6} {'ef_s':>6} {'build(s)':>9} {f'recall@{k}':>10} {'p50(ms)':>8} {'p99(ms)':>8}")
+    for row in rows:
+        print(
+            f"{row['distance']:<9} {row['M']:>4} {row['ef_construction']:>6} {row['ef_search']:>6} "
+            f"{row['build_s']:>9.1f} {row['recall']:>10.3f} {row['p50_ms']:>8.2f} {row['p99_ms']:>8.2f}"
+        )
+
+    candidates = [row for row in rows if row["recall"] >= args.target_recall]
+    if candidates:
+        best = min(candidates, key=lambda row: (row["p99_ms"], row["build_s"]))
+        print(
+            f"\n✅ recall ≥ {args.target_recall} 중 p99 최소: distance={best['distance']}, M={best['M']}, "
+            f"ef_construction={best['ef_construction']}, ef_search={best['ef_search']} "
+            f"(recall {best['recall']:.3f}, p99 {best['p99_ms']:.2f}ms)"
+        )
+    else:
+        best = max(rows, key=lambda row: row["recall"])
+        print(f"\n⚠️  recall ≥ {args.target_recall}인 설정 없음. 최고 recall: {best['recall']:.3f} (M={best['M']}, ef_search={best['ef_search']})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,8 +3,11 @@
 수동으로 벡터 DB를 생성하거나 업데이트할 때 사용합니다.
 
 Usage:
-    python scripts/embed_papers.py
+    python scripts/embed_papers.py               # 추가/변경/삭제된 논문만 반영 (증분)
+    python scripts/embed_papers.py --full        # 전체 재인덱싱
+    python scripts/embed_papers.py --bm25-only   # 기존 벡터 DB로 BM25 인덱스만 다시 생성
 """
+import argparse
 import os
 import sys
 from pathlib import Path
@@ -14,18 +17,35 @@ PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 os.environ['PROJECT_ROOT'] = str(PROJECT_ROOT)
 
-from app.core.indexer import DocumentIndexer
+from app.core.indexer import DocumentIndexer, VectorStoreManager
+
+
+def build_bm25_only():
+    """기존 벡터 DB의 청크로 BM25 인덱스만 생성"""
+    indexer = DocumentIndexer()
+    db_manager = VectorStoreManager(indexer.embedding_manager.get_embeddings())
+    db_manager.load_vectorstore()
+    db_manager.build_bm25_index()
+    return db_manager
 
 
 def main():
     """벡터 DB 생성"""
+    parser = argparse.ArgumentParser(description="벡터 DB 생성")
+    parser.add_argument("--full", action="store_true", help="변경 여부와 관계없이 전체 재인덱싱")
+    parser.add_argument("--bm25-only", action="store_true", help="기존 벡터 DB로 BM25 인덱스만 다시 생성")
+    args = parser.parse_args()
+
     print("=" * 80)
     print("벡터 DB 생성 시작")
     print("=" * 80)
 
     try:
-        indexer = DocumentIndexer()
-        db_manager = indexer.build_vectorstore()
+        if args.bm25_only:
+            db_manager = build_bm25_only()
+        else:
+            indexer = DocumentIndexer()
+            db_manager = indexer.build_vectorstore(full=args.full)
 
         if db_manager:
             print("\n" + "=" * 80)
@@ -0,0 +1,261 @@
+"""
+분석 로그 집계 스크립트
+ChainLogger의 SQLite 로그 저장소(Config.LOGS_DIR / Config.LOG_DB_NAME)를 조회합니다.
+
+Usage:
+    python scripts/query_logs.py papers                      # 가장 많이 검색된 논문
+    python scripts/query_logs.py papers --by chunk --limit 50 # 가장 많이 검색된 청크
+    python scripts/query_logs.py latency --day yesterday     # 전체/단계별 p50/p95/p99
+    python scripts/query_logs.py tokens --since 2026-10-01   # 일별 토큰 사용량
+    python scripts/query_logs.py chunk <chunk_id> ...        # 청크 ID로 본문 조회 (벡터 DB)
+    python scripts/query_logs.py trace <request_id>          # 요청 span 트리 (Config.TRACE_DIR)
+    python scripts/query_logs.py trace --slowest 5 --day today
+"""
+import argparse
+import heapq
+import json
+import os
+import sqlite3
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# PROJECT_ROOT 설정
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+os.environ['PROJECT_ROOT'] = str(PROJECT_ROOT)
+
+import numpy as np
+
+from app.core.config import Config
+
+
+def parse_day(value):
+    """YYYY-MM-DD | today | yesterday → YYYY-MM-DD"""
+    if value == "today":
+        return date.today().isoformat()
+    if value == "yesterday":
+        return (date.today() - timedelta(days=1)).isoformat()
+    return date.fromisoformat(value).isoformat()
+
+
+def time_filter(args, column="a.timestamp"):
+    """--day / --since / --until 조건 (timestamp는 ISO 문자열이므로 문자열 비교)"""
+    since, until = args.since, args.until
+    if args.day:
+        since = parse_day(args.day)
+        until = (date.fromisoformat(since) + timedelta(days=1)).isoformat()
+    clauses, params = [], []
+    if since:
+        clauses.append(f"{column} >= ?")
+        params.append(since)
+    if until:
+        clauses.append(f"{column} < ?")
+        params.append(until)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def percentiles(values):
+    """p50/p95/p99"""
+    if not values:
+        return [None, None, None]
+    return [float(p) for p in np.percentile(values, [50, 95, 99])]
+
+
+def fmt(value, spec=".0f"):
+    return "-" if value is None else format(value, spec)
+
+
+def cmd_papers(conn, args):
+    """가장 많이 검색된 논문/청크"""
+    where, params = time_filter(args)
+    key = "r.chunk_id, r.source" if args.by == "chunk" else "r.source"
+    rows = conn.execute(
+        f"""
+        SELECT {key}, COUNT(*) AS hits, COUNT(DISTINCT r.analysis_id) AS requests, AVG(r.rank) AS avg_rank
+        FROM retrievals r JOIN analyses a ON a.id = r.analysis_id
+        {where}
+        GROUP BY {key}
+        ORDER BY hits DESC
+        LIMIT ?
+        """,
+        params + [args.limit],
+    ).fetchall()
+
+    if args.by == "chunk":
+        print(f"{'chunk_id':<24} {'hits':>6} {'requests':>9} {'avg_rank':>9}  source")
+        for chunk_id, source, hits, requests, avg_rank in rows:
+            print(f"{chunk_id or '-':<24} {hits:>6} {requests:>9} {avg_rank:>9.1f}  {source}")
+    else:
+        print(f"{'hits':>6} {'requests':>9} {'avg_rank':>9}  source")
+        for source, hits, requests, avg_rank in rows:
+            print(f"{hits:>6} {requests:>9} {avg_rank:>9.1f}  {source}")
+
+
+def cmd_latency(conn, args):
+    """전체/단계별 지연 시간 분포"""
+    where, params = time_filter(args)
+    totals = [row[0] for row in conn.execute(
+        f"SELECT a.total_ms FROM analyses a{where}{' AND' if where else ' WHERE'} a.total_ms IS NOT NULL", params
+    )]
+
+    stages = {}
+    for stage, duration in conn.execute(
+        f"SELECT s.stage, s.duration_ms FROM stages s JOIN analyses a ON a.id = s.analysis_id{where}", params
+    ):
+        stages.setdefault(stage, []).append(duration)
+
+    print(f"{'stage':<20} {'count':>7} {'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9}")
+    print(f"{'(total)':<20} {len(totals):>7} " + " ".join(f"{fmt(p):>9}" for p in percentiles(totals)))
+    for stage, durations in stages.items():
+        print(f"{stage:<20} {len(durations):>7} " + " ".join(f"{fmt(p):>9}" for p in percentiles(durations)))
+
+
+def cmd_tokens(conn, args):
+    """일별 토큰 사용량"""
+    where, params = time_filter(args)
+    rows = conn.execute(
+        f"""
+        SELECT substr(a.timestamp, 1, 10) AS day, COUNT(*), SUM(a.input_tokens), SUM(a.output_tokens), SUM(a.total_tokens)
+        FROM analyses a{where}
+        GROUP BY day ORDER BY day
+        """,
+        params,
+    ).fetchall()
+
+    print(f"{'day':<11} {'requests':>9} {'input':>10} {'output':>10} {'total':>10} {'total/req':>10}")
+    for day, requests, input_tokens, output_tokens, total_tokens in rows:
+        per_request = total_tokens / requests if total_tokens else None
+        print(
+            f"{day:<11} {requests:>9} {fmt(input_tokens, 'd'):>10} {fmt(output_tokens, 'd'):>10} "
+            f"{fmt(total_tokens, 'd'):>10} {fmt(per_request):>10}"
+        )
+
+
+def cmd_chunk(args):
+    """청크 ID로 벡터 DB에서 본문 조회"""
+    from app.core.indexer import EmbeddingManager, VectorStoreManager
+
+    db_manager = VectorStoreManager(EmbeddingManager().get_embeddings())
+    store = db_manager.load_vectorstore()
+    found = store.get(ids=args.ids, include=["documents", "metadatas"])
+    for chunk_id, text, metadata in zip(found["ids"], found["documents"], found["metadatas"]):
+        print("=" * 80)
+        print(f"{chunk_id}  {metadata.get('source')} (page {metadata.get('page', '-')})")
+        print("-" * 80)
+        print(text)
+    missing = set(args.ids) - set(found["ids"])
+    if missing:
+        print(f"\n⚠️  벡터 DB에 없는 청크: {', '.join(sorted(missing))}")
+
+
+def load_traces(trace_dir):
+    """트레이스 디렉토리의 모든 트레이스 (교체된 파일 포함, 파일명 시각 순)"""
+    for path in sorted(Path(trace_dir).glob("traces_*.jsonl")):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def print_trace(trace):
+    """span 트리 출력 (시작 시각 순, 들여쓰기로 부모-자식 표시)"""
+    children = {}
+    for span in trace["spans"]:
+        children.setdefault(span["parent_id"], []).append(span)
+
+    print(f"🧵 {trace['request_id']}  {trace['name']}  {trace['duration_ms']:.0f}ms")
+
+    def walk(parent_id, depth):
+        for span in sorted(children.get(parent_id, []), key=lambda s: s["start_ms"]):
+            attributes = {k: v for k, v in span["attributes"].items() if not k.startswith("http.")}
+            extra = " ".join(f"{k}={v}" for k, v in attributes.items() if v is not None)
+            error = f"  ❌ {span['error']}" if span["error"] else ""
+            print(f"{'  ' * depth}{span['start_ms']:>8.0f}ms +{span['duration_ms']:>7.0f}ms  {span['name']} [{span['kind']}] {extra}{error}")
+            walk(span["span_id"], depth + 1)
+
+    root = next(span for span in trace["spans"] if span["parent_id"] is None)
+    walk(root["span_id"], 1)
+
+
+def cmd_trace(args):
+    """요청 ID로 span 트리 조회, 또는 가장 느린 요청들의 트리"""
+    if not Path(args.dir).is_dir():
+        print(f"❌ 트레이스 디렉토리가 없습니다: {args.dir}")
+        return 1
+
+    if args.request_id:
+        for trace in load_traces(args.dir):
+            if trace["request_id"] == args.request_id:
+                print_trace(trace)
+                return 0
+        print(f"❌ 트레이스를 찾을 수 없습니다: {args.request_id}")
+        return 1
+
+    since, until = None, None
+    if args.day:
+        since = datetime.fromisoformat(parse_day(args.day)).timestamp()
+        until = since + 24 * 60 * 60
+    traces = (
+        trace for trace in load_traces(args.dir)
+        if since is None or since <= trace["timestamp"] < until
+    )
+    for trace in heapq.nlargest(args.slowest, traces, key=lambda t: t["duration_ms"]):
+        print_trace(trace)
+        print()
+    return 0
+
+
+def main():
+    """로그 집계"""
+    parser = argparse.ArgumentParser(description="분석 로그 집계")
+    parser.add_argument("--db", default=str(Path(Config.LOGS_DIR) / Config.LOG_DB_NAME), help="로그 DB 경로")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    def add_time_args(sub):
+        sub.add_argument("--day", help="하루 (YYYY-MM-DD | today | yesterday)")
+        sub.add_argument("--since", help="시작 (포함, YYYY-MM-DD[THH:MM])")
+        sub.add_argument("--until", help="끝 (미포함, YYYY-MM-DD[THH:MM])")
+
+    papers = subparsers.add_parser("papers", help="가장 많이 검색된 논문/청크")
+    papers.add_argument("--by", choices=["source", "chunk"], default="source")
+    papers.add_argument("--limit", type=int, default=20)
+    add_time_args(papers)
+
+    latency = subparsers.add_parser("latency", help="전체/단계별 p50/p95/p99")
+    add_time_args(latency)
+
+    tokens = subparsers.add_parser("tokens", help="일별 토큰 사용량")
+    add_time_args(tokens)
+
+    chunk = subparsers.add_parser("chunk", help="청크 ID로 본문 조회")
+    chunk.add_argument("ids", nargs="+")
+
+    trace = subparsers.add_parser("trace", help="요청 span 트리")
+    trace.add_argument("request_id", nargs="?", help="X-Request-ID (생략하면 가장 느린 요청들)")
+    trace.add_argument("--slowest", type=int, default=5)
+    trace.add_argument("--day", help="하루 (YYYY-MM-DD | today | yesterday)")
+    trace.add_argument("--dir", default=Config.TRACE_DIR, help="트레이스 디렉토리")
+
+    args = parser.parse_args()
+
+    if args.command == "chunk":
+        cmd_chunk(args)
+        return 0
+    if args.command == "trace":
+        return cmd_trace(args)
+
+    if not Path(args.db).exists():
+        print(f"❌ 로그 DB가 없습니다: {args.db}")
+        return 1
+
+    conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+    try:
+        {"papers": cmd_papers, "latency": cmd_latency, "tokens": cmd_tokens}[args.command](conn, args)
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
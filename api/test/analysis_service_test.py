@@ -0,0 +1,496 @@
+"""
+AnalysisService 테스트
+
+가짜 채팅 모델/업로더와 NumPy 벡터 스토어로 분석 파이프라인을 오프라인 실행합니다.
+"""
+import asyncio
+import json
+from io import BytesIO
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from PIL import Image
+from pydantic import Field
+
+from app.core import metrics, tracing
+from app.core.bm25 import BM25Index, WhitespaceTokenizer
+from app.core.chain_logger import ChainLogger
+from app.core.config import Config
+from app.core.embedding_cache import CachedEmbeddings
+from app.core.indexer import VectorStoreManager
+from app.main import app
+from app.routes import analyze
+from app.schemas.request import AnalysisRequest
+from app.schemas.response import AnalysisResponse
+from app.services.analysis_service import AnalysisService, _merge_with_rrf
+from benchmarks.bench_pipeline import HashEmbeddings
+
+PAPERS = {
+    "dry.pdf": "dry skin needs moisture and barrier care",
+    "oily.pdf": "oily skin needs sebum control and gentle cleansing",
+    "hair.pdf": "hair loss relates to scalp health and stress",
+}
+
+FINAL_ANALYSIS = {
+    category: {"status": f"{category} 상태 양호", "improvement_tips": ["보습", "자외선 차단"]}
+    for category in ("Hair", "Skin", "Contour")
+}
+
+
+class ScriptedChatModel(BaseChatModel):
+    """스키마에 맞는 고정 JSON을 돌려주는 테스트용 채팅 모델 (최종 분석은 조각 단위로 스트리밍)"""
+
+    search_query: str = "dry skin moisture"
+    piece_size: int = 16
+    piece_delay: float = 0.0
+    cancelled: list = Field(default_factory=list)
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    @staticmethod
+    def _schema(messages, kwargs):
+        schema = ((kwargs.get("response_format") or {}).get("json_schema") or {}).get("name")
+        # 구조화 출력이 꺼져 있으면 메시지 구성으로 구분 (최종 분석만 SystemMessage 포함)
+        return schema or ("QueryGeneration" if len(messages) == 1 else "FinalAnalysis")
+
+    def _content(self, messages, kwargs):
+        if self._schema(messages, kwargs) == "QueryGeneration":
+            return json.dumps({
+                "image_analysis": {"hair": "짧은 머리", "skin": "건조함", "contour": "계란형"},
+                "search_query": self.search_query,
+            })
+        return json.dumps(FINAL_ANALYSIS, ensure_ascii=False)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        message = AIMessage(content=self._content(messages, kwargs))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        content = self._content(messages, kwargs)
+        try:
+            for i in range(0, len(content), self.piece_size):
+                await asyncio.sleep(self.piece_delay)
+                yield ChatGenerationChunk(message=AIMessageChunk(content=content[i:i + self.piece_size]))
+        except (asyncio.CancelledError, GeneratorExit):
+            # 취소가 LangChain 스트림을 거쳐 전달되면 제너레이터가 닫힘
+            self.cancelled.append(self._schema(messages, kwargs))
+            raise
+
+
+class CountingEmbeddings(Embeddings):
+    """호출을 기록하며 다른 임베딩에 위임하는 테스트용 임베딩"""
+
+    def __init__(self, base):
+        self.base = base
+        self.query_calls = []
+        self.document_calls = []
+
+    def embed_query(self, text):
+        self.query_calls.append(text)
+        return self.base.embed_query(text)
+
+    def embed_documents(self, texts):
+        self.document_calls.append(list(texts))
+        return self.base.embed_documents(texts)
+
+
+def _jpeg():
+    buffer = BytesIO()
+    Image.new("RGB", (64, 48), (200, 120, 90)).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def make_service(tmp_path, monkeypatch):
+    """분석 서비스 생성 함수 (LLM, 업로더, BM25 인덱스를 바꿔 넣을 수 있음)"""
+    monkeypatch.setattr(Config, "RESPONSE_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "IMAGE_TRANSPORT", "cloudinary")
+    monkeypatch.setattr(Config, "TRACE_EXPORTER", "none")
+    monkeypatch.setattr(tracing, "_exporter", None)
+    embeddings = HashEmbeddings(dim=64)
+    db_manager = VectorStoreManager(embeddings, backend="numpy")
+    db_manager.persist_dir = str(tmp_path / "vector_store")
+    db_manager.open_vectorstore()
+    documents = [
+        (f"chunk-{i}", Document(page_content=text, metadata={"source": source}))
+        for i, (source, text) in enumerate(PAPERS.items())
+    ]
+    vectors = embeddings.embed_documents([doc.page_content for _, doc in documents])
+    db_manager.upsert([(chunk_id, doc, vector) for (chunk_id, doc), vector in zip(documents, vectors)])
+    loggers = []
+
+    def make(llm=None, uploader=None, bm25_index=None, embeddings=embeddings):
+        chain_logger = ChainLogger(str(tmp_path / "logs"), backend="jsonl")
+        loggers.append(chain_logger)
+        return AnalysisService(
+            embeddings=embeddings,
+            db_manager=db_manager,
+            llm=llm or ScriptedChatModel(),
+            bm25_index=bm25_index,
+            chain_logger=chain_logger,
+            uploader=uploader or (lambda image_data: "https://example.com/image.jpg"),
+        )
+
+    yield make
+    for chain_logger in loggers:
+        chain_logger.close()
+    db_manager.vectorstore.close()
+
+
+def _request(user_state="피부가 건조해요"):
+    return AnalysisRequest(image_data=_jpeg(), user_state=user_state)
+
+
+def _parse_sse(text):
+    """SSE 본문을 [(이벤트, 데이터)]로 파싱 (이벤트마다 "event:" 한 줄 + "data:" 한 줄 + 빈 줄)"""
+    assert text.endswith("\n\n")
+    events = []
+    for block in text[:-2].split("\n\n"):
+        event_line, data_line = block.split("\n")
+        assert event_line.startswith("event: ") and data_line.startswith("data: ")
+        events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+    return events
+
+
+def _stream_client(monkeypatch, service):
+    monkeypatch.setattr(analyze, "get_analysis_service", lambda: service)
+    return TestClient(app)
+
+
+def test_stream_emits_stages_tokens_then_result(make_service, monkeypatch):
+    """단계 이벤트와 토큰 이벤트가 먼저 오고, 마지막에 result 이벤트 하나가 오는지 확인"""
+    client = _stream_client(monkeypatch, make_service())
+
+    response = client.post(
+        "/api/analyze/stream",
+        files={"image_file": ("face.jpg", _jpeg(), "image/jpeg")},
+        data={"user_state": "피부가 건조해요"},
+    )
+
+    assert response.status_code == 200
+    events = _parse_sse(response.text)
+    names = [event for event, _ in events]
+    assert names[-1] == "result"
+    assert names.count("result") == 1
+    assert set(names) == {"stage", "token", "result"}
+
+    stages = [data["stage"] for event, data in events if event == "stage"]
+    assert sorted(stages) == sorted(
+        ["prepare_image", "upload", "speculative_search", "generate_query", "search", "generate"]
+    )
+    assert stages.index("upload") < stages.index("generate_query") < stages.index("search") < stages.index("generate")
+    stage_events = {data["stage"]: data for event, data in events if event == "stage"}
+    assert stage_events["generate_query"]["search_query"] == "dry skin moisture"
+    assert stage_events["search"]["references"][0] == "dry.pdf"
+
+    # 토큰은 검색이 끝난 뒤, generate 단계가 끝나기 전에 전달되고 이어 붙이면 최종 분석 JSON
+    token_positions = [i for i, (event, _) in enumerate(events) if event == "token"]
+    search_done = events.index(("stage", stage_events["search"]))
+    generate_done = events.index(("stage", stage_events["generate"]))
+    assert search_done < token_positions[0] and token_positions[-1] < generate_done
+    assert json.loads("".join(data["text"] for event, data in events if event == "token")) == FINAL_ANALYSIS
+
+    result = events[-1][1]
+    assert result["status"] == "success"
+    assert result["analysis"] == FINAL_ANALYSIS
+    assert result["references"][0] == "dry.pdf"
+
+
+def test_stream_reports_pipeline_failure_as_error_event(make_service, monkeypatch):
+    """파이프라인이 실패하면 마지막 이벤트가 status="error"인 error 이벤트인지 확인"""
+    def failing_upload(image_data):
+        raise RuntimeError("업로드 실패")
+
+    client = _stream_client(monkeypatch, make_service(uploader=failing_upload))
+
+    response = client.post(
+        "/api/analyze/stream",
+        files={"image_file": ("face.jpg", _jpeg(), "image/jpeg")},
+        data={"user_state": "피부가 건조해요"},
+    )
+
+    assert response.status_code == 200
+    events = _parse_sse(response.text)
+    event, data = events[-1]
+    assert event == "error"
+    assert data["status"] == "error"
+    assert "업로드 실패" in data["error"]
+    assert "result" not in [event for event, _ in events]
+    assert "token" not in [event for event, _ in events]
+
+
+def test_stream_response_framing_and_headers(make_service, monkeypatch):
+    """text/event-stream 응답이 프록시 버퍼링/캐시를 끄는 헤더와 UTF-8 JSON data 줄로 전달되는지 확인"""
+    client = _stream_client(monkeypatch, make_service())
+
+    with client.stream(
+        "POST",
+        "/api/analyze/stream",
+        files={"image_file": ("face.jpg", _jpeg(), "image/jpeg")},
+        data={"user_state": "피부가 건조해요"},
+    ) as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert response.headers["cache-control"] == "no-cache"
+        assert response.headers["x-accel-buffering"] == "no"
+        assert "x-request-id" in response.headers
+        lines = list(response.iter_lines())
+
+    # 이벤트마다 event 줄, data 줄, 빈 줄
+    assert len(lines) % 3 == 0
+    assert all(line == "" for line in lines[2::3])
+    result_line = lines[lines.index("event: result") + 1]
+    assert "상태 양호" in result_line  # ensure_ascii=False
+
+
+def test_stream_invalid_image_is_rejected_before_streaming(make_service, monkeypatch):
+    """디코딩할 수 없는 이미지는 스트림을 시작하지 않고 4xx로 거절하는지 확인"""
+    client = _stream_client(monkeypatch, make_service())
+
+    response = client.post(
+        "/api/analyze/stream",
+        files={"image_file": ("face.jpg", b"not an image", "image/jpeg")},
+        data={"user_state": "피부가 건조해요"},
+    )
+
+    assert response.status_code == 415
+    assert not response.headers["content-type"].startswith("text/event-stream")
+
+
+def test_stream_disconnect_cancels_analysis(make_service):
+    """클라이언트가 중간에 끊으면(스트림 aclose) 분석 태스크와 LLM 스트리밍이 취소되는지 확인"""
+    llm = ScriptedChatModel(piece_size=1, piece_delay=0.01)
+    service = make_service(llm=llm)
+    in_flight = metrics.ANALYSES_IN_FLIGHT._value.get()
+
+    async def consume_until_first_token():
+        stream = service.aanalyze_stream(_request())
+        async for event, _ in stream:
+            if event == "token":
+                break
+        await stream.aclose()
+        # 취소가 전파될 시간
+        await asyncio.sleep(0.05)
+        return [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+    remaining = asyncio.run(consume_until_first_token())
+
+    assert remaining == []
+    assert llm.cancelled == ["FinalAnalysis"]
+    assert metrics.ANALYSES_IN_FLIGHT._value.get() == in_flight
+
+
+def _doc(source, text=None):
+    return Document(page_content=text or f"{source} text", metadata={"source": source})
+
+
+def _bm25_index(tmp_path):
+    records = [(f"chunk-{i}", text, {"source": source}) for i, (source, text) in enumerate(PAPERS.items())]
+    return BM25Index.build(records, index_dir=tmp_path / "bm25", tokenizer=WhitespaceTokenizer())
+
+
+def test_rrf_ranks_documents_found_by_several_retrievers_first():
+    """여러 결과에 함께 나온 문서가 위로 오고, 나머지는 순위 1/(k + rank) 점수 순인지 확인"""
+    a, b, c, d = _doc("a"), _doc("b"), _doc("c"), _doc("d")
+
+    merged, scores = _merge_with_rrf([a, b, c], [b, d], k=60)
+
+    assert [doc.metadata["source"] for doc in merged] == ["b", "a", "d", "c"]
+    assert scores["b"] == pytest.approx(1 / 62 + 1 / 61)
+    assert scores["a"] == pytest.approx(1 / 61)
+    assert scores["d"] == pytest.approx(1 / 62)
+    assert scores["c"] == pytest.approx(1 / 63)
+    assert list(scores) == ["b", "a", "d", "c"]
+
+
+def test_rrf_deduplicates_identical_chunks():
+    """Dense와 BM25가 각자 돌려준 같은 본문의 청크는 하나로 합치고, 본문이 다르면 같은 논문이라도 따로 유지하는지 확인"""
+    dense = [_doc("paper.pdf", "barrier care"), _doc("paper.pdf", "sebum control")]
+    sparse = [_doc("paper.pdf", "barrier care")]
+
+    merged, scores = _merge_with_rrf(dense, sparse, k=60)
+
+    assert [doc.page_content for doc in merged] == ["barrier care", "sebum control"]
+    assert merged[0] is dense[0]
+
+
+def test_fuse_candidates_merges_dense_and_bm25_and_cuts_to_top_k(make_service, monkeypatch):
+    """Dense + BM25 결과를 RRF로 병합해 상위 TOP_K개만 남기고, 항목별 점수를 기록하는지 확인"""
+    monkeypatch.setattr(Config, "TOP_K", 2)
+    service = make_service()
+    candidate = {
+        "dense": [(_doc("a"), 0.9), (_doc("b"), 0.8), (_doc("c"), 0.7)],
+        "sparse": [(_doc("c"), 5.0), (_doc("d"), 3.0)],
+    }
+
+    results, metadata = service._fuse_candidates([candidate])
+
+    # c는 두 결과에 모두 있어 1위, a는 Dense 1위
+    assert [doc.metadata["source"] for doc in results] == ["c", "a"]
+    assert [item["rank"] for item in metadata] == [1, 2]
+    assert metadata[0]["dense_score"] == 0.7
+    assert metadata[0]["bm25_score"] == 5.0
+    assert metadata[0]["rrf_score"] == pytest.approx(1 / 63 + 1 / 61)
+    assert metadata[1]["bm25_score"] is None
+
+
+def test_fuse_candidates_uses_dense_order_without_bm25(make_service, monkeypatch):
+    """BM25 결과 없이 Dense 결과 하나뿐이면 RRF 없이 Dense 순서를 그대로 쓰는지 확인"""
+    monkeypatch.setattr(Config, "TOP_K", 2)
+    service = make_service()
+    candidate = {"dense": [(_doc("a"), 0.9), (_doc("b"), 0.8), (_doc("c"), 0.7)], "sparse": []}
+
+    results, metadata = service._fuse_candidates([candidate])
+
+    assert [doc.metadata["source"] for doc in results] == ["a", "b"]
+    assert metadata[0]["rrf_score"] == 0.9
+
+
+def test_hybrid_search_feeds_fused_top_k_to_analysis(make_service, monkeypatch, tmp_path):
+    """분석 체인이 Dense + BM25 병합 결과 상위 TOP_K개를 참고문헌으로 받는지 확인"""
+    monkeypatch.setattr(Config, "TOP_K", 2)
+    llm = ScriptedChatModel(search_query="sebum control")
+    service = make_service(llm=llm, bm25_index=_bm25_index(tmp_path))
+
+    response = asyncio.run(service.aanalyze(_request("oily skin sebum")))
+
+    assert response.status == "success"
+    assert response.references[0] == "oily.pdf"
+    assert len(response.references) == 2
+
+
+class ScriptedSearch:
+    """쿼리별로 정해진 문서를 돌려주는 _search_candidates 대체 (fail에 든 쿼리는 처음 한 번 실패)"""
+
+    def __init__(self, results, fail=()):
+        self.results = results
+        self.fail = set(fail)
+        self.queries = []
+
+    def __call__(self, query):
+        self.queries.append(query)
+        if query in self.fail:
+            self.fail.discard(query)
+            raise RuntimeError("벡터 DB 연결 실패")
+        return {"dense": [(_doc(source), 0.5) for source in self.results[query]], "sparse": []}
+
+
+def _analyze_with_search(make_service, monkeypatch, search, llm=None):
+    service = make_service(llm=llm)
+    monkeypatch.setattr(service, "_search_candidates", search)
+    return asyncio.run(service.aanalyze(_request("피부가 건조해요")))
+
+
+def test_speculative_results_are_fused_with_optimized_query_results(make_service, monkeypatch):
+    """최적화된 쿼리 검색 결과와 원본 입력으로 미리 검색한 결과를 함께 병합하는지 확인"""
+    search = ScriptedSearch({
+        "dry skin moisture": ["optimized-1.pdf", "both.pdf"],
+        "피부가 건조해요": ["both.pdf", "speculative-1.pdf"],
+    })
+
+    response = _analyze_with_search(make_service, monkeypatch, search)
+
+    assert response.status == "success"
+    assert sorted(search.queries) == sorted(["dry skin moisture", "피부가 건조해요"])
+    # 두 결과에 모두 있는 문서가 1위, 같은 점수는 최적화된 쿼리 결과가 먼저
+    assert response.references == ["both.pdf", "optimized-1.pdf", "speculative-1.pdf"]
+
+
+def test_failed_speculative_search_falls_back_to_optimized_query(make_service, monkeypatch):
+    """미리 검색이 실패해도 분석은 계속되고 최적화된 쿼리 검색 결과만 쓰는지 확인"""
+    search = ScriptedSearch(
+        {"dry skin moisture": ["optimized-1.pdf", "optimized-2.pdf"], "피부가 건조해요": ["speculative-1.pdf"]},
+        fail=["피부가 건조해요"],
+    )
+
+    response = _analyze_with_search(make_service, monkeypatch, search)
+
+    assert response.status == "success"
+    assert response.references == ["optimized-1.pdf", "optimized-2.pdf"]
+
+
+def test_missing_optimized_query_uses_speculative_results(make_service, monkeypatch):
+    """쿼리 생성 결과가 없으면 다시 검색하지 않고 미리 검색한 결과를 그대로 쓰는지 확인"""
+    search = ScriptedSearch({"피부가 건조해요": ["speculative-1.pdf", "speculative-2.pdf"]})
+
+    response = _analyze_with_search(make_service, monkeypatch, search, llm=ScriptedChatModel(search_query="  "))
+
+    assert response.status == "success"
+    assert search.queries == ["피부가 건조해요"]
+    assert response.references == ["speculative-1.pdf", "speculative-2.pdf"]
+
+
+def test_search_retries_user_state_when_both_lists_are_missing(make_service, monkeypatch):
+    """쿼리 생성 결과도 없고 미리 검색도 실패하면 원본 입력으로 다시 검색하는지 확인"""
+    search = ScriptedSearch({"피부가 건조해요": ["speculative-1.pdf"]}, fail=["피부가 건조해요"])
+
+    response = _analyze_with_search(make_service, monkeypatch, search, llm=ScriptedChatModel(search_query="  "))
+
+    assert response.status == "success"
+    assert search.queries == ["피부가 건조해요", "피부가 건조해요"]
+    assert response.references == ["speculative-1.pdf"]
+
+
+def _collect_batch(service, requests, concurrency=None):
+    async def collect():
+        return [item async for item in service.aanalyze_batch(requests, concurrency=concurrency)]
+    return asyncio.run(collect())
+
+
+def test_batch_limits_concurrent_analyses(make_service, monkeypatch):
+    """동시에 분석하는 요청 수가 concurrency를 넘지 않는지 확인"""
+    service = make_service()
+    running, peak = 0, 0
+
+    async def slow_analyze(request):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return AnalysisResponse(status="success", analysis={}, references=[request.user_state])
+
+    monkeypatch.setattr(service, "aanalyze", slow_analyze)
+
+    results = _collect_batch(service, [_request(f"상태 {i}") for i in range(7)], concurrency=2)
+
+    assert peak == 2
+    assert sorted(index for index, _ in results) == list(range(7))
+
+
+def test_batch_maps_results_to_input_order_and_isolates_failures(make_service):
+    """끝나는 순서와 상관없이 각 결과가 자기 요청 인덱스로 돌아오고, 실패한 항목만 error인지 확인"""
+    service = make_service()
+    requests = [
+        _request("dry skin moisture"),
+        AnalysisRequest(image_data=b"not an image", user_state="oily skin"),
+        _request("hair loss scalp"),
+    ]
+
+    results = dict(_collect_batch(service, requests, concurrency=3))
+
+    assert sorted(results) == [0, 1, 2]
+    assert results[0].status == "success"
+    assert results[2].status == "success"
+    assert results[1].status == "error"
+    assert results[1].error
+
+
+def test_batch_primes_query_embeddings_in_one_call(make_service):
+    """배치의 user_state를 한 번의 배치 임베딩으로 계산하고, 이후 분석은 캐시를 쓰는지 확인"""
+    base = CountingEmbeddings(HashEmbeddings(dim=64))
+    service = make_service(embeddings=CachedEmbeddings(base, "model"))
+    requests = [_request("dry skin"), _request("oily skin"), _request("dry skin")]
+
+    results = _collect_batch(service, requests)
+
+    assert all(response.status == "success" for _, response in results)
+    assert base.document_calls == [["dry skin", "oily skin"]]
+    # 원본 user_state 검색은 캐시된 임베딩 사용 (최적화된 쿼리만 새로 임베딩)
+    assert "dry skin" not in base.query_calls and "oily skin" not in base.query_calls
@@ -0,0 +1,128 @@
+"""
+BM25 인덱스 테스트
+"""
+import json
+import math
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from app.core.bm25 import BM25Index, CharNgramTokenizer, WhitespaceTokenizer
+
+
+RECORDS = [
+    ("d0", "dry skin needs moisture and ceramide", {"source": "a.pdf"}),
+    ("d1", "oily skin oily skin sebum control", {"source": "b.pdf"}),
+    ("d2", "sunscreen protects skin from uv", {"source": "c.pdf"}),
+    ("d3", "retinol and vitamin c for wrinkles", {"source": "d.pdf"}),
+]
+
+
+def _reference_scores(records, query, k1=1.5, b=0.75):
+    """BM25 정의를 그대로 계산한 기준 점수 (쿼리 토큰 빈도만큼 가중)"""
+    docs = [text.lower().split() for _, text, _ in records]
+    avgdl = sum(len(doc) for doc in docs) / len(docs)
+    scores = np.zeros(len(docs))
+    for token, query_tf in Counter(query.lower().split()).items():
+        df = sum(token in doc for doc in docs)
+        if df == 0:
+            continue
+        idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+        for i, doc in enumerate(docs):
+            tf = doc.count(token)
+            if tf:
+                scores[i] += query_tf * idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(doc) / avgdl))
+    return scores
+
+
+@pytest.fixture
+def index(tmp_path):
+    return BM25Index.build(RECORDS, index_dir=tmp_path / "bm25", tokenizer=WhitespaceTokenizer())
+
+
+@pytest.mark.parametrize("query", ["oily skin", "skin skin uv", "ceramide retinol", "unknown words"])
+def test_csr_scores_match_bm25_definition(index, query):
+    """미리 계산한 CSR 가중치로 구한 점수가 BM25 정의와 일치하는지 확인"""
+    np.testing.assert_allclose(index.get_scores(query), _reference_scores(RECORDS, query), rtol=1e-5)
+
+
+def test_csr_matrix_shape_and_rows(index):
+    """가중치 행렬이 토큰 x 문서 CSR 형태이고 토큰 행이 해당 토큰을 가진 문서만 담는지 확인"""
+    assert index.weights.shape == (len(index.vocab), len(RECORDS))
+    row = index.weights[index.vocab["oily"]]
+    assert row.indices.tolist() == [1]
+    assert index.weights[index.vocab["skin"]].indices.tolist() == [0, 1, 2]
+
+
+def test_search_orders_by_score_and_drops_zero_scores(index):
+    """점수 내림차순으로 반환하고 점수 0인 문서는 제외하는지 확인"""
+    results = index.search("oily skin", k=4)
+
+    assert results[0][0].id == "d1"
+    assert {doc.id for doc, _ in results} == {"d0", "d1", "d2"}
+    scores = [score for _, score in results]
+    assert scores == sorted(scores, reverse=True)
+    assert results[0][0].page_content == RECORDS[1][1]
+    assert results[0][0].metadata == {"source": "b.pdf"}
+
+
+def test_search_limits_to_k(index):
+    """k개까지만 반환하는지 확인"""
+    assert len(index.search("skin", k=2)) == 2
+
+
+def test_load_reads_saved_index(index, tmp_path):
+    """저장된 인덱스를 다시 로드해도 같은 점수를 내는지 확인"""
+    loaded = BM25Index.load(tmp_path / "bm25")
+
+    assert loaded.num_docs == len(RECORDS)
+    assert loaded.meta["tokenizer"] == "whitespace"
+    np.testing.assert_allclose(loaded.get_scores("dry skin"), index.get_scores("dry skin"))
+
+
+def test_rebuild_replaces_existing_index(index, tmp_path):
+    """같은 경로에 다시 생성하면 기존 인덱스를 교체하고 임시 디렉토리를 남기지 않는지 확인"""
+    rebuilt = BM25Index.build(RECORDS[:2], index_dir=tmp_path / "bm25", tokenizer=WhitespaceTokenizer())
+
+    assert rebuilt.num_docs == 2
+    assert BM25Index.load(tmp_path / "bm25").num_docs == 2
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["bm25", "bm25.lock"]
+
+
+def test_empty_index_returns_no_results(tmp_path):
+    """문서가 없는 인덱스도 생성/검색되는지 확인"""
+    index = BM25Index.build([], index_dir=tmp_path / "bm25", tokenizer=WhitespaceTokenizer())
+
+    assert index.search("skin") == []
+
+
+def test_load_rejects_other_index_version(index, tmp_path):
+    """다른 버전의 인덱스는 로드하지 않는지 확인"""
+    meta_path = tmp_path / "bm25" / "meta.json"
+    meta = json.loads(meta_path.read_text())
+    meta["version"] = 1
+    meta_path.write_text(json.dumps(meta))
+
+    with pytest.raises(ValueError):
+        BM25Index.load(tmp_path / "bm25")
+
+
+def test_load_missing_index_raises(tmp_path):
+    """인덱스가 없으면 FileNotFoundError"""
+    with pytest.raises(FileNotFoundError):
+        BM25Index.load(tmp_path / "missing")
+
+
+def test_ngram_tokenizer_splits_korean_words():
+    """한글 어절은 2-gram으로, 영어/숫자 단어는 그대로 토큰화하는지 확인"""
+    assert CharNgramTokenizer()("피부가 건조해요 UV") == ["피부", "부가", "건조", "조해", "해요", "uv"]
+    assert CharNgramTokenizer()("spf50 피부") == ["spf50", "피부"]
+
+
+def test_ngram_tokenizer_matches_inflected_korean(tmp_path):
+    """조사가 붙은 어절도 n-gram 토큰으로 매칭되는지 확인"""
+    records = [("k0", "건조한 피부에는 보습제", {}), ("k1", "지성 피부 피지 조절", {})]
+    index = BM25Index.build(records, index_dir=tmp_path / "bm25", tokenizer=CharNgramTokenizer())
+
+    assert index.search("건조", k=2)[0][0].id == "k0"
@@ -0,0 +1,241 @@
+"""
+분석 로그(ChainLogger) 테스트
+"""
+import contextvars
+import json
+import sqlite3
+import threading
+
+import pytest
+from langchain_core.documents import Document
+
+from app.core import chain_logger, tracing
+from app.core.chain_logger import ChainLogger, JsonlLogWriter, SqliteLogWriter
+from app.core.config import Config
+
+
+DOCS = [
+    Document(id="chunk-1", page_content="dry skin", metadata={"source": "a.pdf", "page": 3}),
+    Document(id="chunk-2", page_content="oily skin", metadata={"source": "b.pdf"}),
+]
+SEARCH_METADATA = [
+    {"dense_score": 0.9, "bm25_score": 3.2, "rrf_score": 0.03},
+    {"dense_score": 0.7, "bm25_score": None, "rrf_score": 0.01},
+]
+ANALYSIS = {"Hair": {"status": "건조", "improvement_tips": ["트리트먼트"]}}
+
+
+def _save(logger, user_state="건조해요", **kwargs):
+    return logger.save_analysis(
+        image_url="https://example.com/a.jpg",
+        user_state=user_state,
+        search_results=DOCS,
+        analysis=ANALYSIS,
+        image_detail="low",
+        search_metadata=SEARCH_METADATA,
+        **kwargs,
+    )
+
+
+def _read_jsonl(log_dir, prefix="analysis"):
+    return [
+        json.loads(line)
+        for path in sorted(log_dir.glob(f"{prefix}_*.jsonl"))
+        for line in path.read_text(encoding="utf-8").splitlines()
+    ]
+
+
+def test_jsonl_writer_rotates_by_size(tmp_path, monkeypatch):
+    """LOG_MAX_BYTES를 넘으면 새 파일로 교체하고 레코드는 빠짐없이 남는지 확인"""
+    monkeypatch.setattr(Config, "LOG_MAX_BYTES", 200)
+    writer = JsonlLogWriter(tmp_path)
+
+    for i in range(10):
+        writer.write({"i": i, "text": "x" * 50})
+    writer.close()
+
+    files = sorted(tmp_path.glob("analysis_*.jsonl"))
+    assert len(files) > 1
+    assert all(path.stat().st_size <= 200 for path in files)
+    assert sorted(record["i"] for record in _read_jsonl(tmp_path)) == list(range(10))
+
+
+def test_jsonl_writer_keeps_oversized_record_in_own_file(tmp_path, monkeypatch):
+    """LOG_MAX_BYTES보다 큰 레코드도 버리지 않고 한 파일에 쓰는지 확인"""
+    monkeypatch.setattr(Config, "LOG_MAX_BYTES", 10)
+    writer = JsonlLogWriter(tmp_path)
+
+    writer.write({"text": "x" * 100})
+    writer.write({"text": "y" * 100})
+    writer.close()
+
+    assert len(list(tmp_path.glob("analysis_*.jsonl"))) == 2
+    assert len(_read_jsonl(tmp_path)) == 2
+
+
+def test_jsonl_writer_rotates_by_time(tmp_path, monkeypatch):
+    """LOG_ROTATE_SECONDS가 지나면 새 파일로 교체하는지 확인"""
+    clock = [0.0]
+    monkeypatch.setattr(chain_logger.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(Config, "LOG_ROTATE_SECONDS", 60)
+    writer = JsonlLogWriter(tmp_path, prefix="traces")
+
+    writer.write({"i": 0})
+    clock[0] += 30
+    writer.write({"i": 1})
+    clock[0] += 31
+    writer.write({"i": 2})
+    writer.close()
+
+    files = sorted(tmp_path.glob("traces_*.jsonl"))
+    assert len(files) == 2
+    assert [len(path.read_text().splitlines()) for path in files] == [2, 1]
+
+
+def test_jsonl_backend_writes_records_in_background(tmp_path):
+    """JSONL 백엔드: save_analysis 레코드를 writer 스레드가 저장하고 close 시 남은 레코드를 모두 쓰는지 확인"""
+    logger = ChainLogger(log_dir=str(tmp_path), backend="jsonl")
+    for i in range(5):
+        assert _save(logger, user_state=f"상태 {i}", token_usage={"gpt": {"input_tokens": 10, "output_tokens": 5, "total_tokens": 15}})
+    logger.close()
+
+    records = _read_jsonl(tmp_path)
+    assert [record["metadata"]["input"]["user_state"] for record in records] == [f"상태 {i}" for i in range(5)]
+    papers = records[0]["metadata"]["search"]["papers"]
+    assert [paper["chunk_id"] for paper in papers] == ["chunk-1", "chunk-2"]
+    assert papers[0]["bm25_score"] == 3.2
+    assert "page_content" not in json.dumps(papers)
+    assert records[0]["metadata"]["tokens"]["total_tokens"] == 15
+    assert logger.written == 5
+
+
+class BlockingWriter:
+    """첫 write에서 멈추는 테스트용 writer (큐가 차는 상황 재현)"""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.records = []
+
+    def write(self, record):
+        self.started.set()
+        self.release.wait(5)
+        self.records.append(record)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_full_queue_drops_records(tmp_path):
+    """큐가 가득 차면 drop 정책에 따라 레코드를 버리고 False를 반환하는지 확인"""
+    logger = ChainLogger(log_dir=str(tmp_path), queue_size=1, policy="drop", backend="jsonl")
+    writer = logger._writer = BlockingWriter()
+
+    assert _save(logger, user_state="1")
+    assert writer.started.wait(5)  # writer가 첫 레코드를 꺼내 멈춤
+    assert _save(logger, user_state="2")  # 큐에 대기
+    assert not _save(logger, user_state="3")  # 큐가 가득 차서 버림
+
+    writer.release.set()
+    logger.close()
+
+    assert logger.dropped == 1
+    assert [record["metadata"]["input"]["user_state"] for record in writer.records] == ["1", "2"]
+
+
+def test_save_after_close_is_rejected(tmp_path):
+    """close 이후의 레코드는 받지 않는지 확인"""
+    logger = ChainLogger(log_dir=str(tmp_path), backend="jsonl")
+    logger.close()
+
+    assert not _save(logger)
+
+
+STAGE_TIMINGS = {
+    "total_ms": 1234.5,
+    "stages": {
+        "upload": {"start_ms": 0.0, "end_ms": 300.0, "duration_ms": 300.0},
+        "generate": {"start_ms": 300.0, "end_ms": 1200.0, "duration_ms": 900.0},
+    },
+}
+TOKEN_USAGE = {
+    "gpt-4o-mini": {"input_tokens": 100, "output_tokens": 20, "total_tokens": 120},
+    "gpt-4o": {"input_tokens": 900, "output_tokens": 300, "total_tokens": 1200},
+}
+RAW_RESPONSE = {"search_query": "건조한 피부 보습", "image_analysis": {"skin": "건조"}}
+
+
+def _save_sqlite(tmp_path):
+    logger = ChainLogger(log_dir=str(tmp_path), backend="sqlite")
+    _save(logger, llm_raw_response=RAW_RESPONSE, stage_timings=STAGE_TIMINGS, token_usage=TOKEN_USAGE)
+    logger.close()
+    conn = sqlite3.connect(str(tmp_path / Config.LOG_DB_NAME))
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def test_sqlite_backend_writes_analysis_row(tmp_path):
+    """SQLite 백엔드: 요청 1건이 analyses 행 하나로 저장되는지 확인"""
+    conn = _save_sqlite(tmp_path)
+
+    rows = conn.execute("SELECT * FROM analyses").fetchall()
+    assert len(rows) == 1
+    row = rows[0]
+    assert row["user_state"] == "건조해요"
+    assert row["image_detail"] == "low"
+    assert row["search_query"] == "건조한 피부 보습"
+    assert row["total_ms"] == 1234.5
+    assert (row["input_tokens"], row["output_tokens"], row["total_tokens"]) == (1000, 320, 1320)
+    assert json.loads(row["analysis"]) == ANALYSIS
+    assert json.loads(row["image_analysis"]) == {"skin": "건조"}
+
+
+def test_sqlite_backend_writes_retrieval_and_stage_rows(tmp_path):
+    """검색된 청크와 단계별 소요 시간이 analysis_id로 연결된 행으로 저장되는지 확인"""
+    conn = _save_sqlite(tmp_path)
+    analysis_id = conn.execute("SELECT id FROM analyses").fetchone()[0]
+
+    retrievals = conn.execute(
+        "SELECT analysis_id, rank, chunk_id, source, page, dense_score, bm25_score, rrf_score FROM retrievals ORDER BY rank"
+    ).fetchall()
+    assert [tuple(row) for row in retrievals] == [
+        (analysis_id, 1, "chunk-1", "a.pdf", "3", 0.9, 3.2, 0.03),
+        (analysis_id, 2, "chunk-2", "b.pdf", "Unknown", 0.7, None, 0.01),
+    ]
+
+    stages = conn.execute("SELECT analysis_id, stage, duration_ms FROM stages ORDER BY start_ms").fetchall()
+    assert [tuple(row) for row in stages] == [(analysis_id, "upload", 300.0), (analysis_id, "generate", 900.0)]
+
+
+def test_sqlite_backend_records_request_id(tmp_path, monkeypatch):
+    """트레이스 안에서 저장하면 X-Request-ID가 함께 기록되는지 확인"""
+    monkeypatch.setattr(Config, "TRACING_ENABLED", True)
+    logger = ChainLogger(log_dir=str(tmp_path), backend="sqlite")
+
+    def save_in_request():
+        tracing.start_trace("POST /api/analyze", request_id="req-123")
+        _save(logger)
+
+    contextvars.copy_context().run(save_in_request)
+    _save(logger)  # 트레이스 밖
+    logger.close()
+
+    conn = sqlite3.connect(str(tmp_path / Config.LOG_DB_NAME))
+    assert [row[0] for row in conn.execute("SELECT request_id FROM analyses ORDER BY id")] == ["req-123", None]
+
+
+def test_sqlite_writer_adds_request_id_column_to_old_db(tmp_path):
+    """request_id 컬럼이 없던 기존 DB를 열면 컬럼을 추가하는지 확인"""
+    path = tmp_path / "old.sqlite3"
+    conn = sqlite3.connect(str(path))
+    conn.execute("CREATE TABLE analyses (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT NOT NULL)")
+    conn.commit()
+    conn.close()
+
+    SqliteLogWriter(path).close()
+
+    columns = {row[1] for row in sqlite3.connect(str(path)).execute("PRAGMA table_info(analyses)")}
+    assert "request_id" in columns
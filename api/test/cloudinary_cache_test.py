@@ -0,0 +1,110 @@
+"""
+Cloudinary 업로드 재사용(콘텐츠 해시 캐시) 테스트 (업로드 API는 가짜로 대체)
+"""
+import threading
+import time
+
+import pytest
+
+from app.core.config import Config
+from app.utils import cloudinary
+
+
+class FakeUploader:
+    """업로드 호출 수를 세는 가짜 cloudinary.uploader.upload (느린 업로드 재현)"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def upload(self, image_data, **options):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return {"public_id": options["public_id"], "format": "jpg", "secure_url": f"https://example.com/{options['public_id']}"}
+
+
+@pytest.fixture
+def uploader(monkeypatch):
+    fake = FakeUploader(delay=0.05)
+    monkeypatch.setattr(cloudinary.cloudinary.uploader, "upload", fake.upload)
+    cloudinary._upload_cache.clear()
+    yield fake
+    cloudinary._upload_cache.clear()
+
+
+def test_same_image_is_uploaded_once(uploader):
+    """접근 허용 기간 안에 같은 이미지를 다시 보내면 기존 업로드를 재사용하는지 확인"""
+    first = cloudinary.upload_authenticated_image(b"image-a", expire_minutes=5)
+    second = cloudinary.upload_authenticated_image(b"image-a", expire_minutes=5)
+
+    assert first == second
+    assert uploader.calls == 1
+
+
+def test_different_images_are_uploaded_separately(uploader):
+    """다른 이미지는 각각 업로드"""
+    first = cloudinary.upload_authenticated_image(b"image-a", expire_minutes=5)
+    second = cloudinary.upload_authenticated_image(b"image-b", expire_minutes=5)
+
+    assert first["public_id"] != second["public_id"]
+    assert uploader.calls == 2
+
+
+def test_nearly_expired_upload_is_refreshed(uploader, monkeypatch):
+    """남은 접근 허용 시간이 CLOUDINARY_REUSE_MIN_SECONDS보다 짧으면 다시 업로드하는지 확인"""
+    monkeypatch.setattr(Config, "CLOUDINARY_REUSE_MIN_SECONDS", 120)
+
+    cloudinary.upload_authenticated_image(b"image-a", expire_minutes=1)
+    cloudinary.upload_authenticated_image(b"image-a", expire_minutes=1)
+
+    assert uploader.calls == 2
+
+
+def test_concurrent_uploads_of_same_image_run_once(uploader):
+    """같은 이미지를 동시에 여러 요청이 보내도 업로드는 한 번이고, 끝나면 잠금 항목이 남지 않는지 확인"""
+    results = []
+    barrier = threading.Barrier(20)
+
+    def worker():
+        barrier.wait()
+        results.append(cloudinary.upload_authenticated_image(b"image-a", expire_minutes=5))
+
+    threads = [threading.Thread(target=worker) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert uploader.calls == 1
+    assert len(results) == 20
+    assert all(result == results[0] for result in results)
+    assert cloudinary._inflight_uploads == {}
+
+
+def test_failed_upload_is_not_cached(uploader, monkeypatch):
+    """업로드가 실패하면 RuntimeError를 내고 다음 요청은 다시 업로드하는지 확인"""
+    def fail(image_data, **options):
+        raise ConnectionError("network down")
+
+    monkeypatch.setattr(cloudinary.cloudinary.uploader, "upload", fail)
+    with pytest.raises(RuntimeError):
+        cloudinary.upload_authenticated_image(b"image-a", expire_minutes=5)
+
+    monkeypatch.setattr(cloudinary.cloudinary.uploader, "upload", uploader.upload)
+    cloudinary.upload_authenticated_image(b"image-a", expire_minutes=5)
+    assert uploader.calls == 1
+    assert cloudinary._inflight_uploads == {}
+
+
+def test_shorter_lived_upload_is_not_reused_for_longer_expiry(uploader):
+    """짧은 접근 허용 기간으로 올린 업로드는 더 긴 기간을 요청하면 다시 올리고, 더 짧은 요청에는 재사용하는지 확인"""
+    cloudinary.upload_authenticated_image(b"image-a", expire_minutes=5)
+    cloudinary.upload_authenticated_image(b"image-a", expire_minutes=60)
+    assert uploader.calls == 2
+
+    # 60분으로 갱신된 업로드는 60분 이하 요청에 재사용
+    cloudinary.upload_authenticated_image(b"image-a", expire_minutes=60)
+    cloudinary.upload_authenticated_image(b"image-a", expire_minutes=5)
+    assert uploader.calls == 2
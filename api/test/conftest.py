@@ -0,0 +1,13 @@
+"""
+테스트 공통 설정
+"""
+import os
+import sys
+from pathlib import Path
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+# 설정 모듈이 import 시 OpenAI 키를 요구하므로 오프라인 테스트용 더미 값 지정 (실제 키가 있으면 그대로 사용)
+os.environ.setdefault("OPEN_API_KEY", "test-key")
@@ -0,0 +1,198 @@
+"""
+임베딩 캐시 테스트 (쿼리 임베딩 LRU 캐시, 청크 임베딩 디스크 캐시)
+"""
+import os
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.core.embedding_cache import CachedEmbeddings, DocumentEmbeddingStore
+
+
+class CountingEmbeddings(Embeddings):
+    """호출 횟수를 세는 테스트용 임베딩 (텍스트 길이 기반 벡터)"""
+
+    def __init__(self):
+        self.query_calls = []
+        self.document_calls = []
+
+    def embed_query(self, text):
+        self.query_calls.append(text)
+        return [float(len(text)), 1.0]
+
+    def embed_documents(self, texts):
+        self.document_calls.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+def test_repeated_query_hits_cache():
+    """같은 쿼리는 모델을 다시 호출하지 않는지 확인"""
+    base = CountingEmbeddings()
+    cached = CachedEmbeddings(base, "model")
+
+    first = cached.embed_query("건조한 피부")
+    second = cached.embed_query("건조한 피부")
+
+    assert first == second == [6.0, 1.0]
+    assert base.query_calls == ["건조한 피부"]
+    assert cached.stats()["hits"] == 1
+    assert cached.stats()["misses"] == 1
+
+
+def test_whitespace_variants_share_cache_entry():
+    """연속 공백/앞뒤 공백만 다른 쿼리는 같은 캐시 항목을 쓰는지 확인"""
+    base = CountingEmbeddings()
+    cached = CachedEmbeddings(base, "model")
+
+    cached.embed_query("건조한   피부 ")
+    cached.embed_query(" 건조한 피부")
+
+    assert base.query_calls == ["건조한 피부"]
+
+
+def test_least_recently_used_entry_is_evicted():
+    """최대 크기를 넘으면 가장 오래 사용하지 않은 항목부터 제거하는지 확인"""
+    base = CountingEmbeddings()
+    cached = CachedEmbeddings(base, "model", maxsize=2)
+
+    cached.embed_query("a")
+    cached.embed_query("b")
+    cached.embed_query("a")  # a를 최근 사용으로 갱신
+    cached.embed_query("c")  # b 제거
+    cached.embed_query("a")
+    cached.embed_query("b")
+
+    assert base.query_calls == ["a", "b", "c", "b"]
+    assert cached.stats()["size"] == 2
+
+
+def test_cache_key_includes_model_name():
+    """모델명이 다르면 캐시를 공유하지 않는지 확인"""
+    base = CountingEmbeddings()
+    first = CachedEmbeddings(base, "model-a")
+    second = CachedEmbeddings(base, "model-b")
+
+    first.put("skin", [1.0, 2.0])
+    second.embed_query("skin")
+
+    assert base.query_calls == ["skin"]
+    assert first.embed_query("skin") == [1.0, 2.0]
+
+
+def test_returned_vector_is_a_copy():
+    """반환된 벡터를 수정해도 캐시 값은 바뀌지 않는지 확인"""
+    cached = CachedEmbeddings(CountingEmbeddings(), "model")
+
+    vector = cached.embed_query("skin")
+    vector[0] = -1.0
+
+    assert cached.embed_query("skin") == [4.0, 1.0]
+
+
+def test_zero_maxsize_disables_cache():
+    """maxsize 0이면 캐시하지 않는지 확인"""
+    base = CountingEmbeddings()
+    cached = CachedEmbeddings(base, "model", maxsize=0)
+
+    cached.embed_query("skin")
+    cached.embed_query("skin")
+
+    assert base.query_calls == ["skin", "skin"]
+    assert cached.stats()["size"] == 0
+
+
+def test_embed_queries_batches_only_missing_texts():
+    """여러 쿼리 중 캐시에 없는 것만 한 번의 배치로 계산하는지 확인"""
+    base = CountingEmbeddings()
+    cached = CachedEmbeddings(base, "model")
+    cached.embed_query("a")
+
+    vectors = cached.embed_queries(["a", "bb", "bb", "ccc"])
+
+    assert vectors == [[1.0, 1.0], [2.0, 1.0], [2.0, 1.0], [3.0, 1.0]]
+    assert base.document_calls == [["bb", "ccc"]]
+    assert cached.embed_query("ccc") == [3.0, 1.0]
+    assert base.query_calls == ["a"]
+
+
+def test_embed_documents_is_not_cached():
+    """문서 임베딩은 캐시 없이 그대로 전달하는지 확인"""
+    base = CountingEmbeddings()
+    cached = CachedEmbeddings(base, "model")
+
+    cached.embed_documents(["a"])
+    cached.embed_documents(["a"])
+
+    assert base.document_calls == [["a"], ["a"]]
+    assert cached.stats()["size"] == 0
+
+
+def _store(tmp_path):
+    return DocumentEmbeddingStore("model", "torch", cache_dir=str(tmp_path))
+
+
+def test_document_store_round_trip(tmp_path):
+    """put_many로 저장한 임베딩을 get_many가 입력 순서대로 돌려주고, 없는 텍스트는 None인지 확인"""
+    store = _store(tmp_path)
+    store.put_many(["a", "b"], [[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
+
+    vectors = store.get_many(["b", "missing", "a", "b"])
+
+    assert vectors == [[4.0, 5.0, 6.0], None, [1.0, 2.0, 3.0], [4.0, 5.0, 6.0]]
+    assert store.stats()["size"] == 2
+    assert (store.hits, store.misses) == (3, 1)
+    store.close()
+
+    # 다시 열어도 같은 결과
+    reopened = _store(tmp_path)
+    assert reopened.get_many(["a", "b"]) == [[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]]
+    reopened.close()
+
+
+def test_document_store_maps_float16_rows(tmp_path):
+    """여러 번 나눠 저장해도 각 키가 자기 float16 행을 가리키고, 중복 텍스트는 한 번만 저장하는지 확인"""
+    store = _store(tmp_path)
+    rng = np.random.default_rng(0)
+    first = rng.standard_normal((3, 8)).astype(np.float32)
+    second = rng.standard_normal((2, 8)).astype(np.float32)
+
+    store.put_many(["a", "b", "a"], first)
+    store.put_many(["b", "c", "d"], np.vstack([first[1], second]))
+
+    vectors = np.asarray(store.get_many(["a", "b", "c", "d"]), dtype=np.float32)
+    expected = np.vstack([first[0], first[1], second]).astype(np.float16).astype(np.float32)
+    np.testing.assert_array_equal(vectors, expected)
+    assert os.path.getsize(store.vectors_path) == 4 * 8 * 2  # 4행 x 8차원 x float16
+    store.close()
+
+
+def test_document_store_trims_partial_row(tmp_path):
+    """쓰기 도중 중단되어 남은 불완전한 마지막 행을 다시 열 때 잘라내는지 확인"""
+    store = _store(tmp_path)
+    store.put_many(["a"], [[1.0, 2.0]])
+    store.close()
+    with open(store.vectors_path, "ab") as f:
+        f.write(b"\x00\x3c")  # 행의 절반만 기록된 상태
+
+    reopened = _store(tmp_path)
+    reopened.put_many(["b"], [[3.0, 4.0]])
+
+    assert reopened.get_many(["a", "b"]) == [[1.0, 2.0], [3.0, 4.0]]
+    assert os.path.getsize(reopened.vectors_path) == 2 * 2 * 2
+    reopened.close()
+
+
+def test_document_store_drops_keys_past_truncated_file(tmp_path):
+    """벡터 파일이 잘려 커밋된 키가 없는 행을 가리키면 그 키는 캐시 미스로 처리하는지 확인"""
+    store = _store(tmp_path)
+    store.put_many(["a", "b", "c"], [[1.0, 1.0], [2.0, 2.0], [3.0, 3.0]])
+    store.close()
+    os.truncate(store.vectors_path, 2 * 2 * 2 + 1)  # 2행 + 불완전한 3번째 행
+
+    reopened = _store(tmp_path)
+
+    assert reopened.get_many(["a", "b", "c"]) == [[1.0, 1.0], [2.0, 2.0], None]
+    assert reopened.stats()["size"] == 2
+    reopened.put_many(["c"], [[5.0, 5.0]])
+    assert reopened.get_many(["c"]) == [[5.0, 5.0]]
+    reopened.close()
@@ -0,0 +1,117 @@
+"""
+NumPy 정확 검색 벡터 스토어(ExactVectorStore) 테스트
+"""
+import numpy as np
+import pytest
+
+from app.core.exact_store import ExactVectorStore
+
+
+def _random_vectors(count, dim=8, seed=0):
+    return np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32)
+
+
+def _brute_force(vectors, query, k):
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    return list(np.argsort(-(normalized @ (query / np.linalg.norm(query))), kind="stable")[:k])
+
+
+def _upsert(store, vectors, start=0, source="a.pdf"):
+    ids = [f"doc-{start + i}" for i in range(len(vectors))]
+    store.upsert(ids, vectors, [f"text {start + i}" for i in range(len(vectors))], [{"source": source}] * len(vectors))
+    return ids
+
+
+@pytest.fixture(params=["float32", "float16"])
+def store(request, tmp_path):
+    store = ExactVectorStore(str(tmp_path / "store"), dtype=request.param)
+    yield store
+    store.close()
+
+
+def test_search_matches_brute_force(store):
+    """top-k 결과가 전체 코사인 유사도 정렬과 일치하는지 확인 (recall 1)"""
+    vectors = _random_vectors(200)
+    _upsert(store, vectors)
+    query = _random_vectors(1, seed=1)[0]
+
+    results = store.similarity_search_by_vector_with_score(query.tolist(), k=10)
+
+    assert [doc.id for doc, _ in results] == [f"doc-{i}" for i in _brute_force(vectors, query, 10)]
+    distances = [distance for _, distance in results]
+    assert distances == sorted(distances)
+
+
+def test_default_dtype_is_float32(tmp_path):
+    """dtype을 지정하지 않으면 float32로 저장하는지 확인"""
+    store = ExactVectorStore(str(tmp_path / "store"))
+    _upsert(store, _random_vectors(3))
+
+    assert store.dtype == np.float32
+    assert store.vectors_path.name == "vectors.f32"
+    store.close()
+
+
+def test_incremental_upserts_match_reload(store, tmp_path):
+    """여러 번 나눠 upsert/삭제한 상태가 디스크에서 다시 로드한 상태와 같은지 확인"""
+    vectors = _random_vectors(60)
+    for start in range(0, 60, 20):
+        _upsert(store, vectors[start:start + 20], start=start, source=f"{start}.pdf")
+    _upsert(store, vectors[:5] * -1, start=0, source="0.pdf")  # 같은 id 재삽입 → 이전 행 삭제 표시
+    store.delete_by("source", ["20.pdf"])
+    query = _random_vectors(1, seed=2)[0].tolist()
+
+    reloaded = ExactVectorStore(str(store.dir))
+
+    assert len(store) == len(reloaded) == 40
+    assert store.num_rows == reloaded.num_rows == 65
+    np.testing.assert_array_equal(store._deleted, reloaded._deleted)
+    assert [doc.id for doc in store.similarity_search_by_vector(query, k=40)] == \
+        [doc.id for doc in reloaded.similarity_search_by_vector(query, k=40)]
+    reloaded.close()
+
+
+def test_replaced_and_deleted_rows_are_not_returned(store):
+    """같은 id로 다시 넣은 이전 행과 삭제된 행은 검색/조회되지 않는지 확인"""
+    vectors = _random_vectors(4)
+    _upsert(store, vectors)
+    store.upsert(["doc-0"], [vectors[1]], ["new text"], [{"source": "b.pdf"}])
+    store.delete(["doc-2"])
+
+    results = store.similarity_search_by_vector(vectors[1].tolist(), k=10)
+
+    assert sorted(doc.id for doc in results) == ["doc-0", "doc-1", "doc-3"]
+    assert store.get(ids=["doc-0"])["documents"] == ["new text"]
+    assert store.get()["ids"] == ["doc-1", "doc-3", "doc-0"]
+
+
+def test_reset_collection_clears_store(store):
+    """reset_collection 후 비어 있고 다시 추가할 수 있는지 확인"""
+    _upsert(store, _random_vectors(5))
+    store.reset_collection()
+
+    assert len(store) == 0
+    assert store.similarity_search_by_vector([1.0] * 8, k=3) == []
+    _upsert(store, _random_vectors(2, dim=4))
+    assert len(store) == 2
+
+
+def test_dimension_mismatch_rejected(store):
+    """저장소와 다른 차원의 임베딩은 거절하는지 확인"""
+    _upsert(store, _random_vectors(2, dim=8))
+
+    with pytest.raises(ValueError):
+        _upsert(store, _random_vectors(2, dim=4), start=2)
+
+
+def test_partial_tail_is_truncated_on_load(store):
+    """커밋되지 않은 꼬리 벡터(쓰기 중단)는 로드 시 잘라내는지 확인"""
+    _upsert(store, _random_vectors(3))
+    with open(store.vectors_path, "ab") as f:
+        f.write(b"\0" * 10)
+
+    reloaded = ExactVectorStore(str(store.dir))
+
+    assert reloaded.vectors_path.stat().st_size == 3 * 8 * reloaded.dtype.itemsize
+    assert len(reloaded) == 3
+    reloaded.close()
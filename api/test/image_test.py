@@ -0,0 +1,167 @@
+"""
+업로드 이미지 검증/전처리 및 분석 라우트 오류 응답 테스트
+"""
+import io
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app.core import tracing
+from app.core.config import Config
+from app.main import app
+from app.routes import analyze
+from app.schemas.response import AnalysisResponse
+from app.utils.image import InvalidImageError, UnsupportedImageError, check_image, preprocess_image
+
+
+def _jpeg(size=(1200, 900), color="red"):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+class FakeService:
+    """업로드된 이미지 크기를 analysis에 담아 돌려주는 테스트용 분석 서비스"""
+
+    async def aanalyze(self, request):
+        return AnalysisResponse(status="success", analysis={"bytes": len(request.image_data)})
+
+    async def aanalyze_batch(self, requests):
+        for index, request in enumerate(requests):
+            yield index, AnalysisResponse(status="success", analysis={"user_state": request.user_state})
+
+
+class NullExporter:
+    def export(self, trace):
+        pass
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(analyze, "get_analysis_service", FakeService)
+    monkeypatch.setattr(tracing, "_exporter", NullExporter())
+    return TestClient(app)
+
+
+def test_check_image_accepts_jpeg():
+    """정상 JPEG는 통과"""
+    check_image(_jpeg())
+
+
+def test_check_image_rejects_non_image():
+    """이미지가 아닌 파일은 UnsupportedImageError"""
+    with pytest.raises(UnsupportedImageError):
+        check_image(b"%PDF-1.4 not an image")
+
+
+def test_check_image_rejects_decompression_bomb(monkeypatch):
+    """해상도가 디컴프레션 폭탄 기준을 넘으면 InvalidImageError (헤더만 읽음)"""
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 1000)
+
+    with pytest.raises(InvalidImageError, match="해상도"):
+        check_image(_jpeg(size=(100, 100)))
+
+
+def test_preprocess_rejects_truncated_image():
+    """픽셀 데이터가 잘린 이미지는 InvalidImageError"""
+    data = _jpeg()
+
+    with pytest.raises(InvalidImageError):
+        preprocess_image(data[:len(data) // 2])
+
+
+def test_preprocess_downscales_to_detail_resolution():
+    """low detail은 긴 변 512 이하 JPEG로 재인코딩하는지 확인"""
+    processed = preprocess_image(_jpeg(size=(1200, 900)), detail="low")
+
+    with Image.open(io.BytesIO(processed)) as image:
+        assert image.format == "JPEG"
+        assert image.size == (512, 384)
+
+
+def test_analyze_rejects_non_image_with_415(client):
+    """이미지가 아닌 업로드는 415와 읽을 수 있는 메시지로 거절하는지 확인"""
+    response = client.post(
+        "/api/analyze",
+        files={"image_file": ("note.txt", b"hello", "text/plain")},
+        data={"user_state": "건조해요"},
+    )
+
+    assert response.status_code == 415
+    assert response.json()["detail"] == "이미지 파일 형식을 인식할 수 없습니다"
+
+
+def test_analyze_rejects_corrupt_header_with_400(client):
+    """헤더가 손상된 이미지는 400"""
+    response = client.post(
+        "/api/analyze",
+        files={"image_file": ("face.jpg", _jpeg()[:300], "image/jpeg")},
+        data={"user_state": "건조해요"},
+    )
+
+    assert response.status_code == 400
+
+
+def test_analyze_rejects_oversized_upload_with_413(client, monkeypatch):
+    """허용 크기를 넘는 업로드는 413"""
+    monkeypatch.setattr(Config, "MAX_UPLOAD_BYTES", 100)
+
+    response = client.post(
+        "/api/analyze",
+        files={"image_file": ("face.jpg", _jpeg(), "image/jpeg")},
+        data={"user_state": "건조해요"},
+    )
+
+    assert response.status_code == 413
+
+
+def test_analyze_accepts_image(client):
+    """정상 이미지는 분석 서비스로 전달"""
+    data = _jpeg()
+
+    response = client.post(
+        "/api/analyze",
+        files={"image_file": ("face.jpg", data, "image/jpeg")},
+        data={"user_state": "건조해요"},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["analysis"] == {"bytes": len(data)}
+
+
+def test_batch_reports_invalid_items_per_item(client):
+    """배치에서 디코딩할 수 없는 항목만 status=error로 반환하고 나머지는 분석하는지 확인"""
+    response = client.post(
+        "/api/analyze/batch",
+        files=[
+            ("image_files", ("a.jpg", _jpeg(), "image/jpeg")),
+            ("image_files", ("b.txt", b"hello", "text/plain")),
+            ("image_files", ("c.jpg", _jpeg(color="blue"), "image/jpeg")),
+        ],
+        data={"user_states": ["상태 0", "상태 1", "상태 2"]},
+    )
+
+    assert response.status_code == 200
+    items = {item["index"]: item for item in map(json.loads, response.text.splitlines())}
+    assert sorted(items) == [0, 1, 2]
+    assert items[1]["status"] == "error"
+    assert items[1]["error"] == "이미지 파일 형식을 인식할 수 없습니다"
+    assert items[0]["analysis"] == {"user_state": "상태 0"}
+    assert items[2]["analysis"] == {"user_state": "상태 2"}
+
+
+def test_batch_total_size_is_capped(client, monkeypatch):
+    """배치 전체 업로드 크기가 BATCH_MAX_BYTES를 넘으면 413"""
+    data = _jpeg()
+    monkeypatch.setattr(Config, "BATCH_MAX_BYTES", len(data) * 2 - 1)
+
+    response = client.post(
+        "/api/analyze/batch",
+        files=[("image_files", (f"{i}.jpg", data, "image/jpeg")) for i in range(2)],
+        data={"user_states": ["a", "b"]},
+    )
+
+    assert response.status_code == 413
+    assert "전체 크기" in response.json()["detail"]
@@ -0,0 +1,329 @@
+"""
+증분 인덱싱(IndexManifest) 테스트
+
+NumPy 벡터 스토어와 가짜 임베딩 모델로 DocumentIndexer.build_vectorstore를 오프라인 실행합니다.
+"""
+import json
+import random
+from pathlib import Path
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from app.core import indexer
+from app.core.config import Config
+from app.core.indexer import CHUNK_WINDOW_FACTOR, DocumentIndexer, IndexManifest, TextChunker
+
+
+class FakeEmbeddings(Embeddings):
+    """임베딩한 텍스트를 기록하는 테스트용 임베딩"""
+
+    def __init__(self):
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return [[float(len(text)), float(sum(map(ord, text)) % 97), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+@pytest.fixture
+def fake_embeddings(monkeypatch, tmp_path):
+    embeddings = FakeEmbeddings()
+    data_dir = tmp_path / "papers"
+    data_dir.mkdir()
+
+    monkeypatch.setattr(Config, "DATA_DIR", str(data_dir))
+    monkeypatch.setattr(Config, "VECTOR_BACKEND", "numpy")
+    monkeypatch.setattr(Config, "NUMPY_STORE_PATH", str(tmp_path / "vector_store"))
+    monkeypatch.setattr(Config, "INDEX_MANIFEST_PATH", str(tmp_path / "vector_store" / "index_manifest.json"))
+    monkeypatch.setattr(Config, "BM25_INDEX_PATH", str(tmp_path / "bm25_index"))
+    monkeypatch.setattr(Config, "BM25_TOKENIZER", "whitespace")
+    monkeypatch.setattr(Config, "MIN_CHUNK_SIZE", 1)  # 짧은 테스트 문서도 청크로 유지
+    monkeypatch.setattr(Config, "EMBEDDING_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "INDEX_EMBED_WORKERS", 1)
+    monkeypatch.setattr(indexer.EmbeddingManager, "_load_backend", lambda self: embeddings)
+    return embeddings
+
+
+def _write(name, text):
+    path = Path(Config.DATA_DIR) / name
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def _index():
+    db_manager = DocumentIndexer().build_vectorstore()
+    records = db_manager.vectorstore.get()
+    db_manager.vectorstore.close()
+    return records
+
+
+def _sources(records):
+    return sorted({metadata["source"] for metadata in records["metadatas"]})
+
+
+def test_first_run_indexes_all_files(fake_embeddings):
+    """처음 실행하면 모든 파일을 인덱싱하고 매니페스트에 기록하는지 확인"""
+    _write("a.txt", "dry skin needs moisture")
+    _write("b.txt", "oily skin needs sebum control")
+
+    records = _index()
+
+    assert _sources(records) == ["a.txt", "b.txt"]
+    manifest = IndexManifest().load()
+    assert sorted(manifest.files) == ["a.txt", "b.txt"]
+    assert manifest.files["a.txt"]["sha256"] == IndexManifest.file_hash(Path(Config.DATA_DIR) / "a.txt")
+    assert manifest.files["a.txt"]["chunks"] == 1
+    assert manifest.is_compatible()
+
+
+def test_unchanged_files_are_not_embedded_again(fake_embeddings):
+    """변경 없는 재실행은 임베딩을 다시 하지 않는지 확인"""
+    _write("a.txt", "dry skin needs moisture")
+    _index()
+    fake_embeddings.embedded.clear()
+
+    records = _index()
+
+    assert fake_embeddings.embedded == []
+    assert _sources(records) == ["a.txt"]
+
+
+def test_incremental_run_adds_changed_and_drops_removed_files(fake_embeddings):
+    """추가/변경 파일만 임베딩하고 삭제/변경 파일의 기존 청크는 제거하는지 확인"""
+    _write("a.txt", "dry skin needs moisture")
+    _write("b.txt", "oily skin needs sebum control")
+    _index()
+    fake_embeddings.embedded.clear()
+
+    (Path(Config.DATA_DIR) / "a.txt").unlink()
+    _write("b.txt", "oily skin needs a gentle cleanser")
+    _write("c.txt", "sunscreen blocks uv")
+    records = _index()
+
+    assert sorted(fake_embeddings.embedded) == ["oily skin needs a gentle cleanser", "sunscreen blocks uv"]
+    assert _sources(records) == ["b.txt", "c.txt"]
+    assert "oily skin needs sebum control" not in records["documents"]
+    assert sorted(IndexManifest().load().files) == ["b.txt", "c.txt"]
+
+    # BM25 인덱스도 현재 벡터 DB 내용으로 다시 생성됨
+    bm25 = indexer.load_index(Config.BM25_INDEX_PATH)
+    assert bm25.num_docs == 2
+    assert bm25.search("sebum") == []
+
+
+def test_chunk_ids_follow_file_hash(fake_embeddings):
+    """청크 ID가 파일 해시 + 순번으로 결정되는지 확인"""
+    path = _write("a.txt", "dry skin needs moisture")
+
+    records = _index()
+
+    assert records["ids"] == [f"{IndexManifest.file_hash(path)[:16]}-00000"]
+
+
+def test_settings_change_triggers_full_reindex(fake_embeddings, monkeypatch):
+    """청킹 설정이 바뀌면 변경 없는 파일도 전체 재인덱싱하는지 확인"""
+    _write("a.txt", "dry skin needs moisture")
+    _index()
+    fake_embeddings.embedded.clear()
+
+    monkeypatch.setattr(Config, "CHUNK_SIZE", Config.CHUNK_SIZE + 100)
+    records = _index()
+
+    assert fake_embeddings.embedded == ["dry skin needs moisture"]
+    assert len(records["ids"]) == 1
+    assert IndexManifest().load().settings["chunk_size"] == Config.CHUNK_SIZE
+
+
+def test_interrupted_full_reindex_is_retried(fake_embeddings, monkeypatch):
+    """전체 재인덱싱이 청크 저장 중 중단되면 다음 실행이 다시 전체 인덱싱하는지 확인"""
+    _write("a.txt", "dry skin needs moisture")
+    _write("b.txt", "oily skin needs sebum control")
+    _index()
+
+    def crash(self, chunks, embedder=None):
+        raise KeyboardInterrupt
+
+    with monkeypatch.context() as patch:
+        patch.setattr(indexer.VectorStoreManager, "add_chunks", crash)
+        with pytest.raises(KeyboardInterrupt):
+            DocumentIndexer().build_vectorstore(full=True)
+
+    manifest = IndexManifest().load()
+    assert manifest.files == {}
+    assert not manifest.is_compatible()
+
+    fake_embeddings.embedded.clear()
+    records = _index()
+
+    assert sorted(fake_embeddings.embedded) == ["dry skin needs moisture", "oily skin needs sebum control"]
+    assert _sources(records) == ["a.txt", "b.txt"]
+    assert sorted(IndexManifest().load().files) == ["a.txt", "b.txt"]
+
+
+def test_reindex_embeds_only_changed_chunks(fake_embeddings, monkeypatch, tmp_path):
+    """임베딩 디스크 캐시가 켜져 있으면 바뀐 파일을 다시 인덱싱할 때 새 청크만 임베딩하는지 확인"""
+    monkeypatch.setattr(Config, "EMBEDDING_CACHE_ENABLED", True)
+    monkeypatch.setattr(Config, "EMBEDDING_CACHE_DIR", str(tmp_path / "embedding_cache"))
+    monkeypatch.setattr(Config, "CHUNK_SIZE", 30)
+    monkeypatch.setattr(Config, "CHUNK_OVERLAP", 0)
+    paragraphs = ["dry skin needs moisture", "oily skin needs sebum control", "sunscreen blocks uv"]
+    _write("a.txt", "\n\n".join(paragraphs))
+    _index()
+    assert sorted(fake_embeddings.embedded) == sorted(paragraphs)
+    fake_embeddings.embedded.clear()
+
+    _write("a.txt", "\n\n".join(paragraphs[:2] + ["retinol helps wrinkles"]))
+    records = _index()
+
+    assert fake_embeddings.embedded == ["retinol helps wrinkles"]
+    assert sorted(records["documents"]) == sorted(paragraphs[:2] + ["retinol helps wrinkles"])
+    # 캐시에 있는 벡터는 직접 계산한 값과 같음
+    store = indexer.DocumentEmbeddingStore()
+    assert store.get_many(["dry skin needs moisture"]) == [fake_embeddings.embed_query("dry skin needs moisture")]
+    store.close()
+
+
+def test_manifest_with_other_version_is_ignored(tmp_path):
+    """다른 버전의 매니페스트는 빈 상태로 로드하는지 확인"""
+    path = tmp_path / "manifest.json"
+    path.write_text(json.dumps({"version": 0, "settings": {"x": 1}, "files": {"a.txt": {}}}))
+
+    manifest = IndexManifest(path).load()
+
+    assert manifest.files == {}
+    assert not manifest.is_compatible()
+
+
+def test_manifest_save_round_trip(tmp_path):
+    """저장한 매니페스트를 그대로 다시 로드하는지 확인"""
+    manifest = IndexManifest(tmp_path / "nested" / "manifest.json")
+    manifest.settings = IndexManifest.current_settings()
+    manifest.files = {"a.pdf": {"sha256": "00", "chunks": 3}}
+    manifest.save()
+
+    loaded = IndexManifest(tmp_path / "nested" / "manifest.json").load()
+
+    assert loaded.files == manifest.files
+    assert loaded.is_compatible()
+
+
+WORDS = "skin barrier moisture sebum hair scalp retinol collagen".split()
+
+
+def _paragraph_pages(count, seed=0):
+    """문단(빈 줄 구분) 여러 개로 된 페이지 텍스트"""
+    rng = random.Random(seed)
+
+    def paragraph():
+        return " ".join(rng.choice(WORDS) for _ in range(rng.randint(5, 30))) + "."
+
+    return ["\n\n".join(paragraph() for _ in range(rng.randint(2, 8))) for _ in range(count)]
+
+
+def test_streaming_chunks_match_whole_document_split():
+    """페이지 윈도우 단위로 나눠도 문단으로 된 문서는 문서 전체를 한 번에 나눈 결과와 같은지 확인"""
+    chunker = TextChunker(chunk_size=200, chunk_overlap=40)
+    for seed in range(3):
+        pages = _paragraph_pages(12, seed)
+        document = "\n\n".join(pages)
+        assert len(document) > 2 * 200 * CHUNK_WINDOW_FACTOR  # 윈도우를 여러 번 넘김
+
+        chunks = list(chunker.split_pages(pages))
+
+        assert chunks == chunker._splitter().split_text(document)
+        # 앞 페이지의 마지막 문단과 다음 페이지의 첫 문단을 함께 담은 청크가 있음
+        spanning = [
+            k for k in range(len(pages) - 1)
+            if any(pages[k].split("\n\n")[-1] + "\n\n" + pages[k + 1].split("\n\n")[0] in chunk for chunk in chunks)
+        ]
+        assert spanning
+
+
+def test_streaming_chunks_keep_all_text_when_pages_cut_sentences():
+    """문장이 페이지 경계에서 잘려도 모든 텍스트가 chunk_size 이하의 청크에 들어가는지 확인"""
+    sentences = [f"s{i:04d} " + " ".join(WORDS[(i + j) % len(WORDS)] for j in range(6)) + "." for i in range(400)]
+    text = " ".join(sentences)
+    pages = [text[i:i + 700] for i in range(0, len(text), 700)]  # 문장 중간에서 페이지가 나뉨
+    chunker = TextChunker(chunk_size=200, chunk_overlap=40)
+
+    chunks = list(chunker.split_pages(pages))
+
+    document = "\n\n".join(pages)
+    assert all(chunk in document for chunk in chunks)
+    assert all(len(chunk) <= 200 for chunk in chunks)
+    joined = " ".join(chunks)
+    assert all(f"s{i:04d}" in joined for i in range(400))
+    assert chunks == chunker._splitter().split_text(document)
+
+
+def test_iter_chunks_keeps_source_and_chunk_order_across_windows(monkeypatch):
+    """여러 윈도우에 걸친 문서도 청크마다 자기 파일의 metadata와 파일 내 순번 ID를 갖는지 확인"""
+    monkeypatch.setattr(Config, "MIN_CHUNK_SIZE", 1)
+    sources = [
+        ({"source": "a.pdf", "type": "pdf"}, _paragraph_pages(12, seed=1)),
+        ({"source": "b.txt", "type": "txt"}, _paragraph_pages(12, seed=2)),
+    ]
+    chunker = TextChunker(chunk_size=200, chunk_overlap=40)
+    expected = {
+        metadata["source"]: chunker._splitter().split_text("\n\n".join(pages)) for metadata, pages in sources
+    }
+    hashes = {"a.pdf": "a" * 64, "b.txt": "b" * 64}
+    counts = {}
+
+    chunks = list(DocumentIndexer._with_chunk_ids(chunker.iter_chunks(iter(sources)), hashes, counts))
+
+    for source, texts in expected.items():
+        own = [chunk for chunk in chunks if chunk.metadata["source"] == source]
+        assert [chunk.page_content for chunk in own] == texts
+        assert [chunk.metadata["chunk_id"] for chunk in own] == [f"{source[0] * 16}-{i:05d}" for i in range(len(texts))]
+        assert counts[source] == len(texts)
+    assert {chunk.metadata["type"] for chunk in chunks if chunk.metadata["source"] == "b.txt"} == {"txt"}
+    # 청크마다 metadata 사본을 가짐
+    assert len({id(chunk.metadata) for chunk in chunks}) == len(chunks)
+
+
+@pytest.fixture
+def hnsw_config(monkeypatch, tmp_path):
+    monkeypatch.setattr(Config, "CHROMA_DB_PATH", str(tmp_path / "chroma_db"))
+    monkeypatch.setattr(Config, "VECTOR_DISTANCE", "cosine")
+    monkeypatch.setattr(Config, "HNSW_M", 8)
+    monkeypatch.setattr(Config, "HNSW_EF_CONSTRUCTION", 64)
+    monkeypatch.setattr(Config, "HNSW_EF_SEARCH", 50)
+
+
+def _open_chroma():
+    db_manager = indexer.VectorStoreManager(FakeEmbeddings(), backend="chroma")
+    db_manager.open_vectorstore()
+    return db_manager.vectorstore._collection.configuration["hnsw"]
+
+
+def test_new_chroma_collection_uses_hnsw_config(hnsw_config):
+    """새 Chroma 컬렉션이 Config의 거리 함수, M, ef_construction, ef_search로 만들어지는지 확인"""
+    hnsw = _open_chroma()
+
+    assert hnsw["space"] == "cosine"
+    assert hnsw["max_neighbors"] == 8
+    assert hnsw["ef_construction"] == 64
+    assert hnsw["ef_search"] == 50
+
+
+def test_reopening_chroma_collection_updates_ef_search(hnsw_config, monkeypatch, caplog):
+    """기존 컬렉션을 다른 HNSW_EF_SEARCH로 열면 ef_search만 바로 바뀌고, 구축 시점 값은 재인덱싱을 안내하는지 확인"""
+    _open_chroma()
+
+    monkeypatch.setattr(Config, "HNSW_EF_SEARCH", 200)
+    monkeypatch.setattr(Config, "HNSW_M", 32)
+    with caplog.at_level("WARNING", logger="app.core.indexer"):
+        hnsw = _open_chroma()
+
+    assert hnsw["ef_search"] == 200
+    assert hnsw["max_neighbors"] == 8  # 구축 시점에 고정
+    assert "max_neighbors: 8 ≠ 32" in caplog.text
+
+    # 변경한 ef_search는 저장되어 다음에 열 때도 유지됨
+    monkeypatch.setattr(Config, "HNSW_M", 8)
+    assert _open_chroma()["ef_search"] == 200
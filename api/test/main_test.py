@@ -0,0 +1,67 @@
+"""
+앱 lifespan(시작 시 분석 서비스 로드, 종료 시 정리) 테스트
+"""
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.core import tracing
+from app.core.config import Config
+
+
+@pytest.fixture(autouse=True)
+def export_queue(monkeypatch):
+    # lifespan 종료가 닫는 트레이스 내보내기 큐를 테스트마다 새로 만듦 (다른 테스트에 영향 없도록)
+    export_queue = tracing.TraceExportQueue()
+    monkeypatch.setattr(tracing, "_export_queue", export_queue)
+    return export_queue
+
+
+def test_startup_preloads_analysis_service(monkeypatch):
+    """시작 시 분석 서비스를 한 번 로드하고, 종료 시 스레드 풀과 로그 writer를 정리하는지 확인"""
+    calls = []
+    monkeypatch.setattr(Config, "WARMUP_ON_STARTUP", True)
+    monkeypatch.setattr(main, "get_analysis_service", lambda: calls.append("load"))
+    monkeypatch.setattr(main, "shutdown_loggers", lambda: calls.append("shutdown_loggers"))
+
+    with TestClient(main.app) as client:
+        assert calls == ["load"]
+        assert client.get("/health").status_code == 200
+
+    assert calls == ["load", "shutdown_loggers"]
+
+
+def test_shutdown_closes_trace_export_queue(monkeypatch, export_queue):
+    """종료 시 트레이스 내보내기 큐를 닫아, 종료 뒤 끝난 요청의 트레이스는 새 스레드 없이 버리는지 확인"""
+    monkeypatch.setattr(Config, "WARMUP_ON_STARTUP", False)
+
+    with TestClient(main.app):
+        assert export_queue._thread.is_alive()
+
+    assert not export_queue._thread.is_alive()
+    assert not tracing.submit_trace(tracing.Trace("GET /late"))
+    assert tracing._export_queue is export_queue
+
+
+def test_startup_failure_keeps_server_up(monkeypatch):
+    """분석 서비스 로드가 실패해도 서버는 시작되는지 확인 (첫 요청에서 다시 시도)"""
+    def fail():
+        raise FileNotFoundError("벡터 DB를 찾을 수 없습니다")
+
+    monkeypatch.setattr(Config, "WARMUP_ON_STARTUP", True)
+    monkeypatch.setattr(main, "get_analysis_service", fail)
+
+    with TestClient(main.app) as client:
+        assert client.get("/health").status_code == 200
+
+
+def test_warmup_can_be_disabled(monkeypatch):
+    """WARMUP_ON_STARTUP이 꺼져 있으면 시작 시 로드하지 않는지 확인"""
+    calls = []
+    monkeypatch.setattr(Config, "WARMUP_ON_STARTUP", False)
+    monkeypatch.setattr(main, "get_analysis_service", lambda: calls.append("load"))
+
+    with TestClient(main.app):
+        pass
+
+    assert calls == []
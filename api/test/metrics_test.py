@@ -0,0 +1,135 @@
+"""
+/metrics 엔드포인트 테스트
+"""
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client.parser import text_string_to_metric_families
+
+from app.core import metrics, tracing
+from app.core.pipeline import StagePipeline
+from app.main import app
+
+
+class NullExporter:
+    def export(self, trace):
+        pass
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # 트레이스를 파일로 내보내지 않음 (lifespan을 실행하지 않으므로 분석 서비스도 로드하지 않음)
+    monkeypatch.setattr(tracing, "_exporter", NullExporter())
+    return TestClient(app)
+
+
+def _samples(client):
+    """/metrics 응답을 {(샘플명, 정렬된 라벨): 값}으로 파싱"""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    samples = {}
+    for family in text_string_to_metric_families(response.text):
+        for sample in family.samples:
+            samples[(sample.name, tuple(sorted(sample.labels.items())))] = sample.value
+    return samples
+
+
+def _value(samples, name, **labels):
+    return samples.get((name, tuple(sorted(labels.items()))), 0.0)
+
+
+def test_metrics_uses_prometheus_text_format(client):
+    """Prometheus 텍스트 형식으로 응답하는지 확인"""
+    response = client.get("/metrics")
+
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "nada_stage_duration_seconds" in response.text
+
+
+def test_http_requests_counted_by_route_template(client):
+    """HTTP 요청 수가 라우트 템플릿과 상태 코드별로 집계되는지 확인"""
+    name = "nada_http_request_duration_seconds_count"
+    before = _samples(client)
+
+    client.get("/health")
+    client.get("/health")
+    client.get("/no-such-path")
+    after = _samples(client)
+
+    assert _value(after, name, method="GET", path="/health", status="200") - _value(before, name, method="GET", path="/health", status="200") == 2
+    assert _value(after, name, method="GET", path="unmatched", status="404") - _value(before, name, method="GET", path="unmatched", status="404") == 1
+    assert _value(after, "nada_http_requests_in_flight") == 1  # /metrics 요청 자신
+
+
+def test_rejected_upload_counted_with_status(client):
+    """이미지가 아닌 업로드의 415 응답도 라우트 템플릿으로 집계되는지 확인"""
+    name = "nada_http_request_duration_seconds_count"
+    labels = {"method": "POST", "path": "/api/analyze", "status": "415"}
+    before = _value(_samples(client), name, **labels)
+
+    response = client.post(
+        "/api/analyze",
+        files={"image_file": ("note.txt", b"not an image", "text/plain")},
+        data={"user_state": "건조해요"},
+    )
+
+    assert response.status_code == 415
+    assert _value(_samples(client), name, **labels) - before == 1
+
+
+def test_pipeline_stage_durations_and_errors(client):
+    """StagePipeline 단계 소요 시간과 실패 수가 단계별로 집계되는지 확인"""
+    async def ok(results):
+        return 1
+
+    async def fail(results):
+        raise RuntimeError("boom")
+
+    before = _samples(client)
+    pipeline = StagePipeline()
+    pipeline.add_stage("test_ok", ok)
+    pipeline.add_stage("test_fail", fail, deps=("test_ok",))
+    with pytest.raises(RuntimeError):
+        asyncio.run(pipeline.run())
+    after = _samples(client)
+
+    def delta(name, **labels):
+        return _value(after, name, **labels) - _value(before, name, **labels)
+
+    assert delta("nada_stage_duration_seconds_count", stage="test_ok") == 1
+    assert delta("nada_stage_duration_seconds_count", stage="test_fail") == 1
+    assert delta("nada_stage_errors_total", stage="test_fail") == 1
+    assert delta("nada_stage_errors_total", stage="test_ok") == 0
+
+
+def test_cache_and_token_counters(client):
+    """캐시 적중/실패와 모델별 토큰 사용량이 집계되는지 확인"""
+    before = _samples(client)
+    metrics.record_cache("response", hit=True)
+    metrics.record_cache("response", hit=False)
+    metrics.record_cache("response", hit=False)
+    metrics.record_token_usage({"test-model": {"input_tokens": 120, "output_tokens": 30, "total_tokens": 150}})
+    after = _samples(client)
+
+    def delta(name, **labels):
+        return _value(after, name, **labels) - _value(before, name, **labels)
+
+    assert delta("nada_cache_requests_total", cache="response", result="hit") == 1
+    assert delta("nada_cache_requests_total", cache="response", result="miss") == 2
+    assert delta("nada_llm_tokens_total", model="test-model", type="input") == 120
+    assert delta("nada_llm_tokens_total", model="test-model", type="output") == 30
+
+
+def test_timed_block_records_stage(client):
+    """metrics.timed 블록이 세부 작업 소요 시간과 실패 수를 기록하는지 확인"""
+    before = _samples(client)
+    with metrics.timed("test_block"):
+        pass
+    with pytest.raises(ValueError):
+        with metrics.timed("test_block"):
+            raise ValueError
+    after = _samples(client)
+
+    assert _value(after, "nada_stage_duration_seconds_count", stage="test_block") - _value(before, "nada_stage_duration_seconds_count", stage="test_block") == 2
+    assert _value(after, "nada_stage_errors_total", stage="test_block") - _value(before, "nada_stage_errors_total", stage="test_block") == 1
@@ -0,0 +1,77 @@
+"""
+ParallelEmbedder 프로세스 풀 테스트
+
+spawn 워커는 모델 대신 이 모듈의 텍스트 해시 임베딩을 로드합니다.
+"""
+import hashlib
+import os
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from app.core import indexer
+from app.core.indexer import ParallelEmbedder
+
+
+class DigestEmbeddings(Embeddings):
+    """텍스트 SHA-256으로 만든 결정적인 벡터"""
+
+    def embed_documents(self, texts):
+        return [[byte / 255 for byte in hashlib.sha256(text.encode()).digest()[:8]] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+_worker_embeddings = None
+
+
+def _init_digest_worker(model_name, backend, num_threads):
+    global _worker_embeddings
+    _worker_embeddings = DigestEmbeddings()
+
+
+def _embed_digest_batch(texts):
+    return {"pid": os.getpid(), "vectors": _worker_embeddings.embed_documents(texts)}
+
+
+@pytest.fixture
+def digest_workers(monkeypatch):
+    monkeypatch.setattr(indexer, "_init_embedding_worker", _init_digest_worker)
+    monkeypatch.setattr(indexer, "_embed_batch", _embed_digest_batch)
+
+
+def _texts(count):
+    return [f"chunk {i} about skin barrier" for i in range(count)]
+
+
+def test_process_pool_matches_serial_embedding(digest_workers):
+    """워커 2개로 나눠 임베딩해도 배치 순서와 벡터가 한 프로세스에서 계산한 결과와 같은지 확인"""
+    texts = _texts(23)
+    embedder = ParallelEmbedder(num_workers=2, batch_size=4, use_cache=False)
+
+    batches = list(embedder.embed(texts))
+
+    assert [len(batch["vectors"]) for batch in batches] == [4, 4, 4, 4, 4, 3]
+    assert all(batch["pid"] != os.getpid() for batch in batches)  # 워커 프로세스에서 계산
+    vectors = [vector for batch in batches for vector in batch["vectors"]]
+    serial = ParallelEmbedder(num_workers=1, batch_size=4, embeddings=DigestEmbeddings(), use_cache=False)
+    assert vectors == [vector for batch in serial.embed(texts) for vector in batch]
+
+
+def test_pending_batches_are_bounded(digest_workers):
+    """결과를 하나 받기 전에 입력에서 꺼내 가는 배치가 워커 수의 2배를 넘지 않는지 확인"""
+    pulled = []
+
+    def batches():
+        for i, text in enumerate(_texts(12)):
+            pulled.append(i)
+            yield [text]
+
+    embedder = ParallelEmbedder(num_workers=2, batch_size=1, use_cache=False)
+    ahead = []
+    for received, _ in enumerate(embedder.embed_batches(batches())):
+        ahead.append(len(pulled) - received)
+
+    assert len(ahead) == 12
+    assert max(ahead) == 2 * 2
@@ -0,0 +1,118 @@
+"""
+PDF 병렬 파싱 풀(PdfParsePool) 테스트
+
+워커는 spawn으로 이 모듈을 다시 import하므로, 워커 시작이 느려지지 않도록 app 모듈은 테스트 안에서 import합니다.
+"""
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+
+def _scripted_worker(conn):
+    """파일명에 따라 동작하는 테스트용 워커 (hang: 응답 없음, crash: 프로세스 종료, bad: 오류, 그 외: 성공)"""
+    while True:
+        path = conn.recv()
+        if path is None:
+            break
+        name = Path(path).stem
+        if name.startswith("hang"):
+            time.sleep(60)
+        elif name.startswith("crash"):
+            os._exit(1)
+        elif name.startswith("bad"):
+            conn.send((path, None, "ValueError: bad pdf"))
+        else:
+            conn.send((path, {"pages": [name], "total_pages": 1, "elapsed": 0.0}, None))
+
+
+def _pdf_bytes(text):
+    """텍스트 한 줄짜리 최소 PDF"""
+    stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode("latin-1")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+@pytest.fixture
+def scripted_pool(monkeypatch):
+    from app.core import indexer
+
+    monkeypatch.setattr(indexer, "_pdf_worker", _scripted_worker)
+    return indexer.PdfParsePool
+
+
+def _parse(pool, names):
+    return {Path(path).name: (result, error) for path, result, error in pool.parse([Path(name) for name in names])}
+
+
+def test_timeout_replaces_worker_and_continues(scripted_pool):
+    """제한 시간을 넘긴 파일은 timeout으로 실패 처리하고, 새 워커로 나머지 파일을 계속 처리하는지 확인"""
+    start = time.time()
+    results = _parse(scripted_pool(num_workers=1, timeout=2), ["hang.pdf", "a.pdf", "b.pdf"])
+
+    assert results["hang.pdf"][0] is None
+    assert results["hang.pdf"][1].startswith("timeout")
+    assert results["a.pdf"] == ({"pages": ["a"], "total_pages": 1, "elapsed": 0.0}, None)
+    assert results["b.pdf"][1] is None
+    assert time.time() - start < 30
+
+
+def test_timeout_does_not_block_other_workers(scripted_pool):
+    """한 워커가 멈춰 있어도 다른 워커는 파일을 계속 처리하는지 확인"""
+    order = [Path(path).name for path, _, _ in scripted_pool(num_workers=2, timeout=3).parse(
+        [Path("hang.pdf"), Path("a.pdf"), Path("b.pdf"), Path("c.pdf")]
+    )]
+
+    assert order[-1] == "hang.pdf"
+    assert sorted(order[:-1]) == ["a.pdf", "b.pdf", "c.pdf"]
+
+
+def test_crashed_worker_is_replaced(scripted_pool):
+    """워커가 비정상 종료되면 실패 처리 후 새 워커로 교체하는지 확인"""
+    results = _parse(scripted_pool(num_workers=1, timeout=30), ["crash.pdf", "a.pdf"])
+
+    assert results["crash.pdf"] == (None, "worker crashed")
+    assert results["a.pdf"][1] is None
+
+
+def test_parse_error_is_reported(scripted_pool):
+    """파싱 오류는 워커를 유지한 채 오류 메시지로 전달하는지 확인"""
+    results = _parse(scripted_pool(num_workers=1, timeout=30), ["bad.pdf", "a.pdf"])
+
+    assert results["bad.pdf"] == (None, "ValueError: bad pdf")
+    assert results["a.pdf"][1] is None
+
+
+def test_loader_parses_pdfs_and_records_failures(tmp_path):
+    """실제 워커로 PDF를 파싱하고, 손상된 파일은 report["failed"]에 기록하는지 확인"""
+    from app.core.indexer import DocumentLoader
+
+    (tmp_path / "good.pdf").write_bytes(_pdf_bytes("dry skin needs moisture"))
+    (tmp_path / "broken.pdf").write_bytes(b"not a pdf")
+
+    loader = DocumentLoader(folder_path=str(tmp_path), num_workers=2, timeout=60)
+    sources = list(loader.iter_sources())
+
+    assert len(sources) == 1
+    metadata, pages = sources[0]
+    assert metadata["source"] == "good.pdf"
+    assert "dry skin needs moisture" in pages[0]
+    assert list(loader.report["failed"]) == ["broken.pdf"]
+    assert "good.pdf" in loader.report["timings"]
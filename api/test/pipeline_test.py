@@ -0,0 +1,115 @@
+"""
+StagePipeline 스케줄러 테스트
+"""
+import asyncio
+
+import pytest
+
+from app.core.pipeline import StagePipeline
+
+
+def _stage(name, events, delay=0.0, result=None, error=None):
+    """시작/종료 이벤트를 기록하는 테스트용 단계"""
+    async def func(results):
+        events.append(("start", name))
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        events.append(("end", name))
+        return result if result is not None else name
+    return func
+
+
+def test_dependent_stage_runs_after_its_deps():
+    """선행 단계가 모두 끝난 뒤에 후행 단계가 시작되는지 확인"""
+    events = []
+    pipeline = StagePipeline()
+    pipeline.add_stage("upload", _stage("upload", events, delay=0.02))
+    pipeline.add_stage("search", _stage("search", events, delay=0.01))
+    pipeline.add_stage("generate", _stage("generate", events), deps=("upload", "search"))
+
+    results = asyncio.run(pipeline.run())
+
+    assert results == {"upload": "upload", "search": "search", "generate": "generate"}
+    generate_start = events.index(("start", "generate"))
+    assert events.index(("end", "upload")) < generate_start
+    assert events.index(("end", "search")) < generate_start
+
+
+def test_independent_stages_run_concurrently():
+    """서로 독립적인 단계가 동시에 실행되는지 확인 (둘 다 시작한 뒤 종료)"""
+    events = []
+    pipeline = StagePipeline()
+    pipeline.add_stage("a", _stage("a", events, delay=0.05))
+    pipeline.add_stage("b", _stage("b", events, delay=0.05))
+
+    asyncio.run(pipeline.run())
+
+    assert events[:2] == [("start", "a"), ("start", "b")]
+    assert pipeline.timings["b"]["start_ms"] < pipeline.timings["a"]["end_ms"]
+
+
+def test_stage_receives_dependency_results():
+    """후행 단계가 선행 단계 결과를 받는지 확인"""
+    async def double(results):
+        return results["base"] * 2
+
+    pipeline = StagePipeline()
+    pipeline.add_stage("base", _stage("base", [], result=21))
+    pipeline.add_stage("double", double, deps=("base",))
+
+    assert asyncio.run(pipeline.run())["double"] == 42
+
+
+def test_failure_cancels_other_stages_and_propagates():
+    """한 단계가 실패하면 예외가 전달되고 진행 중인 단계와 후행 단계가 취소되는지 확인"""
+    events = []
+    pipeline = StagePipeline()
+    pipeline.add_stage("fail", _stage("fail", events, delay=0.01, error=RuntimeError("boom")))
+    pipeline.add_stage("slow", _stage("slow", events, delay=1.0))
+    pipeline.add_stage("after", _stage("after", events), deps=("fail",))
+
+    with pytest.raises(RuntimeError, match="boom"):
+        asyncio.run(pipeline.run())
+
+    assert ("end", "slow") not in events
+    assert ("start", "after") not in events
+    assert "fail" in pipeline.timings
+
+
+def test_on_stage_done_called_for_each_successful_stage():
+    """단계 완료 콜백이 성공한 단계마다 결과와 함께 호출되는지 확인"""
+    done = []
+    pipeline = StagePipeline()
+    pipeline.add_stage("a", _stage("a", [], result=1))
+    pipeline.add_stage("b", _stage("b", [], result=2), deps=("a",))
+
+    asyncio.run(pipeline.run(on_stage_done=lambda name, result: done.append((name, result))))
+
+    assert done == [("a", 1), ("b", 2)]
+
+
+def test_critical_path_follows_slowest_dependency():
+    """임계 경로가 가장 늦게 끝난 선행 단계를 따라가는지 확인"""
+    pipeline = StagePipeline()
+    pipeline.add_stage("fast", _stage("fast", [], delay=0.0))
+    pipeline.add_stage("slow", _stage("slow", [], delay=0.05))
+    pipeline.add_stage("generate", _stage("generate", []), deps=("fast", "slow"))
+
+    asyncio.run(pipeline.run())
+
+    assert pipeline.critical_path() == ["slow", "generate"]
+    summary = pipeline.summary()
+    assert set(summary["stages"]) == {"fast", "slow", "generate"}
+    assert summary["total_ms"] >= summary["stages"]["generate"]["end_ms"]
+
+
+def test_add_stage_rejects_unknown_and_duplicate_stages():
+    """알 수 없는 선행 단계와 중복 단계 등록을 거부하는지 확인"""
+    pipeline = StagePipeline()
+    pipeline.add_stage("a", _stage("a", []))
+
+    with pytest.raises(ValueError):
+        pipeline.add_stage("a", _stage("a", []))
+    with pytest.raises(ValueError):
+        pipeline.add_stage("b", _stage("b", []), deps=("missing",))
@@ -0,0 +1,92 @@
+"""
+분석 로그 집계 스크립트(query_logs) 테스트
+"""
+import sys
+
+import pytest
+
+from app.core.chain_logger import SqliteLogWriter
+from scripts import query_logs
+
+
+def _record(timestamp, sources, total_ms, stages, total_tokens):
+    return {
+        "timestamp": timestamp,
+        "request_id": None,
+        "metadata": {
+            "config": {"LLM_MODEL": "gpt-4o", "EMBEDDING_MODEL": "e5"},
+            "image": {"url": "https://example.com/a.jpg", "detail_level": "low"},
+            "input": {"user_state": "건조해요"},
+            "search": {
+                "llm_raw_response": {"search_query": "보습"},
+                "papers": [
+                    {"rank": rank, "chunk_id": f"{source}-0", "source": source, "page": 1}
+                    for rank, source in enumerate(sources, 1)
+                ],
+            },
+            "timings": {
+                "total_ms": total_ms,
+                "stages": {
+                    name: {"start_ms": 0.0, "end_ms": duration, "duration_ms": duration}
+                    for name, duration in stages.items()
+                },
+            },
+            "tokens": {"input_tokens": total_tokens - 10, "output_tokens": 10, "total_tokens": total_tokens},
+        },
+        "analysis": {},
+    }
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "analysis.sqlite3"
+    writer = SqliteLogWriter(path)
+    writer.write(_record("2026-10-01T10:00:00", ["a.pdf", "b.pdf"], 1000.0, {"upload": 100.0}, 110))
+    writer.write(_record("2026-10-01T11:00:00", ["a.pdf"], 2000.0, {"upload": 300.0}, 210))
+    writer.write(_record("2026-10-02T09:00:00", ["c.pdf", "a.pdf"], 3000.0, {"upload": 200.0}, 310))
+    writer.close()
+    return path
+
+
+def _run(monkeypatch, capsys, *argv):
+    monkeypatch.setattr(sys, "argv", ["query_logs.py", *argv])
+    assert query_logs.main() == 0
+    return capsys.readouterr().out.splitlines()
+
+
+def test_papers_counts_hits_per_source(db_path, monkeypatch, capsys):
+    """논문별 검색 횟수/요청 수/평균 순위 집계"""
+    lines = _run(monkeypatch, capsys, "--db", str(db_path), "papers")
+
+    assert lines[1].split() == ["3", "3", "1.3", "a.pdf"]
+    assert sorted(line.split()[-1] for line in lines[2:]) == ["b.pdf", "c.pdf"]
+
+
+def test_papers_by_chunk_with_day_filter(db_path, monkeypatch, capsys):
+    """--by chunk와 --day로 하루치 청크 집계"""
+    lines = _run(monkeypatch, capsys, "--db", str(db_path), "papers", "--by", "chunk", "--day", "2026-10-02")
+
+    assert sorted(line.split()[0] for line in lines[1:]) == ["a.pdf-0", "c.pdf-0"]
+
+
+def test_latency_reports_total_and_stage_percentiles(db_path, monkeypatch, capsys):
+    """전체/단계별 p50 집계"""
+    lines = _run(monkeypatch, capsys, "--db", str(db_path), "latency")
+
+    assert lines[1].split()[:3] == ["(total)", "3", "2000"]
+    assert lines[2].split()[:3] == ["upload", "3", "200"]
+
+
+def test_tokens_grouped_by_day(db_path, monkeypatch, capsys):
+    """일별 요청 수/토큰 합계"""
+    lines = _run(monkeypatch, capsys, "--db", str(db_path), "tokens")
+
+    assert lines[1].split() == ["2026-10-01", "2", "300", "20", "320", "160"]
+    assert lines[2].split() == ["2026-10-02", "1", "300", "10", "310", "310"]
+
+
+def test_missing_db_fails(tmp_path, monkeypatch, capsys):
+    """로그 DB가 없으면 1 반환"""
+    monkeypatch.setattr(sys, "argv", ["query_logs.py", "--db", str(tmp_path / "missing.sqlite3"), "papers"])
+
+    assert query_logs.main() == 1
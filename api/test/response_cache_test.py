@@ -0,0 +1,118 @@
+"""
+분석 응답 캐시 테스트
+"""
+import io
+import random
+
+import pytest
+from PIL import Image, ImageDraw
+
+from app.core import response_cache
+from app.core.response_cache import ResponseCache, perceptual_hash
+
+
+RESPONSE = {"analysis": {"summary": "건조한 피부"}, "recommendations": []}
+
+
+class FakeClock:
+    """response_cache 모듈의 time.time 대체"""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(response_cache.time, "time", fake.time)
+    return fake
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    cache = ResponseCache(path=tmp_path / "cache.sqlite3", ttl_seconds=60, max_entries=3, similarity_threshold=0.9)
+    yield cache
+    cache.close()
+
+
+def _image_bytes(fmt="PNG", quality=95, seed=0):
+    """인접 블록 밝기 차이가 뚜렷한 9x8 블록 사진 (재인코딩 노이즈로 해시 비트가 바뀌지 않도록)"""
+    rng = random.Random(seed)
+    image = Image.new("L", (9 * 32, 8 * 32))
+    draw = ImageDraw.Draw(image)
+    for y in range(8):
+        previous = None
+        for x in range(9):
+            fill = rng.choice([level for level in range(0, 256, 40) if level != previous])
+            draw.rectangle((x * 32, y * 32, x * 32 + 31, y * 32 + 31), fill=fill)
+            previous = fill
+    buffer = io.BytesIO()
+    image.convert("RGB").save(buffer, format=fmt, quality=quality)
+    return buffer.getvalue()
+
+
+def test_similar_user_state_hits(cache):
+    """같은 이미지 해시 + 유사한 user_state 임베딩이면 저장된 응답을 반환하는지 확인"""
+    cache.store("abcd", "건조해요", [1.0, 0.0], RESPONSE)
+
+    assert cache.lookup("abcd", [0.99, 0.05]) == RESPONSE
+    assert cache.stats()["hits"] == 1
+
+
+def test_dissimilar_user_state_misses(cache):
+    """user_state 유사도가 임계값보다 낮으면 캐시를 쓰지 않는지 확인"""
+    cache.store("abcd", "건조해요", [1.0, 0.0], RESPONSE)
+
+    assert cache.lookup("abcd", [0.0, 1.0]) is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_other_image_hash_misses(cache):
+    """이미지 해시가 다르면 캐시를 쓰지 않는지 확인"""
+    cache.store("abcd", "건조해요", [1.0, 0.0], RESPONSE)
+
+    assert cache.lookup("ffff", [1.0, 0.0]) is None
+
+
+def test_lookup_picks_most_similar_entry(cache):
+    """같은 이미지에 여러 응답이 있으면 가장 유사한 항목을 반환하는지 확인"""
+    cache.store("abcd", "건조해요", [1.0, 0.0], {"id": "dry"})
+    cache.store("abcd", "번들거려요", [0.8, 0.6], {"id": "oily"})
+
+    assert cache.lookup("abcd", [0.79, 0.61]) == {"id": "oily"}
+
+
+def test_expired_entry_misses(cache, clock):
+    """TTL이 지난 항목은 반환하지 않는지 확인"""
+    cache.store("abcd", "건조해요", [1.0, 0.0], RESPONSE)
+    clock.now += 61
+
+    assert cache.lookup("abcd", [1.0, 0.0]) is None
+
+
+def test_least_recently_used_entry_is_evicted(cache, clock):
+    """최대 개수를 넘으면 가장 오래 사용되지 않은 항목부터 삭제하는지 확인"""
+    for i, image_hash in enumerate(["h0", "h1", "h2"]):
+        clock.now += 1
+        cache.store(image_hash, str(i), [1.0, 0.0], {"id": image_hash})
+    clock.now += 1
+    cache.lookup("h0", [1.0, 0.0])  # h0을 최근 사용으로 갱신
+    clock.now += 1
+    cache.store("h3", "3", [1.0, 0.0], {"id": "h3"})  # h1 삭제
+
+    assert cache.stats()["size"] == 3
+    assert cache.lookup("h1", [1.0, 0.0]) is None
+    assert cache.lookup("h0", [1.0, 0.0]) == {"id": "h0"}
+
+
+def test_perceptual_hash_survives_reencoding():
+    """같은 사진을 다른 형식/품질로 다시 인코딩해도 같은 해시를 내는지 확인"""
+    assert perceptual_hash(_image_bytes("PNG")) == perceptual_hash(_image_bytes("JPEG", quality=70))
+
+
+def test_perceptual_hash_differs_for_different_images():
+    """다른 사진에는 다른 해시를 내는지 확인"""
+    assert perceptual_hash(_image_bytes(seed=0)) != perceptual_hash(_image_bytes(seed=1))
@@ -0,0 +1,230 @@
+"""
+요청 트레이싱 / X-Request-ID 테스트
+"""
+import asyncio
+import queue
+import sys
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core import tracing
+from app.core.config import Config
+from app.core.tracing import JsonlTraceExporter, Trace, TraceExportQueue
+from app.utils.concurrency import get_executor, run_blocking
+from app.utils.logging import LoggingMiddleware
+from scripts import query_logs
+
+
+class CollectingExporter:
+    """내보낸 트레이스를 큐에 모으는 테스트용 exporter (내보내기는 전용 스레드에서 비동기로 실행됨)"""
+
+    def __init__(self):
+        self.traces = queue.Queue()
+
+    def export(self, trace):
+        self.traces.put(trace.to_dict())
+
+    def next(self):
+        return self.traces.get(timeout=5)
+
+
+def _blocking_work():
+    with tracing.span("blocking_work"):
+        return tracing.current_request_id()
+
+
+def _create_app():
+    app = FastAPI()
+    app.add_middleware(LoggingMiddleware)
+
+    @app.get("/work")
+    async def work():
+        with tracing.span("outer", kind="stage"):
+            request_id = await run_blocking(_blocking_work)
+        return {"request_id": request_id}
+
+    @app.get("/stream")
+    async def stream():
+        async def body():
+            for i in range(3):
+                await asyncio.sleep(0.01)
+                yield f"{i}\n"
+        return StreamingResponse(body(), media_type="text/plain")
+
+    @app.get("/health")
+    def health():
+        return {"status": "ok"}
+
+    return app
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    collector = CollectingExporter()
+    monkeypatch.setattr(tracing, "_exporter", collector)
+    monkeypatch.setattr(Config, "TRACING_ENABLED", True)
+    return collector
+
+
+@pytest.fixture
+def client(exporter):
+    return TestClient(_create_app())
+
+
+def test_request_id_header_is_propagated(client, exporter):
+    """요청의 X-Request-ID를 응답 헤더, 스레드 풀 작업, 내보낸 트레이스에서 그대로 쓰는지 확인"""
+    response = client.get("/work", headers={"X-Request-ID": "req-abc.123_X"})
+
+    assert response.headers["X-Request-ID"] == "req-abc.123_X"
+    assert response.json() == {"request_id": "req-abc.123_X"}
+    trace = exporter.next()
+    assert trace["request_id"] == "req-abc.123_X"
+    assert trace["name"] == "GET /work"
+
+
+def test_request_id_is_generated_when_missing(client, exporter):
+    """X-Request-ID가 없으면 새로 생성해 응답 헤더로 돌려주는지 확인"""
+    response = client.get("/work")
+
+    request_id = response.headers["X-Request-ID"]
+    assert len(request_id) == 32
+    assert response.json() == {"request_id": request_id}
+    assert exporter.next()["request_id"] == request_id
+
+
+@pytest.mark.parametrize("value", ["a" * 129, "has space", "a/b", "<script>", "id,other"])
+def test_malformed_request_id_is_replaced(client, exporter, value):
+    """형식에 맞지 않는 X-Request-ID(128자 초과, 허용되지 않는 문자)는 버리고 새로 생성하는지 확인"""
+    response = client.get("/work", headers={"X-Request-ID": value})
+
+    request_id = response.headers["X-Request-ID"]
+    assert request_id != value
+    assert len(request_id) == 32
+    assert exporter.next()["request_id"] == request_id
+
+
+def test_hex_request_id_is_used_as_trace_id():
+    """32자리 16진수 상관 ID는 OTLP trace ID로 그대로 사용하는지 확인"""
+    request_id = "0123456789abcdef0123456789abcdef"
+
+    assert Trace("GET /work", request_id).trace_id == request_id
+    assert Trace("GET /work", "req-1").trace_id != "req-1"
+
+
+def test_span_tree_follows_context_across_threads(client, exporter):
+    """스레드 풀에서 실행한 span도 요청 트레이스의 자식으로 연결되는지 확인"""
+    client.get("/work")
+
+    spans = {span["name"]: span for span in exporter.next()["spans"]}
+    assert spans["outer"]["parent_id"] == spans["GET /work"]["span_id"]
+    assert spans["blocking_work"]["parent_id"] == spans["outer"]["span_id"]
+    assert spans["GET /work"]["attributes"]["http.status_code"] == 200
+
+
+def test_streaming_trace_ends_after_body(client, exporter):
+    """스트리밍 응답은 본문 전송이 끝난 뒤 루트 span을 닫는지 확인"""
+    response = client.get("/stream", headers={"X-Request-ID": "stream-1"})
+
+    assert response.text == "0\n1\n2\n"
+    assert response.headers["X-Request-ID"] == "stream-1"
+    trace = exporter.next()
+    assert trace["request_id"] == "stream-1"
+    assert trace["duration_ms"] >= 30
+
+
+@pytest.mark.parametrize("path", ["/health", "/metrics"])
+def test_excluded_paths_are_not_traced(exporter, path):
+    """/health, /metrics는 트레이스하지 않고 X-Request-ID도 붙이지 않는지 확인"""
+    from app.main import app
+
+    response = TestClient(app).get(path, headers={"X-Request-ID": "probe-1"})
+
+    assert response.status_code == 200
+    assert "X-Request-ID" not in response.headers
+    assert exporter.traces.empty()
+
+
+def test_trace_files_rotate_and_are_read_by_query_logs(tmp_path, monkeypatch, capsys):
+    """트레이스 파일이 크기 기준으로 교체되고 query_logs trace가 교체된 파일까지 찾는지 확인"""
+    monkeypatch.setattr(Config, "LOG_MAX_BYTES", 300)
+    exporter = JsonlTraceExporter(str(tmp_path))
+    for i in range(5):
+        trace = Trace("GET /work", f"req-{i}")
+        child = trace.start_span("child", "internal", trace.root)
+        child.end()
+        trace.root.end()
+        exporter.export(trace)
+
+    assert len(list(tmp_path.glob("traces_*.jsonl"))) > 1
+    assert [trace["request_id"] for trace in query_logs.load_traces(tmp_path)] == [f"req-{i}" for i in range(5)]
+
+    monkeypatch.setattr(sys, "argv", ["query_logs.py", "trace", "req-0", "--dir", str(tmp_path)])
+    assert query_logs.main() == 0
+    output = capsys.readouterr().out
+    assert "req-0" in output
+    assert "child [internal]" in output
+
+
+class BlockingExporter:
+    """풀어줄 때까지 내보내기를 붙잡는 exporter (느린 OTLP 수집기 흉내)"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.exported = []
+
+    def export(self, trace):
+        self.release.wait(timeout=5)
+        self.exported.append(trace.request_id)
+
+
+def test_slow_exporter_does_not_hold_executor(monkeypatch):
+    """수집기가 느려도 트레이스 내보내기가 분석용 스레드 풀을 점유하지 않는지 확인"""
+    slow = BlockingExporter()
+    monkeypatch.setattr(tracing, "_exporter", slow)
+    monkeypatch.setattr(Config, "TRACING_ENABLED", True)
+    monkeypatch.setattr(tracing, "_export_queue", TraceExportQueue())
+    client = TestClient(_create_app())
+
+    for i in range(Config.THREAD_POOL_WORKERS + 2):
+        assert client.get("/work", headers={"X-Request-ID": f"req-{i}"}).status_code == 200
+    # 내보내기가 막혀 있어도 스레드 풀은 바로 다른 작업을 받음
+    assert get_executor().submit(lambda: "free").result(timeout=1) == "free"
+
+    slow.release.set()
+    tracing.shutdown_tracing()
+    assert slow.exported == [f"req-{i}" for i in range(Config.THREAD_POOL_WORKERS + 2)]
+
+
+def test_export_queue_drops_when_full(monkeypatch):
+    """큐가 가득 차면 기다리지 않고 버리는지 확인"""
+    slow = BlockingExporter()
+    monkeypatch.setattr(tracing, "_exporter", slow)
+    export_queue = TraceExportQueue(queue_size=2)
+
+    results = [export_queue.submit(Trace("GET /work", f"req-{i}")) for i in range(6)]
+
+    # 첫 트레이스는 내보내기 스레드가 꺼내 가므로 큐에는 최대 2개가 더 들어감
+    assert results.count(False) >= 3
+    assert export_queue.dropped == results.count(False)
+    slow.release.set()
+    export_queue.close()
+    assert len(slow.exported) == results.count(True)
+
+
+def test_export_queue_drains_on_close_and_drops_after(exporter):
+    """close()는 남은 트레이스를 모두 내보내고, 이후 들어온 트레이스는 새 스레드 없이 버리는지 확인"""
+    export_queue = TraceExportQueue()
+    for i in range(3):
+        export_queue.submit(Trace("GET /work", f"req-{i}"))
+
+    export_queue.close()
+
+    assert [exporter.next()["request_id"] for _ in range(3)] == ["req-0", "req-1", "req-2"]
+    assert not export_queue.submit(Trace("GET /work", "late"))
+    assert export_queue.dropped == 1
+    assert exporter.traces.empty()
+    assert not export_queue._thread.is_alive()
@@ -0,0 +1,63 @@
+"""
+LLM 응답 파싱(parse_llm_output) 테스트
+"""
+import json
+
+import pytest
+
+from app.core.vision import LLMOutputError, parse_llm_output
+from app.schemas.analysis import QueryGeneration
+
+
+PAYLOAD = {
+    "image_analysis": {"hair": "건조하고 끝이 갈라짐", "skin": "T존 유분", "contour": "계란형"},
+    "search_query": "건조한 모발 지성 T존 관리",
+}
+
+
+def test_structured_output_parses_directly():
+    """응답 전체가 JSON이면 그대로 파싱하는지 확인"""
+    result = parse_llm_output(json.dumps(PAYLOAD, ensure_ascii=False), QueryGeneration)
+
+    assert result.search_query == PAYLOAD["search_query"]
+    assert result.image_analysis.skin == "T존 유분"
+
+
+def test_code_block_falls_back_to_first_object():
+    """코드 블록으로 감싼 JSON은 첫 '{'부터 객체 하나만 디코딩하는지 확인"""
+    content = "```json\n" + json.dumps(PAYLOAD, ensure_ascii=False) + "\n```"
+
+    assert parse_llm_output(content, QueryGeneration).image_analysis.hair == "건조하고 끝이 갈라짐"
+
+
+def test_surrounding_text_is_ignored():
+    """JSON 앞뒤 설명과 뒤따르는 다른 객체는 무시하는지 확인"""
+    content = "분석 결과입니다:\n" + json.dumps(PAYLOAD) + '\n참고: {"extra": true}'
+
+    assert parse_llm_output(content, QueryGeneration).search_query == PAYLOAD["search_query"]
+
+
+@pytest.mark.parametrize("content", ["", None])
+def test_empty_response_raises(content):
+    """빈 응답은 LLMOutputError"""
+    with pytest.raises(LLMOutputError):
+        parse_llm_output(content, QueryGeneration)
+
+
+def test_response_without_json_raises():
+    """JSON이 없는 응답은 LLMOutputError"""
+    with pytest.raises(LLMOutputError, match="JSON이 없습니다"):
+        parse_llm_output("죄송합니다. 이미지를 분석할 수 없습니다.", QueryGeneration)
+
+
+def test_schema_mismatch_raises():
+    """스키마에 맞지 않는 JSON은 LLMOutputError (ValueError 하위 클래스)"""
+    with pytest.raises(LLMOutputError, match="QueryGeneration"):
+        parse_llm_output('{"search_query": "건조"}', QueryGeneration)
+    assert issubclass(LLMOutputError, ValueError)
+
+
+def test_truncated_json_raises():
+    """잘린 JSON은 LLMOutputError"""
+    with pytest.raises(LLMOutputError):
+        parse_llm_output(json.dumps(PAYLOAD)[:-10], QueryGeneration)